@@ -0,0 +1,197 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from cache import LRUCache
+from db import BATCH_SIZE, search
+
+PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 500
+
+# The read queries behind both web front ends: hello.py (Flask, one
+# thread per request) and hello_async.py (asyncio). Everything returns
+# plain dicts and lists, ready for JSON.
+
+# Per resource: table, id column, the columns shown, and the extra
+# (name, correlated subquery) fields added to each item; *_ids fields are
+# ';'-joined by GROUP_CONCAT and sent as lists.
+RESOURCES = {
+    "students": ("students", "student_id", ("student_id", "name", "age", "email"),
+                 [("course_ids", "SELECT GROUP_CONCAT(r.course_id, ';') FROM registrations r "
+                                 "WHERE r.student_id = t.student_id")]),
+    "instructors": ("instructors", "instructor_id", ("instructor_id", "name", "age", "email"),
+                    [("course_ids", "SELECT GROUP_CONCAT(c.course_id, ';') FROM courses c "
+                                    "WHERE c.instructor_id = t.instructor_id")]),
+    "courses": ("courses", "course_id", ("course_id", "course_name", "instructor_id"),
+                [("student_count", "SELECT COUNT(*) FROM registrations r WHERE r.course_id = t.course_id")]),
+}
+_STUDENT_COLUMNS = ("student_id", "name", "age", "email")
+_REGISTRATION_COLUMNS = ("student_id", "course_id")
+
+# Single records, course roster pages and search results are read through
+# these. Requests that change a record do it inside writing() and
+# invalidate() it at once. Any other commit (another process, or code here
+# that bypasses writing()) shows up in PRAGMA data_version on the next
+# read and clears them all. data_version only says that some other
+# connection committed, so it is read on one probe connection of our own:
+# every pooled connection would see this process's commits as foreign.
+RECORD_CACHE = LRUCache(50_000)
+ROSTER_CACHE = LRUCache(10_000)
+SEARCH_CACHE = LRUCache(1_000)
+_probe: Optional[sqlite3.Connection] = None
+_probe_path: Optional[str] = None
+_expected_version: Optional[int] = None
+_probe_lock = threading.Lock()
+_write_lock = threading.Lock()
+# bumped by invalidate("courses", ...); part of the roster page keys, so a
+# course's cached pages all go stale at once and age out of the LRU
+_roster_versions: Dict[str, int] = {}
+
+
+def page_limit(value) -> int:
+    """The ?limit= of a page request; raises ValueError with the reason."""
+    if value is None:
+        return PAGE_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError("limit must be an integer") from None
+    if not 1 <= limit <= MAX_PAGE_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_LIMIT}")
+    return limit
+
+def _select(resource: str) -> str:
+    table, _, columns, lists = RESOURCES[resource]
+    return f"SELECT {', '.join([f't.{c}' for c in columns] + [f'({sql})' for _, sql in lists])} FROM {table} t"
+
+def _item(resource: str, row) -> dict:
+    _, _, columns, lists = RESOURCES[resource]
+    item = dict(zip(columns + tuple(name for name, _ in lists), row))
+    for name, _ in lists:
+        if name.endswith("_ids"):
+            item[name] = item[name].split(";") if item[name] else []
+    return item
+
+# Keyset paging: a page starts after the last id of the one before, so
+# deep pages cost the same as the first and stay stable under inserts.
+# Pages return (items, more).
+
+def list_page(conn: sqlite3.Connection, resource: str, after: str, limit: int) -> Tuple[List[dict], bool]:
+    _, key, _, _ = RESOURCES[resource]
+    rows = conn.execute(f"{_select(resource)} WHERE t.{key} > ? ORDER BY t.{key} LIMIT ?",
+                        (after, limit + 1)).fetchall()
+    return [_item(resource, r) for r in rows[:limit]], len(rows) > limit
+
+def _data_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA data_version").fetchone()[0]
+
+def _clear_caches() -> None:
+    for cache in (RECORD_CACHE, ROSTER_CACHE, SEARCH_CACHE):
+        cache.clear()
+
+def _probe_version(conn: sqlite3.Connection) -> int:
+    # caller holds _probe_lock; a different database file starts over
+    global _probe, _probe_path, _expected_version
+    path = conn.execute("PRAGMA database_list").fetchone()[2]
+    if path != _probe_path:
+        if _probe is not None:
+            _probe.close()
+        # an in-memory database has no other writers to watch for
+        _probe = sqlite3.connect(path, check_same_thread=False) if path else None
+        _probe_path, _expected_version = path, None
+    return _data_version(_probe) if _probe is not None else 0
+
+def _check_version(conn: sqlite3.Connection) -> None:
+    global _expected_version
+    with _probe_lock:
+        version = _probe_version(conn)
+        if version != _expected_version:
+            _clear_caches()
+            _expected_version = version
+
+@contextmanager
+def writing(conn: sqlite3.Connection):
+    """Runs one write transaction of this process on conn and commits it.
+
+    The commit does not clear the caches the way a foreign one does; the
+    caller invalidate()s what it changed afterwards."""
+    global _expected_version
+    with _write_lock:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # commits made before this one still count as foreign
+            _check_version(conn)
+            before = _data_version(conn)
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        with _probe_lock:
+            version = _probe_version(conn)
+            # conn's own commit leaves its data_version alone: a change means
+            # another writer got in after it, so that one clears everything
+            if _data_version(conn) != before:
+                _clear_caches()
+            _expected_version = version
+
+def invalidate(resource: str, *record_ids: str) -> None:
+    """Drops cached records (and a course's roster) after this process changed them."""
+    RECORD_CACHE.invalidate(*((resource, rid) for rid in record_ids))
+    if resource == "courses":
+        for rid in record_ids:
+            _roster_versions[rid] = _roster_versions.get(rid, 0) + 1
+
+def cache_stats() -> dict:
+    return {"records": RECORD_CACHE.stats.as_dict(), "rosters": ROSTER_CACHE.stats.as_dict(),
+            "searches": SEARCH_CACHE.stats.as_dict()}
+
+def get_record(conn: sqlite3.Connection, resource: str, record_id: str) -> Optional[dict]:
+    _check_version(conn)
+
+    def load():
+        _, key, _, _ = RESOURCES[resource]
+        row = conn.execute(f"{_select(resource)} WHERE t.{key} = ?", (record_id,)).fetchone()
+        return None if row is None else _item(resource, row)
+    return RECORD_CACHE.get_or_load((resource, record_id), load)
+
+def exists(conn: sqlite3.Connection, table: str, key: str, record_id: str) -> bool:
+    return conn.execute(f"SELECT 1 FROM {table} WHERE {key} = ?", (record_id,)).fetchone() is not None
+
+def course_students_page(conn: sqlite3.Connection, course_id: str, after: str,
+                         limit: int) -> Tuple[List[dict], bool]:
+    _check_version(conn)
+
+    def load():
+        rows = conn.execute(
+            "SELECT s.student_id, s.name, s.age, s.email FROM registrations r "
+            "JOIN students s ON s.student_id = r.student_id "
+            "WHERE r.course_id = ? AND r.student_id > ? ORDER BY r.student_id LIMIT ?",
+            (course_id, after, limit + 1)).fetchall()
+        return [dict(zip(_STUDENT_COLUMNS, r)) for r in rows[:limit]], len(rows) > limit
+    return ROSTER_CACHE.get_or_load((course_id, _roster_versions.get(course_id, 0), after, limit), load)
+
+def search_items(conn: sqlite3.Connection, text: str, limit: int) -> List[dict]:
+    # registrations and assignments are not searchable, so only commits
+    # seen by _check_version() can change a result
+    _check_version(conn)
+    return SEARCH_CACHE.get_or_load(
+        (" ".join(text.lower().split()), limit),
+        lambda: [dict(zip(("kind", "id", "name", "email"), h)) for h in search(conn, text, limit)])
+
+def stream_items(conn: sqlite3.Connection, resource: str) -> Iterator[List[dict]]:
+    """Every item of resource, or every registration for "registrations",
+    in id order, in lists of up to BATCH_SIZE."""
+    if resource == "registrations":
+        cur = conn.execute("SELECT student_id, course_id FROM registrations ORDER BY student_id, course_id")
+        make = lambda row: dict(zip(_REGISTRATION_COLUMNS, row))
+    else:
+        _, key, _, _ = RESOURCES[resource]
+        cur = conn.execute(f"{_select(resource)} ORDER BY t.{key}")
+        make = lambda row: _item(resource, row)
+    while True:
+        rows = cur.fetchmany(BATCH_SIZE)
+        if not rows:
+            return
+        yield [make(r) for r in rows]
@@ -0,0 +1,78 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from db import ConnectionPool, save_all, load_all, backup_to
+from exporter import export_db_csv
+from importer import import_csv
+
+class Cancelled(Exception):
+    """Raised inside a background task once its cancel() was requested."""
+
+
+class Progress:
+    """Progress callback handed to save_all(), load_json() & co. as `progress`.
+
+    The task calls it as progress(done, total) from the worker thread; the
+    GUI reads `done`/`total` from its own loop. After cancel() the next
+    call raises Cancelled, which unwinds the task (rolling back a DB
+    transaction or discarding a half-written file on the way).
+    """
+
+    def __init__(self):
+        self.done = 0
+        self.total = 0
+        self._cancel = threading.Event()
+
+    def __call__(self, done: int, total: int) -> None:
+        self.done, self.total = done, total
+        if self._cancel.is_set():
+            raise Cancelled()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def fraction(self) -> Optional[float]:
+        """0.0-1.0, or None while the total is not known yet."""
+        return min(1.0, self.done / self.total) if self.total else None
+
+
+# One worker: file and DB jobs run one at a time, in submission order.
+_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="school-io")
+
+def submit(fn: Callable, *args, **kwargs) -> Tuple[Future, Progress]:
+    """Runs fn(*args, progress=..., **kwargs) on the worker thread."""
+    progress = Progress()
+    return _EXECUTOR.submit(fn, *args, progress=progress, **kwargs), progress
+
+
+# ---- DB jobs ---------------------------------------------------------
+# Each job borrows a connection from the pool for the worker thread, so it
+# never touches the one the GUI thread is reading with.
+
+def db_save(pool: ConnectionPool, students, instructors, courses, removed=None, progress=None):
+    with pool.connection() as conn:
+        save_all(conn, students, instructors, courses, removed=removed, progress=progress)
+
+def db_load(pool: ConnectionPool, progress=None):
+    """load_all() without a registry; the caller hands the result to
+    SchoolRegistry.replace(..., synced=True) on the GUI thread."""
+    with pool.connection() as conn:
+        return load_all(conn, progress=progress)
+
+def db_backup(pool: ConnectionPool, backup_path: str, incremental: bool = False, progress=None):
+    """backup_to() on a pooled connection; returns "full" or "incremental"."""
+    with pool.connection() as conn:
+        return backup_to(conn, backup_path, progress=progress, incremental=incremental)
+
+def db_import_csv(pool: ConnectionPool, directory: str, progress=None):
+    with pool.connection() as conn:
+        return import_csv(conn, directory, progress=progress)
+
+def db_export_csv(pool: ConnectionPool, directory: str, compress: bool = False, progress=None):
+    with pool.connection() as conn:
+        return export_db_csv(conn, directory, compress=compress, progress=progress)
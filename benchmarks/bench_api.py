@@ -0,0 +1,84 @@
+"""Requests per second: hello.py (Flask, a thread per request) vs.
+hello_async.py (asyncio under uvicorn, SQLite on reader threads).
+
+Fills a temporary database, starts each server on it in turn and drives
+it with benchmarks.load_test, once with lookups and list pages only and
+once with 20% searches mixed in. Needs Flask and uvicorn installed.
+
+    python -m benchmarks.bench_api [N_STUDENTS] [--clients 32] [--seconds 10]
+"""
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_export_csv import fill
+from benchmarks.load_test import percentile, run
+from db import init_db
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVERS = (
+    ("sync (Flask, threaded)", ["-m", "flask", "--app", "hello", "run", "--with-threads", "--port"]),
+    ("async (uvicorn)", ["-m", "uvicorn", "hello_async:app", "--log-level", "warning", "--port"]),
+)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(port: int, timeout: float = 20.0):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/")
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("students", type=int, nargs="?", default=100_000)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "school.db")
+        conn = init_db(db_path)
+        fill(conn, args.students)
+        conn.close()
+        print(f"{args.students:,} students, {args.clients} clients, {args.seconds:.0f} s per run")
+        print(f"{'':<24}{'searches':>9}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}")
+        for label, command in SERVERS:
+            port = free_port()
+            server = subprocess.Popen([sys.executable, *command, str(port)], cwd=ROOT,
+                                      env={**os.environ, "SCHOOL_DB": db_path},
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_until_up(port)
+                for searches in (0.0, 0.2):
+                    r = run(f"http://127.0.0.1:{port}", args.clients, args.seconds, searches)
+                    bad = sum(v for k, v in r["statuses"].items() if k not in (200, 304))
+                    print(f"{label:<24}{searches:>8.0%}{r['requests'] / r['elapsed']:>9,.0f}"
+                          f"{percentile(r['latencies'], 50) * 1000:>9.1f}"
+                          f"{percentile(r['latencies'], 99) * 1000:>9.1f}{bad:>8,}")
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    main()
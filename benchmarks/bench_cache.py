@@ -0,0 +1,60 @@
+"""api.py's read-through caches: record lookups, course roster pages and
+searches, with the caches on and with them shrunk to one entry.
+
+Lookups draw ids from a hot set, as a busy front end would; searches
+repeat a handful of typed prefixes.
+
+    python -m benchmarks.bench_cache [N_STUDENTS]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import api
+from benchmarks.bench_export_csv import N_COURSES, fill
+from cache import LRUCache
+from db import init_db
+
+LOOKUPS = 50_000
+HOT_IDS = 2_000
+ROSTER_PAGES = 5_000
+HOT_COURSES = 100
+SEARCHES = 500
+WORDS = ("stu", "course", "teach", "student 1", "s1", "t4")
+
+
+def timed(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main(n_students: int = 100_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = init_db(os.path.join(tmp, "school.db"))
+        fill(conn, n_students)
+        rng = random.Random(1)
+        hot = [f"S{rng.randrange(n_students)}" for _ in range(HOT_IDS)]
+        ids = [rng.choice(hot) for _ in range(LOOKUPS)]
+        hot_courses = [f"C{rng.randrange(N_COURSES)}" for _ in range(HOT_COURSES)]
+        courses = [rng.choice(hot_courses) for _ in range(ROSTER_PAGES)]
+        queries = [rng.choice(WORDS) for _ in range(SEARCHES)]
+
+        print(f"{n_students:,} students")
+        print(f"{'':<14}{'lookups/s':>12}{'rosters/s':>12}{'searches/s':>12}")
+        for label, sizes in (("caches off", (1, 1, 1)), ("caches on", (HOT_IDS, HOT_COURSES, len(WORDS)))):
+            api.RECORD_CACHE, api.ROSTER_CACHE, api.SEARCH_CACHE = map(LRUCache, sizes)
+            lookups = timed(lambda: [api.get_record(conn, "students", sid) for sid in ids])
+            rosters = timed(lambda: [api.course_students_page(conn, cid, "", 50) for cid in courses])
+            searches = timed(lambda: [api.search_items(conn, q, 20) for q in queries])
+            print(f"{label:<14}{LOOKUPS / lookups:>12,.0f}{ROSTER_PAGES / rosters:>12,.0f}"
+                  f"{SEARCHES / searches:>12,.0f}")
+        for name, stats in api.cache_stats().items():
+            print(f"  {name:<10}{stats}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
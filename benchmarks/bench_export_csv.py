@@ -0,0 +1,69 @@
+"""CSV export: load_all() + datastore.export_csv() vs. exporter.export_db_csv().
+
+The old path has to build the whole object graph before writing a line;
+the streaming one reads rows straight off cursors. Peak RSS is sampled
+after each step, streaming first, since it only ever grows.
+
+    python -m benchmarks.bench_export_csv [N_STUDENTS]
+"""
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from datastore import export_csv
+from db import bulk_writes, init_db, load_all
+from exporter import export_db_csv
+
+N_COURSES = 1000
+N_INSTRUCTORS = 200
+PER_STUDENT = 3
+
+
+def fill(conn, n_students: int):
+    conn.execute("BEGIN")
+    with bulk_writes(conn):
+        conn.executemany("INSERT INTO instructors VALUES(?,?,?,?)",
+                         ((f"I{k}", f"Teacher {k}", 40, f"t{k}@school.edu") for k in range(N_INSTRUCTORS)))
+        conn.executemany("INSERT INTO courses VALUES(?,?,?)",
+                         ((f"C{k}", f"Course {k}", f"I{k % N_INSTRUCTORS}") for k in range(N_COURSES)))
+        conn.executemany("INSERT INTO students VALUES(?,?,?,?)",
+                         ((f"S{k}", f"Student {k}", 20, f"s{k}@school.edu") for k in range(n_students)))
+        conn.executemany("INSERT INTO registrations VALUES(?,?)",
+                         ((f"S{k}", f"C{(k + j * 7) % N_COURSES}")
+                          for k in range(n_students) for j in range(PER_STUDENT)))
+    conn.commit()
+
+
+def peak_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def timed(label, fn):
+    t0 = time.perf_counter()
+    paths = fn()
+    size = sum(os.path.getsize(p) for p in paths)
+    print(f"{label:<28}{time.perf_counter() - t0:>8.1f} s{size / 2**20:>8.0f} MiB{peak_mb():>10.0f} MiB")
+
+
+def main(n_students: int = 500_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = init_db(os.path.join(tmp, "school.db"))
+        fill(conn, n_students)
+        print(f"{n_students:,} students; peak RSS after filling the database: {peak_mb():.0f} MiB")
+        print(f"{'':<28}{'time':>10}{'files':>12}{'peak RSS':>14}")
+        for name, compress in (("db-plain", False), ("db-gzip", True)):
+            out = os.path.join(tmp, name)
+            os.mkdir(out)
+            timed(f"export_db_csv({'gzip' if compress else 'plain'})",
+                  lambda: export_db_csv(conn, out, compress=compress))
+        out = os.path.join(tmp, "memory")
+        os.mkdir(out)
+        timed("load_all + export_csv", lambda: export_csv(out, *load_all(conn)))
+        conn.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000)
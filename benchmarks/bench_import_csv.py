@@ -0,0 +1,64 @@
+"""Bulk CSV import: rows per second and peak memory of importer.import_csv().
+
+Writes an export_csv()-style roster (students with three registrations
+each, plus courses and instructors) into a temp directory, imports it into
+a fresh database file, and reports the wall time and the process's peak
+RSS before and after the import. Memory should stay flat as N grows.
+
+    python -m benchmarks.bench_import_csv [N_STUDENTS]
+"""
+import csv
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from db import init_db
+from importer import import_csv
+
+N_COURSES = 1000
+N_INSTRUCTORS = 200
+PER_STUDENT = 3
+
+
+def write_roster(directory: str, n_students: int):
+    with open(os.path.join(directory, "instructors.csv"), "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["instructor_id", "name", "age", "email", "assigned_course_ids"])
+        w.writerows([f"I{k}", f"Teacher {k}", 40, f"t{k}@school.edu", ""] for k in range(N_INSTRUCTORS))
+    with open(os.path.join(directory, "courses.csv"), "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["course_id", "course_name", "instructor_id", "enrolled_student_ids"])
+        w.writerows([f"C{k}", f"Course {k}", f"I{k % N_INSTRUCTORS}", ""] for k in range(N_COURSES))
+    with open(os.path.join(directory, "students.csv"), "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["student_id", "name", "age", "email", "registered_course_ids"])
+        w.writerows([f"S{k}", f"Student {k}", 18 + k % 10, f"s{k}@school.edu",
+                     ";".join(f"C{(k + j * 7) % N_COURSES}" for j in range(PER_STUDENT))]
+                    for k in range(n_students))
+
+
+def peak_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main(n_students: int = 1_000_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        write_roster(tmp, n_students)
+        size = sum(os.path.getsize(os.path.join(tmp, name)) for name in os.listdir(tmp))
+        conn = init_db(os.path.join(tmp, "school.db"))
+        before = peak_mb()
+        t0 = time.perf_counter()
+        report = import_csv(conn, tmp)
+        dt = time.perf_counter() - t0
+        conn.close()
+    rows = sum(report.imported.values())
+    print(f"{rows:,} rows + {report.links:,} links ({size / 2**20:.0f} MiB of CSV) in {dt:.1f} s "
+          f"= {rows / dt:,.0f} rows/s; {report.error_count} errors")
+    print(f"peak RSS {before:.0f} MiB before, {peak_mb():.0f} MiB after")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
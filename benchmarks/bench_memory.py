@@ -0,0 +1,127 @@
+"""Bytes per record of the classes.py models against the baseline layout.
+
+The first table is the record layout alone: slotted records against
+__dict__ stand-ins that set the same attributes, with the same empty
+relation containers.
+
+The second table is the combined change against the baseline (a __dict__
+record with plain list relations). Each student is counted with its
+registrations on both sides: its own container and its entries in the
+course rosters. With slots and the small-tuple OrderedSet, a student
+with no registrations is about 19% below the baseline and one with a
+single registration is close to it. Each further registration costs
+more: a roster past OrderedSet.SMALL members is a dict, at about 30-50 B
+per member where a list entry is 8 B. That is the price of O(1)
+membership and removal on large rosters.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_memory [N]
+"""
+import gc
+import sys
+import tracemalloc
+
+from classes import OrderedSet, Student, Instructor, Course
+
+
+class _DictStudent:
+    """Same attributes Student() sets, kept in an instance __dict__ (pre-__slots__ layout)."""
+
+    def __init__(self, name, age, email, student_id):
+        self._name = name
+        self._age = age
+        self._Person__email = email
+        self._student_id = student_id
+        self.registered_courses = OrderedSet()
+
+
+class _ListStudent(_DictStudent):
+    """The baseline: __dict__ layout and a plain list of courses."""
+
+    def __init__(self, *fields):
+        super().__init__(*fields)
+        self.registered_courses = []
+
+
+class _DictInstructor:
+    def __init__(self, name, age, email, instructor_id):
+        self._name = name
+        self._age = age
+        self._Person__email = email
+        self._instructor_id = instructor_id
+        self.assigned_courses = OrderedSet()
+
+
+class _DictCourse:
+    def __init__(self, course_id, course_name):
+        self._course_id = course_id
+        self._course_name = course_name
+        self._instructor = None
+        self.enrolled_students = OrderedSet()
+
+
+def _fields(n):
+    # Strings are built up front so both layouts are measured without them.
+    return [(f"Student {k}", 20, f"s{k}@school.edu", f"S{k}") for k in range(n)]
+
+
+def bytes_per_record(factory, fields):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = []
+    for f in fields:
+        records.append(factory(*f))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    list_overhead = sys.getsizeof(records)
+    return (after - before - list_overhead) / len(records)
+
+
+class _ListCourse(_DictCourse):
+    def __init__(self, *fields):
+        super().__init__(*fields)
+        self.enrolled_students = []
+
+
+def _registered(student, course, k):
+    """A factory for students registered in k courses, both sides linked.
+
+    The courses are made up front; their rosters grow as students come, and
+    that growth is counted against the students.
+    """
+    courses = [course(f"C{j}", f"Course {j}") for j in range(k)]
+
+    def make(*f):
+        s = student(*f)
+        for c in courses:
+            s.registered_courses.append(c)
+            c.enrolled_students.append(s)
+        return s
+    return make
+
+
+def main(n: int = 100_000):
+    fields = _fields(n)
+    rows = [
+        ("Student", lambda *f: Student(*f), _DictStudent),
+        ("Instructor", lambda *f: Instructor(*f), _DictInstructor),
+        ("Course", lambda n_, a, e, i: Course(i, n_), lambda n_, a, e, i: _DictCourse(i, n_)),
+    ]
+    print(f"{'record':<12}{'__dict__ B':>12}{'slotted B':>12}{'saved':>9}   (N={n:,})")
+    for label, slotted, legacy in rows:
+        old = bytes_per_record(legacy, fields)
+        new = bytes_per_record(slotted, fields)
+        print(f"{label:<12}{old:>12.0f}{new:>12.0f}{(1 - new / old):>9.0%}")
+
+    print()
+    print(f"{'registrations':<14}{'baseline B':>11}{'now B':>9}{'change':>9}   (per student, both sides)")
+    for k in (0, 1, 3, 10):
+        old = bytes_per_record(_registered(_ListStudent, _ListCourse, k), fields)
+        new = bytes_per_record(_registered(Student, Course, k), fields)
+        print(f"{k:<14}{old:>11.0f}{new:>9.0f}{new / old - 1:>+9.0%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
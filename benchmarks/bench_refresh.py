@@ -0,0 +1,72 @@
+"""Refreshing the PyQt students table after single-record edits: the
+patching RecordsModel.reload() against the model reset it replaced
+(forced here with PATCH_LIMIT = 0).
+
+Runs offscreen; times include the repaint. A reset also re-sorts every
+row and loses the view's selection and scroll position.
+
+    python -m benchmarks.bench_refresh [N_STUDENTS]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication, QTableView
+
+from classes import Student
+from gui_pyqt import RecordsModel
+from search_index import SearchIndex
+
+EDITS = 200
+
+
+def student_row(s):
+    return (s.student_id, s.name, s.age, s.email)
+
+
+def main(n_students: int = 100_000):
+    app = QApplication.instance() or QApplication([])
+    print(f"{n_students:,} students, {EDITS} edits per run, each followed by a refresh")
+    print(f"{'':<22}{'rename ms':>12}{'remove ms':>12}")
+    for sort in (None, 1):
+        for label, limit in (("reset", 0), ("patch", RecordsModel.PATCH_LIMIT)):
+            index = SearchIndex(4)
+            students = [Student(f"Student {k}", 18 + k % 50, f"s{k}@school.edu", f"S{k:07d}")
+                        for k in range(n_students)]
+            for s in students:
+                index.put(s.student_id, student_row(s))
+            model = RecordsModel(["ID", "Name", "Age", "Email"], index)
+            model.PATCH_LIMIT = limit
+            view = QTableView()
+            view.setModel(model)
+            view.resize(900, 600)
+            view.show()
+            model.reload()
+            if sort is not None:
+                model.sort(sort, Qt.AscendingOrder)
+            app.processEvents()
+
+            times = []
+            step = n_students // EDITS
+            for edit in ("rename", "remove"):
+                t0 = time.perf_counter()
+                for n in range(EDITS):
+                    s = students[n * step]
+                    if edit == "rename":
+                        s.name = f"{s.name}!"
+                        index.put(s.student_id, student_row(s))
+                    else:
+                        index.discard(s.student_id)
+                    model.reload()
+                    app.processEvents()
+                times.append((time.perf_counter() - t0) / EDITS * 1000)
+            print(f"{label + (' (sorted)' if sort is not None else ''):<22}"
+                  f"{times[0]:>12.2f}{times[1]:>12.2f}")
+            view.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
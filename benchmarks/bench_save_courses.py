@@ -0,0 +1,85 @@
+"""save_all() of courses with instructors: per-course UPDATE loop vs. one upsert pass.
+
+The legacy stand-in writes courses the way save_all() used to: an upsert
+of (id, name) followed by one UPDATE per course for its instructor_id.
+The current save_all() writes all three columns in the upsert itself.
+"fresh" saves into an empty database file (where the search_fts insert
+triggers dominate); "resave" then moves every course to another
+instructor and saves again, which is the common case in the GUI.
+
+    python -m benchmarks.bench_save_courses [MAX_COURSES]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from classes import Instructor, Course
+from db import init_db, save_all
+
+COURSES_PER_INSTRUCTOR = 5
+
+
+def build(n_courses: int):
+    instructors = [Instructor(f"Teacher {k}", 40, f"t{k}@school.edu", f"I{k}")
+                   for k in range(max(1, n_courses // COURSES_PER_INSTRUCTOR))]
+    courses = []
+    for k in range(n_courses):
+        c = Course(f"C{k}", f"Course {k}")
+        instructors[k % len(instructors)].assign_course(c)
+        courses.append(c)
+    return instructors, courses
+
+
+def legacy_save(conn, instructors, courses):
+    cur = conn.cursor()
+    cur.executemany(
+        "INSERT INTO instructors(instructor_id,name,age,email) VALUES(?,?,?,?) "
+        "ON CONFLICT(instructor_id) DO UPDATE SET name=excluded.name, age=excluded.age, email=excluded.email",
+        [(i.instructor_id, i.name, int(i.age), i.email) for i in instructors]
+    )
+    cur.executemany(
+        "INSERT INTO courses(course_id,course_name) VALUES(?,?) "
+        "ON CONFLICT(course_id) DO UPDATE SET course_name=excluded.course_name",
+        [(c.course_id, c.course_name) for c in courses]
+    )
+    for c in courses:
+        cur.execute("UPDATE courses SET instructor_id=? WHERE course_id=?",
+                    (c.instructor.instructor_id if c.instructor else None, c.course_id))
+    conn.commit()
+
+
+def reassign(instructors, courses):
+    for k, c in enumerate(courses):
+        c.instructor.unassign_course(c)
+        instructors[(k + 1) % len(instructors)].assign_course(c)
+
+
+def timed(tmp, name, save, n):
+    instructors, courses = build(n)
+    conn = init_db(os.path.join(tmp, f"{name}.db"))
+    t0 = time.perf_counter()
+    save(conn, instructors, courses)
+    fresh = time.perf_counter() - t0
+    reassign(instructors, courses)
+    t0 = time.perf_counter()
+    save(conn, instructors, courses)
+    resave = time.perf_counter() - t0
+    conn.close()
+    return fresh, resave
+
+
+def main(max_courses: int = 1_000_000):
+    print(f"{'':>10}{'fresh':>29}{'resave':>29}")
+    print(f"{'courses':>10}" + f"{'loop s':>10}{'upsert s':>10}{'speedup':>9}" * 2)
+    n = 10_000
+    with tempfile.TemporaryDirectory() as tmp:
+        while n <= max_courses:
+            old = timed(tmp, f"legacy-{n}", legacy_save, n)
+            new = timed(tmp, f"current-{n}", lambda conn, i, c: save_all(conn, [], i, c, full=True), n)
+            print(f"{n:>10,}" + "".join(f"{o:>10.2f}{c:>10.2f}{o / c:>8.1f}x" for o, c in zip(old, new)))
+            n *= 10
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,130 @@
+"""Load test for the hello.py JSON API, run against a local server.
+
+Start the server first (it serves the database in $SCHOOL_DB, default
+school.db), then point this at it:
+
+    python hello.py
+    python -m benchmarks.load_test [--url http://127.0.0.1:5000] [--clients 16] [--seconds 10] [--searches 0.2]
+
+Each client thread keeps one HTTP/1.1 connection open and loops over a
+mix of list pages, id lookups and searches, sending Accept-Encoding: gzip
+and replaying the ETag it last saw for each URL. Reports throughput,
+latency percentiles and the status mix (304s are cache hits).
+"""
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+SEARCH_WORDS = ("stu", "course", "teach", "an", "1")
+
+
+def percentile(sorted_values, p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+class Client(threading.Thread):
+    def __init__(self, host: str, port: int, ids: dict, deadline: float, seed: int,
+                 searches: float = 0.2):
+        super().__init__(daemon=True)
+        self.host, self.port = host, port
+        self.ids = ids
+        self.searches = searches
+        self.deadline = deadline
+        self.rng = random.Random(seed)
+        self.etags = {}
+        self.latencies = []
+        self.statuses = Counter()
+        self.bytes = 0
+
+    def next_path(self) -> str:
+        roll = self.rng.random()
+        if roll < self.searches:
+            return f"/api/search?q={self.rng.choice(SEARCH_WORDS)}&limit=20"
+        resource = self.rng.choice(("students", "instructors", "courses"))
+        if roll < (1 + self.searches) / 2 and self.ids[resource]:
+            return f"/api/{resource}/{self.rng.choice(self.ids[resource])}"
+        after = self.rng.choice(self.ids[resource]) if self.ids[resource] else ""
+        return f"/api/{resource}?after={after}&limit=50"
+
+    def run(self):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        while time.perf_counter() < self.deadline:
+            path = self.next_path()
+            headers = {"Accept-Encoding": "gzip"}
+            if path in self.etags:
+                headers["If-None-Match"] = self.etags[path]
+            t0 = time.perf_counter()
+            try:
+                conn.request("GET", path, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read()
+            except (OSError, http.client.HTTPException):
+                self.statuses["error"] += 1
+                conn.close()
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+                continue
+            self.latencies.append(time.perf_counter() - t0)
+            self.statuses[resp.status] += 1
+            self.bytes += len(body)
+            etag = resp.getheader("ETag")
+            if etag:
+                self.etags[path] = etag
+        conn.close()
+
+
+def sample_ids(host: str, port: int, per_resource: int = 200) -> dict:
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    ids = {}
+    for resource, key in (("students", "student_id"), ("instructors", "instructor_id"),
+                          ("courses", "course_id")):
+        conn.request("GET", f"/api/{resource}?limit={per_resource}")
+        items = json.loads(conn.getresponse().read())["items"]
+        ids[resource] = [item[key] for item in items]
+    conn.close()
+    return ids
+
+
+def run(url: str, clients: int = 16, seconds: float = 10.0, searches: float = 0.2) -> dict:
+    """Loads the server at url and returns requests, elapsed, latencies
+    (sorted, in seconds), statuses and received (bytes)."""
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    ids = sample_ids(host, port)
+    deadline = time.perf_counter() + seconds
+    threads = [Client(host, port, ids, deadline, seed, searches) for seed in range(clients)]
+    t0 = time.perf_counter()
+    for c in threads:
+        c.start()
+    for c in threads:
+        c.join()
+    latencies = sorted(t for c in threads for t in c.latencies)
+    return {"requests": len(latencies), "elapsed": time.perf_counter() - t0, "latencies": latencies,
+            "statuses": sum((c.statuses for c in threads), Counter()),
+            "received": sum(c.bytes for c in threads)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--searches", type=float, default=0.2, help="share of requests that are searches")
+    args = parser.parse_args()
+
+    r = run(args.url, args.clients, args.seconds, args.searches)
+    latencies, elapsed = r["latencies"], r["elapsed"]
+    print(f"{r['requests']:,} requests from {args.clients} clients in {elapsed:.1f} s "
+          f"= {r['requests'] / elapsed:,.0f} req/s, {r['received'] / elapsed / 1024:,.0f} KiB/s received")
+    print("latency ms  " + "  ".join(f"p{p}={percentile(latencies, p) * 1000:.1f}" for p in (50, 95, 99)))
+    print("status      " + "  ".join(f"{k}: {v:,}" for k, v in sorted(r["statuses"].items(), key=str)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
 from __future__ import annotations
 import re
-from typing import List, Optional
+from typing import Generic, Iterable, Iterator, Optional, TypeVar
 
 _EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_ID_RE = re.compile(r"^[A-Za-z0-9_\-]+$")
 
 def _require_str(value: str, field: str) -> str:
     if not isinstance(value, str):
@@ -26,15 +27,98 @@ def _require_nonneg_int(n: int, field: str) -> int:
 
 def _require_id(s: str, field: str) -> str:
     s = _require_str(s, field)
-    if not re.match(r"^[A-Za-z0-9_\-]+$", s):
+    if not _ID_RE.match(s):
         raise ValueError(f"{field} may contain only letters, digits, '_' or '-'")
     return s
 
+T = TypeVar("T")
+
+class OrderedSet(Generic[T]):
+    """Insertion-ordered set used for the relation fields.
+
+    Up to SMALL members are kept in a tuple and found by a short scan;
+    past that they move into a dict. Either way membership, add and
+    remove take constant time and iteration is in insertion order, while
+    a student's few courses cost about what the list they replaced did.
+    It is not indexable; use list() for positions.
+    """
+
+    __slots__ = ("_items",)
+    SMALL = 16
+
+    def __init__(self, items: Iterable[T] = ()):
+        self._items = ()
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item) -> bool:
+        return item in self._items
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, OrderedSet):
+            return list(self._items) == list(other._items)
+        if isinstance(other, list):
+            return list(self._items) == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"OrderedSet({list(self._items)!r})"
+
+    def add(self, item: T) -> None:
+        items = self._items
+        if type(items) is dict:
+            items[item] = None
+        elif item not in items:
+            if len(items) < self.SMALL:
+                self._items = items + (item,)
+            else:
+                self._items = dict.fromkeys(items)
+                self._items[item] = None
+
+    append = add
+
+    def remove(self, item: T) -> None:
+        items = self._items
+        if type(items) is dict:
+            try:
+                del items[item]
+            except KeyError:
+                raise ValueError(f"{item!r} not in set") from None
+            return
+        if item not in items:
+            raise ValueError(f"{item!r} not in set")
+        k = items.index(item)
+        self._items = items[:k] + items[k + 1:]
+
+    def discard(self, item: T) -> None:
+        if item in self._items:
+            self.remove(item)
+
+    def clear(self) -> None:
+        self._items = ()
+
+
 class Person:
+    # Records are slotted: no per-instance __dict__, which matters at
+    # millions of rows. Subclasses must list every attribute they set,
+    # including the _pending_* ids attached by from_dict().
+    #
+    # _dirty marks a record whose row differs from the database; it is set
+    # on creation and by every setter, and cleared by mark_clean() once
+    # db.save_all() has written the row.
+    __slots__ = ("_name", "_age", "__email", "_dirty")
+
     def __init__(self, name: str, age: int, email: str):
         self._name = _require_str(name, "name")
         self._age = _require_nonneg_int(age, "age")
         self.__email = _require_email(email) 
+        self._dirty = True
 
     @property
     def name(self) -> str:
@@ -43,6 +127,7 @@ class Person:
     @name.setter
     def name(self, value: str) -> None:
         self._name = _require_str(value, "name")
+        self._dirty = True
 
     @property
     def age(self) -> int:
@@ -51,6 +136,7 @@ class Person:
     @age.setter
     def age(self, value: int) -> None:
         self._age = _require_nonneg_int(value, "age")
+        self._dirty = True
 
     @property
     def email(self) -> str:
@@ -58,6 +144,14 @@ class Person:
 
     def set_email(self, new_email: str) -> None:
         self.__email = _require_email(new_email)
+        self._dirty = True
+
+    @property
+    def is_dirty(self) -> bool:
+        return self._dirty
+
+    def mark_clean(self) -> None:
+        self._dirty = False
 
     def introduce(self) -> str:
         return f"Hi, my name is {self.name}, I am {self.age} years old."
@@ -71,10 +165,15 @@ class Person:
 
 
 class Student(Person):
+    # _links_dirty: registrations changed since the last save, so
+    # save_all() has to diff this student's rows in `registrations`.
+    __slots__ = ("_student_id", "registered_courses", "_pending_course_ids", "_links_dirty")
+
     def __init__(self, name: str, age: int, email: str, student_id: str):
         super().__init__(name, age, email)
         self._student_id = _require_id(student_id, "student_id")
-        self.registered_courses: List["Course"] = []
+        self.registered_courses: OrderedSet["Course"] = OrderedSet()
+        self._links_dirty = True
 
     @property
     def student_id(self) -> str:
@@ -82,6 +181,7 @@ class Student(Person):
     @student_id.setter
     def student_id(self, v: str) -> None:
         self._student_id = _require_str(str(v), "student_id")
+        self._dirty = True
 
     @property
     def name(self) -> str:
@@ -89,6 +189,7 @@ class Student(Person):
     @name.setter
     def name(self, v: str) -> None:
         self._name = _require_str(v, "name")
+        self._dirty = True
 
     @property
     def age(self) -> int:
@@ -97,6 +198,7 @@ class Student(Person):
     def age(self, v) -> None:
         
         self._age = int(v)
+        self._dirty = True
 
     
     @property
@@ -116,11 +218,24 @@ class Student(Person):
             raise TypeError("register(course) requires a Course instance")
         if course in self.registered_courses:
             return f"{self.name} is already registered in {course.course_name}"
-        self.registered_courses.append(course)
-        if self not in course.enrolled_students:
-            course.enrolled_students.append(self)
+        self.registered_courses.add(course)
+        course.enrolled_students.add(self)
+        self._links_dirty = True
         return f"{self.name} registered for {course.course_name}"
 
+    def unregister(self, course: "Course") -> None:
+        self.registered_courses.discard(course)
+        course.enrolled_students.discard(self)
+        self._links_dirty = True
+
+    @property
+    def is_dirty(self) -> bool:
+        return self._dirty or self._links_dirty
+
+    def mark_clean(self) -> None:
+        self._dirty = False
+        self._links_dirty = False
+
     def to_dict(self) -> dict:
         base = self.to_base_dict()
         base.update({
@@ -137,10 +252,12 @@ class Student(Person):
 
 
 class Instructor(Person):
+    __slots__ = ("_instructor_id", "assigned_courses", "_pending_course_ids")
+
     def __init__(self, name: str, age: int, email: str, instructor_id: str):
         super().__init__(name, age, email)
         self._instructor_id = _require_id(instructor_id, "instructor_id")
-        self.assigned_courses: List["Course"] = []
+        self.assigned_courses: OrderedSet["Course"] = OrderedSet()
 
    
 
@@ -150,6 +267,7 @@ class Instructor(Person):
     @instructor_id.setter
     def instructor_id(self, v: str) -> None:
         self._instructor_id = _require_str(str(v), "instructor_id")
+        self._dirty = True
 
     @property
     def name(self) -> str:
@@ -157,6 +275,7 @@ class Instructor(Person):
     @name.setter
     def name(self, v: str) -> None:
         self._name = _require_str(v, "name")
+        self._dirty = True
 
     @property
     def age(self) -> int:
@@ -164,6 +283,7 @@ class Instructor(Person):
     @age.setter
     def age(self, v) -> None:
         self._age = int(v)
+        self._dirty = True
 
     
     @property
@@ -181,17 +301,21 @@ class Instructor(Person):
     def assign_course(self, course: "Course") -> str:
         if not isinstance(course, Course):
             raise TypeError("assign_course(course) requires a Course instance")
-        if course not in self.assigned_courses:
-            self.assigned_courses.append(course)
-        if course.instructor is None:
-            course.instructor = self
-        elif course.instructor is not self:
+        if course.instructor is not None and course.instructor is not self:
             raise ValueError(
                 f"{course.course_id} already has an instructor ({course.instructor.name}). "
                 "Unassign first if reassignment is intended."
             )
+        self.assigned_courses.add(course)
+        if course.instructor is None:
+            course.instructor = self
         return f"{self.name} assigned to teach {course.course_name}"
 
+    def unassign_course(self, course: "Course") -> None:
+        self.assigned_courses.discard(course)
+        if course.instructor is self:
+            course.instructor = None
+
     def to_dict(self) -> dict:
         base = self.to_base_dict()
         base.update({
@@ -208,13 +332,19 @@ class Instructor(Person):
 
 
 class Course:
+    __slots__ = ("_course_id", "_course_name", "_instructor", "enrolled_students",
+                 "_pending_instructor_id", "_pending_student_ids", "_dirty")
+
     def __init__(self, course_id: str, course_name: str, instructor: Optional[Instructor] = None):
         self._course_id = _require_id(course_id, "course_id")
         self._course_name = _require_str(course_name, "course_name")
         if instructor is not None and not isinstance(instructor, Instructor):
             raise TypeError("instructor must be an Instructor or None")
         self._instructor: Optional[Instructor] = instructor
-        self.enrolled_students: List[Student] = []
+        self.enrolled_students: OrderedSet[Student] = OrderedSet()
+        self._dirty = True
+        if instructor is not None:
+            instructor.assigned_courses.add(self)
 
     @property
     def course_id(self) -> str:
@@ -227,6 +357,7 @@ class Course:
     @course_name.setter
     def course_name(self, value: str) -> None:
         self._course_name = _require_str(value, "course_name")
+        self._dirty = True
 
     @property
     def instructor(self) -> Optional[Instructor]:
@@ -236,20 +367,35 @@ class Course:
     def instructor(self, value: Optional[Instructor]) -> None:
         if value is not None and not isinstance(value, Instructor):
             raise TypeError("instructor must be an Instructor or None")
+        # both sides of the assignment are kept in step
+        old = self._instructor
+        if old is not None and old is not value:
+            old.assigned_courses.discard(self)
         self._instructor = value
-        if value is not None and self not in value.assigned_courses:
-            value.assigned_courses.append(self)
+        self._dirty = True
+        if value is not None:
+            value.assigned_courses.add(self)
 
     def add_student(self, student: Student) -> str:
         if not isinstance(student, Student):
             raise TypeError("add_student(student) requires a Student instance")
         if student in self.enrolled_students:
             return f"{student.name} is already enrolled in {self.course_name}"
-        self.enrolled_students.append(student)
-        if self not in student.registered_courses:
-            student.registered_courses.append(self)
+        self.enrolled_students.add(student)
+        student.registered_courses.add(self)
+        student._links_dirty = True
         return f"{student.name} enrolled in {self.course_name}"
 
+    def remove_student(self, student: Student) -> None:
+        student.unregister(self)
+
+    @property
+    def is_dirty(self) -> bool:
+        return self._dirty
+
+    def mark_clean(self) -> None:
+        self._dirty = False
+
     def to_dict(self) -> dict:
         return {
             "course_id": self.course_id,
@@ -1,53 +1,281 @@
+import csv
+import gc
+import gzip
 import json
+import os
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Tuple
+
 from classes import Student, Instructor, Course
+from registry import SchoolRegistry
 
-def save_json(filepath, students, instructors, courses):
-    data = {
-        "students": [s.to_dict() for s in students],
-        "instructors": [i.to_dict() for i in instructors],
-        "courses": [c.to_dict() for c in courses],
-    }
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+_CHUNK_SIZE = 1 << 16
+_WHITESPACE = " \t\n\r"
+_PROGRESS_EVERY = 1000
+_GZIP_LEVEL = 6  # zlib's default; gzip.open's 9 is several times slower for little gain
+_decoder = json.JSONDecoder()
+
+def write_atomically(filepath, write, newline=None, compress=False):
+    """Calls write(f) on a text file (gzipped if compress) that replaces
+    filepath only once complete.
+
+    The file is written beside the target and renamed over it, so an
+    error (or a cancel raised from a progress callback) keeps the old file.
+    """
+    part = f"{filepath}.part"
+    try:
+        with (gzip.open(part, "wt", compresslevel=_GZIP_LEVEL, encoding="utf-8", newline=newline)
+              if compress else open(part, "w", encoding="utf-8", newline=newline)) as f:
+            write(f)
+        os.replace(part, filepath)
+    except BaseException:
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+
+def save_json(filepath, students, instructors, courses,
+              progress: Optional[Callable[[int, int], None]] = None):
+    """Writes the school as one JSON document, one record at a time.
+
+    The layout is the same {"students": [...], "instructors": [...],
+    "courses": [...]} document as before, with one record per line, so the
+    whole document is never built in memory. progress(done, total) is
+    called every _PROGRESS_EVERY records.
+    """
+    sections = (("students", students), ("instructors", instructors), ("courses", courses))
+    total = sum(len(records) for _, records in sections) if progress is not None else 0
+
+    def write(f):
+        done = 0
+        f.write("{")
+        for n, (key, records) in enumerate(sections):
+            f.write(f'{"," if n else ""}\n  {json.dumps(key)}: [')
+            sep = "\n    "
+            for obj in records:
+                f.write(sep)
+                f.write(json.dumps(obj.to_dict()))
+                sep = ",\n    "
+                done += 1
+                if progress is not None and done % _PROGRESS_EVERY == 0:
+                    progress(done, total)
+            f.write("\n  ]")
+        f.write("\n}\n")
+        if progress is not None:
+            progress(done, total)
+
+    write_atomically(filepath, write)
+
+
+class _JSONStream:
+    """Pull-parser for the top level of a save_json() document.
 
-def load_json(filepath):
+    Only the outer object and the section arrays are walked here; each
+    record is handed to json's raw_decode as soon as it is complete in
+    the read buffer.
+    """
+
+    def __init__(self, f, on_read: Optional[Callable[[int], None]] = None):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.on_read = on_read
+        self.read = 0
+
+    def _fill(self) -> bool:
+        chunk = self.f.read(_CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        self.read += len(chunk)
+        if self.on_read is not None:
+            self.on_read(self.read)
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError("unexpected end of JSON document")
+
+    def expect(self, ch: str) -> None:
+        if self.peek() != ch:
+            raise ValueError(f"expected {ch!r} at offset {self.pos} of the read buffer")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number cut off at the buffer edge still decodes; read on.
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+    def records(self) -> Iterator[Tuple[str, dict]]:
+        self.expect("{")
+        if self.peek() == "}":
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            if self.peek() == "[":
+                self.pos += 1
+                if self.peek() == "]":
+                    self.pos += 1
+                else:
+                    while True:
+                        yield key, self.value()
+                        if self.peek() == ",":
+                            self.pos += 1
+                            continue
+                        self.expect("]")
+                        break
+            else:
+                self.value()
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("}")
+            return
+
+
+def iter_json_records(filepath, progress: Optional[Callable[[int, int], None]] = None
+                      ) -> Iterator[Tuple[str, dict]]:
+    """Yields (section, record_dict) pairs from a save_json() file.
+
+    progress(done, total) is called per chunk read, with `done` in
+    characters and `total` the file size in bytes (equal for ASCII)."""
+    on_read = None
+    if progress is not None:
+        size = os.path.getsize(filepath)
+        on_read = lambda n: progress(min(n, size), size)
     with open(filepath, "r", encoding="utf-8") as f:
-        raw = json.load(f)
+        yield from _JSONStream(f, on_read).records()
+
 
-    students = [Student.from_dict(d) for d in raw.get("students", [])]
-    instructors = [Instructor.from_dict(d) for d in raw.get("instructors", [])]
-    courses = [Course.from_dict(d) for d in raw.get("courses", [])]
+@contextmanager
+def _gc_paused():
+    # Everything a load builds stays alive, yet each collection the new
+    # objects trigger walks all of them again, so loads grew super-linearly.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
 
+def load_json(filepath, into: SchoolRegistry = None,
+              progress: Optional[Callable[[int, int], None]] = None):
+    students, instructors, courses = [], [], []
+    builders = {
+        "students": (students, Student.from_dict),
+        "instructors": (instructors, Instructor.from_dict),
+        "courses": (courses, Course.from_dict),
+    }
+    with _gc_paused():
+        for section, d in iter_json_records(filepath, progress):
+            target = builders.get(section)
+            if target is not None:
+                target[0].append(target[1](d))
+
+        resolve_relations(students, instructors, courses)
+
+    if into is not None:
+        into.replace(students, instructors, courses)
+    return students, instructors, courses
+
+
+def resolve_relations(students, instructors, courses) -> None:
+    """Wires the _pending_* ids left by from_dict() into object relations.
+
+    Registrations are linked from the courses' rosters first and then
+    from the students' own lists, skipping pairs already linked. The check
+    is on the student's side, whose few courses sit in a small OrderedSet,
+    so no table of all pairs is built and the time stays linear in the
+    number of registrations. The pending ids are dropped afterwards.
+    """
     S = {s.student_id: s for s in students}
     I = {i.instructor_id: i for i in instructors}
     C = {c.course_id: c for c in courses}
 
     for c in courses:
-        if c._pending_instructor_id:
-            c.instructor = I.get(c._pending_instructor_id)
-            if c.instructor and c not in c.instructor.assigned_courses:
-                c.instructor.assigned_courses.append(c)
+        roster = c.enrolled_students
         for sid in c._pending_student_ids:
             s = S.get(sid)
-            if s:
-                c.enrolled_students.append(s)
-                if c not in s.registered_courses:
-                    s.registered_courses.append(c)
-
+            if s is not None and c not in s.registered_courses:
+                s.registered_courses.add(c)
+                roster.add(s)
     for s in students:
-        for cid in getattr(s, "_pending_course_ids", []):
+        registered = s.registered_courses
+        for cid in s._pending_course_ids:
             c = C.get(cid)
-            if c and c not in s.registered_courses:
-                s.registered_courses.append(c)
-            if c and s not in c.enrolled_students:
-                c.enrolled_students.append(s)
+            if c is not None and c not in registered:
+                registered.add(c)
+                c.enrolled_students.add(s)
 
+    for c in courses:
+        if c._pending_instructor_id:
+            c.instructor = I.get(c._pending_instructor_id)
     for i in instructors:
-        for cid in getattr(i, "_pending_course_ids", []):
+        for cid in i._pending_course_ids:
             c = C.get(cid)
-            if c and c not in i.assigned_courses:
-                i.assigned_courses.append(c)
-            if c and (c.instructor is None):
+            # a course naming another instructor keeps that one
+            if c is not None and c.instructor is None:
                 c.instructor = i
 
-    return students, instructors, courses
+    for obj in (*students, *instructors):
+        del obj._pending_course_ids
+    for c in courses:
+        del c._pending_instructor_id, c._pending_student_ids
+
+
+def export_csv(directory, students, instructors, courses,
+               progress: Optional[Callable[[int, int], None]] = None) -> List[str]:
+    """Writes students.csv, instructors.csv and courses.csv into directory.
+
+    Relations are ';'-joined ids. Returns the three paths."""
+    sections = [
+        ("students.csv", ["student_id", "name", "age", "email", "registered_course_ids"], students,
+         lambda s: [s.student_id, s.name, s.age, s.email,
+                    ";".join(c.course_id for c in getattr(s, "registered_courses", []))]),
+        ("instructors.csv", ["instructor_id", "name", "age", "email", "assigned_course_ids"], instructors,
+         lambda i: [i.instructor_id, i.name, i.age, i.email,
+                    ";".join(c.course_id for c in getattr(i, "assigned_courses", []))]),
+        ("courses.csv", ["course_id", "course_name", "instructor_id", "enrolled_student_ids"], courses,
+         lambda c: [c.course_id, c.course_name, c.instructor.instructor_id if c.instructor else "",
+                    ";".join(s.student_id for s in getattr(c, "enrolled_students", []))]),
+    ]
+    total = sum(len(records) for _, _, records, _ in sections) if progress is not None else 0
+    done = 0
+    paths = []
+    for name, header, records, to_row in sections:
+        path = f"{directory}/{name}"
+
+        def write(f):
+            nonlocal done
+            w = csv.writer(f)
+            w.writerow(header)
+            for obj in records:
+                w.writerow(to_row(obj))
+                done += 1
+                if progress is not None and done % _PROGRESS_EVERY == 0:
+                    progress(done, total)
+
+        write_atomically(path, write, newline="")
+        paths.append(path)
+    if progress is not None:
+        progress(done, total)
+    return paths
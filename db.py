@@ -1,8 +1,14 @@
+import os
+import queue
+import re
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Iterable, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
 from classes import Student, Instructor, Course
+from registry import SchoolRegistry
 
 SCHEMA = """
 PRAGMA foreign_keys = ON;
@@ -38,11 +44,295 @@ CREATE TABLE IF NOT EXISTS registrations(
 );
 """
 
+# Full-text index over people and course names. Each row's rowid is the
+# source row's rowid * 4 + a kind tag, so the triggers can find it again.
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+  kind UNINDEXED, record_id UNINDEXED, name, email, prefix='2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS students_fts_ai AFTER INSERT ON students BEGIN
+  INSERT INTO search_fts(rowid, kind, record_id, name, email)
+  VALUES (new.rowid * 4 + 0, 'student', new.student_id, new.name, new.email);
+END;
+CREATE TRIGGER IF NOT EXISTS students_fts_ad AFTER DELETE ON students BEGIN
+  DELETE FROM search_fts WHERE rowid = old.rowid * 4 + 0;
+END;
+CREATE TRIGGER IF NOT EXISTS students_fts_au AFTER UPDATE OF student_id, name, email ON students
+WHEN old.student_id IS NOT new.student_id OR old.name IS NOT new.name OR old.email IS NOT new.email BEGIN
+  DELETE FROM search_fts WHERE rowid = old.rowid * 4 + 0;
+  INSERT INTO search_fts(rowid, kind, record_id, name, email)
+  VALUES (new.rowid * 4 + 0, 'student', new.student_id, new.name, new.email);
+END;
+
+CREATE TRIGGER IF NOT EXISTS instructors_fts_ai AFTER INSERT ON instructors BEGIN
+  INSERT INTO search_fts(rowid, kind, record_id, name, email)
+  VALUES (new.rowid * 4 + 1, 'instructor', new.instructor_id, new.name, new.email);
+END;
+CREATE TRIGGER IF NOT EXISTS instructors_fts_ad AFTER DELETE ON instructors BEGIN
+  DELETE FROM search_fts WHERE rowid = old.rowid * 4 + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS instructors_fts_au AFTER UPDATE OF instructor_id, name, email ON instructors
+WHEN old.instructor_id IS NOT new.instructor_id OR old.name IS NOT new.name OR old.email IS NOT new.email BEGIN
+  DELETE FROM search_fts WHERE rowid = old.rowid * 4 + 1;
+  INSERT INTO search_fts(rowid, kind, record_id, name, email)
+  VALUES (new.rowid * 4 + 1, 'instructor', new.instructor_id, new.name, new.email);
+END;
+
+CREATE TRIGGER IF NOT EXISTS courses_fts_ai AFTER INSERT ON courses BEGIN
+  INSERT INTO search_fts(rowid, kind, record_id, name, email)
+  VALUES (new.rowid * 4 + 2, 'course', new.course_id, new.course_name, '');
+END;
+CREATE TRIGGER IF NOT EXISTS courses_fts_ad AFTER DELETE ON courses BEGIN
+  DELETE FROM search_fts WHERE rowid = old.rowid * 4 + 2;
+END;
+CREATE TRIGGER IF NOT EXISTS courses_fts_au AFTER UPDATE OF course_id, course_name ON courses
+WHEN old.course_id IS NOT new.course_id OR old.course_name IS NOT new.course_name BEGIN
+  DELETE FROM search_fts WHERE rowid = old.rowid * 4 + 2;
+  INSERT INTO search_fts(rowid, kind, record_id, name, email)
+  VALUES (new.rowid * 4 + 2, 'course', new.course_id, new.course_name, '');
+END;
+"""
+
+SEARCH_LIMIT = 50
+
+# Schema changes after SCHEMA, applied in order by migrate(). The database's
+# PRAGMA user_version holds the last version applied.
+MIGRATIONS = [
+    (1, """
+-- students of a course, and the ON DELETE CASCADE from courses
+CREATE INDEX IF NOT EXISTS registrations_course_idx ON registrations(course_id);
+-- courses of an instructor, and the ON DELETE SET NULL from instructors
+CREATE INDEX IF NOT EXISTS courses_instructor_idx ON courses(instructor_id);
+CREATE INDEX IF NOT EXISTS students_email_idx ON students(email);
+CREATE INDEX IF NOT EXISTS instructors_email_idx ON instructors(email);
+ANALYZE;
+"""),
+    (2, """
+-- the *_fts_au triggers only rewrite search_fts when a searched column really
+-- changed; drop the old ones so SEARCH_SCHEMA recreates them with the WHEN
+DROP TRIGGER IF EXISTS students_fts_au;
+DROP TRIGGER IF EXISTS instructors_fts_au;
+DROP TRIGGER IF EXISTS courses_fts_au;
+"""),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Brings the database up to SCHEMA_VERSION; returns the version it was at.
+
+    Each migration runs in its own transaction together with the
+    user_version bump, so a failed one leaves the previous version intact.
+    """
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    if current > SCHEMA_VERSION:
+        raise RuntimeError(f"database schema version {current} is newer than this code ({SCHEMA_VERSION})")
+    for version, script in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            conn.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {version};\nCOMMIT;")
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+    return current
+
 def init_db(db_path: str) -> sqlite3.Connection:
     conn = sqlite3.connect(db_path)
-    conn.executescript(SCHEMA)
+    _create_schema(conn)
     return conn
 
+def _create_schema(conn: sqlite3.Connection):
+    conn.executescript(SCHEMA)
+    migrate(conn)
+    has_fts = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'search_fts'").fetchone() is not None
+    try:
+        conn.executescript(SEARCH_SCHEMA)
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5: everything but search() still works.
+        return
+    if not has_fts:
+        rebuild_search(conn)
+
+
+SYNCHRONOUS_LEVELS = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+class ConnectionPool:
+    """A bounded set of connections to one database file, in WAL mode.
+
+    WAL lets readers keep reading while a writer commits, and every
+    connection waits up to busy_timeout_ms for a lock instead of failing
+    with "database is locked". synchronous=NORMAL is safe with WAL (a crash
+    can only lose the last commits, never corrupt the file); use FULL to
+    make every commit durable.
+
+    connection() lends a connection to the calling thread for a `with`
+    block. Nested blocks in the same thread share it. At most `size`
+    connections exist; a thread that finds them all lent waits up to
+    acquire_timeout seconds and then gets a TimeoutError.
+    """
+
+    def __init__(self, db_path: str, size: int = 4, synchronous: str = "NORMAL",
+                 busy_timeout_ms: int = 5000, acquire_timeout: float = 30.0):
+        if synchronous.upper() not in SYNCHRONOUS_LEVELS:
+            raise ValueError(f"synchronous must be one of {', '.join(SYNCHRONOUS_LEVELS)}")
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.db_path = db_path
+        self.size = size
+        self.synchronous = synchronous.upper()
+        self.busy_timeout_ms = busy_timeout_ms
+        self.acquire_timeout = acquire_timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self._closed = False
+
+    def _open(self) -> sqlite3.Connection:
+        # Pooled connections move between threads, one thread at a time.
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000,
+                               check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        conn.execute("PRAGMA foreign_keys = ON")
+        with self._schema_lock:
+            if not self._schema_ready:
+                _create_schema(conn)
+                self._schema_ready = True
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """Takes a connection out of the pool; give it back with release()."""
+        if self._closed:
+            raise RuntimeError("connection pool is closed")
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError(f"no free connection to {self.db_path} after {self.acquire_timeout}s")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self._open()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+        else:
+            self._idle.put(conn)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        local = self._local
+        if getattr(local, "conn", None) is not None:
+            yield local.conn
+            return
+        conn = self.acquire()
+        local.conn = conn
+        try:
+            yield conn
+        finally:
+            local.conn = None
+            self.release(conn)
+
+    def close(self) -> None:
+        """Closes the idle connections; lent ones are closed as they come back.
+
+        Each runs PRAGMA optimize first, which re-ANALYZEs the tables whose
+        statistics the planner found out of date."""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                conn.execute("PRAGMA optimize")
+            finally:
+                conn.close()
+
+def rebuild_search(conn: sqlite3.Connection):
+    """Refills search_fts from the tables, e.g. for a database created before
+    it existed, or after a VACUUM (which may renumber the rowids)."""
+    _fill_search(conn)
+    conn.commit()
+
+def _fill_search(conn: sqlite3.Connection):
+    conn.execute("DELETE FROM search_fts")
+    conn.execute("INSERT INTO search_fts(rowid, kind, record_id, name, email) "
+                 "SELECT rowid * 4 + 0, 'student', student_id, name, email FROM students")
+    conn.execute("INSERT INTO search_fts(rowid, kind, record_id, name, email) "
+                 "SELECT rowid * 4 + 1, 'instructor', instructor_id, name, email FROM instructors")
+    conn.execute("INSERT INTO search_fts(rowid, kind, record_id, name, email) "
+                 "SELECT rowid * 4 + 2, 'course', course_id, course_name, '' FROM courses")
+
+BULK_CACHE_KIB = 64 * 1024
+
+@contextmanager
+def bulk_writes(conn: sqlite3.Connection):
+    """Suspends the search_fts triggers and the secondary indexes for a
+    large write, then rebuilds them once at the end.
+
+    Every statement that fires a trigger runs in a savepoint, and FTS5
+    flushes its pending index data at each one, so row-by-row trigger
+    inserts are several times slower than the plain table inserts; and an
+    index built by one sort is cheaper than one updated row by row. The
+    page cache is raised to BULK_CACHE_KIB meanwhile. Use inside the
+    caller's transaction: a rollback brings everything back.
+    """
+    if not conn.in_transaction:
+        raise RuntimeError("bulk_writes() needs an open transaction")
+    suspended = conn.execute(
+        "SELECT type, name, sql FROM sqlite_master WHERE sql IS NOT NULL AND (type = 'index' "
+        "OR (type = 'trigger' AND name LIKE '%\\_fts\\_%' ESCAPE '\\'))"
+    ).fetchall()
+    has_stats = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone() is not None
+    cache_size = conn.execute("PRAGMA cache_size").fetchone()[0]
+    conn.execute(f"PRAGMA cache_size = -{BULK_CACHE_KIB}")
+    try:
+        for kind, name, _ in suspended:
+            conn.execute(f"DROP {kind.upper()} {name}")
+        yield
+        for kind, name, sql in suspended:
+            conn.execute(sql)
+            if kind == "index" and has_stats:
+                conn.execute(f"ANALYZE {name}")
+        if any(kind == "trigger" for kind, _, _ in suspended):
+            _fill_search(conn)
+    finally:
+        conn.execute(f"PRAGMA cache_size = {cache_size}")
+
+def _fts_query(text: str) -> str:
+    # Every word must match the start of a token; quoting keeps FTS5
+    # operators typed by the user from being parsed as syntax.
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+
+def search(conn: sqlite3.Connection, text: str, limit: int = SEARCH_LIMIT) -> List[Tuple[str, str, str, str]]:
+    """Best full-text matches for `text` as (kind, record_id, name, email).
+
+    kind is 'student', 'instructor' or 'course'. Hits are ranked by bm25,
+    with name matches weighted above email matches.
+    """
+    query = _fts_query(text)
+    if not query:
+        return []
+    return conn.execute(
+        "SELECT kind, record_id, name, email FROM search_fts WHERE search_fts MATCH ? "
+        "ORDER BY bm25(search_fts, 0, 0, 10.0, 1.0) LIMIT ?",
+        (query, limit)
+    ).fetchall()
+
 def wipe(conn: sqlite3.Connection):
     conn.execute("DELETE FROM registrations")
     conn.execute("UPDATE courses SET instructor_id = NULL")
@@ -51,61 +341,181 @@ def wipe(conn: sqlite3.Connection):
     conn.execute("DELETE FROM instructors")
     conn.commit()
 
+BATCH_SIZE = 10_000
+BACKUP_PAGES = 1024
+
+class _Ticker:
+    """Counts work done and forwards it to an optional progress(done, total)."""
+
+    def __init__(self, progress: Optional[Callable[[int, int], None]], total: int = 0):
+        self.progress = progress
+        self.total = total
+        self.done = 0
+
+    def __call__(self, n: int = 1) -> None:
+        self.done += n
+        if self.progress is not None:
+            self.progress(self.done, self.total)
+
+def _executemany(cur: sqlite3.Cursor, sql: str, rows: list, tick: _Ticker) -> None:
+    # Batched so progress (and a cancel raised from it) is seen during big writes.
+    for k in range(0, len(rows), BATCH_SIZE):
+        batch = rows[k:k + BATCH_SIZE]
+        cur.executemany(sql, batch)
+        tick(len(batch))
+
 def save_all(conn: sqlite3.Connection,
              students: Iterable[Student],
              instructors: Iterable[Instructor],
-             courses: Iterable[Course]):
-    """Upserts everything from memory into the DB."""
+             courses: Iterable[Course],
+             removed: Optional[Dict[str, Set[str]]] = None,
+             full: bool = False,
+             progress: Optional[Callable[[int, int], None]] = None):
+    """Writes the in-memory changes since the last sync into the DB.
+
+    Only records flagged dirty are upserted and only students whose
+    registrations changed get their rows in `registrations` diffed.
+    `removed` holds the ids deleted in memory (SchoolRegistry.removed); they
+    are deleted here and the sets are emptied. With full=True every record
+    is rewritten, as in a first save into an empty database.
+
+    progress(done, total) is called as rows are written; an exception
+    raised from it rolls the whole save back.
+
+    Everything runs in one explicit transaction with foreign-key checks
+    deferred to the commit, so rows can be written in any order.
+    """
+    students = list(students)
+    instructors = list(instructors)
+    courses = list(courses)
+    if full:
+        students_dirty = student_rows = students
+    else:
+        students_dirty = [s for s in students if s.is_dirty]
+        student_rows = [s for s in students_dirty if s._dirty]
+        instructors = [i for i in instructors if i.is_dirty]
+        courses = [c for c in courses if c.is_dirty]
+    if full:
+        reg_rows = [(s.student_id, c.course_id) for s in students for c in getattr(s, "registered_courses", [])]
+        link_students = []
+    else:
+        reg_rows = []
+        link_students = [s for s in students_dirty if s._links_dirty]
+    tick = _Ticker(progress, sum(len(ids) for ids in (removed or {}).values())
+                   + len(student_rows) + len(instructors) + len(courses)
+                   + len(reg_rows) + len(link_students))
     cur = conn.cursor()
+    try:
+        if not conn.in_transaction:
+            cur.execute("BEGIN")
+        cur.execute("PRAGMA defer_foreign_keys = ON")
+        if removed:
+            _executemany(cur, "DELETE FROM students WHERE student_id=?",
+                         [(sid,) for sid in removed.get("students", ())], tick)
+            _executemany(cur, "DELETE FROM courses WHERE course_id=?",
+                         [(cid,) for cid in removed.get("courses", ())], tick)
+            _executemany(cur, "DELETE FROM instructors WHERE instructor_id=?",
+                         [(iid,) for iid in removed.get("instructors", ())], tick)
 
-    cur.executemany(
-        "INSERT INTO students(student_id,name,age,email) VALUES(?,?,?,?) "
-        "ON CONFLICT(student_id) DO UPDATE SET name=excluded.name, age=excluded.age, email=excluded.email",
-        [(s.student_id, s.name, int(s.age), s.email) for s in students]
-    )
-
-    cur.executemany(
-        "INSERT INTO instructors(instructor_id,name,age,email) VALUES(?,?,?,?) "
-        "ON CONFLICT(instructor_id) DO UPDATE SET name=excluded.name, age=excluded.age, email=excluded.email",
-        [(i.instructor_id, i.name, int(i.age), i.email) for i in instructors]
-    )
-
-    cur.executemany(
-        "INSERT INTO courses(course_id,course_name) VALUES(?,?) "
-        "ON CONFLICT(course_id) DO UPDATE SET course_name=excluded.course_name",
-        [(c.course_id, c.course_name) for c in courses]
-    )
-
-    for c in courses:
-        cur.execute("UPDATE courses SET instructor_id=? WHERE course_id=?",
-                    (c.instructor.instructor_id if c.instructor else None, c.course_id))
-
-    cur.execute("DELETE FROM registrations")
-    cur.executemany(
-        "INSERT INTO registrations(student_id,course_id) VALUES(?,?)",
-        [(s.student_id, c.course_id) for s in students for c in getattr(s, "registered_courses", [])]
-    )
+        _executemany(cur,
+            "INSERT INTO students(student_id,name,age,email) VALUES(?,?,?,?) "
+            "ON CONFLICT(student_id) DO UPDATE SET name=excluded.name, age=excluded.age, email=excluded.email",
+            [(s.student_id, s.name, int(s.age), s.email) for s in student_rows], tick
+        )
 
-    conn.commit()
+        _executemany(cur,
+            "INSERT INTO instructors(instructor_id,name,age,email) VALUES(?,?,?,?) "
+            "ON CONFLICT(instructor_id) DO UPDATE SET name=excluded.name, age=excluded.age, email=excluded.email",
+            [(i.instructor_id, i.name, int(i.age), i.email) for i in instructors], tick
+        )
+
+        _executemany(cur,
+            "INSERT INTO courses(course_id,course_name,instructor_id) VALUES(?,?,?) "
+            "ON CONFLICT(course_id) DO UPDATE SET course_name=excluded.course_name, "
+            "instructor_id=excluded.instructor_id",
+            [(c.course_id, c.course_name, c.instructor.instructor_id if c.instructor else None)
+             for c in courses], tick
+        )
+
+        if full:
+            cur.execute("DELETE FROM registrations")
+            _executemany(cur, "INSERT INTO registrations(student_id,course_id) VALUES(?,?)",
+                         reg_rows, tick)
+        else:
+            added, dropped = [], []
+            for s in link_students:
+                cur.execute("SELECT course_id FROM registrations WHERE student_id=?", (s.student_id,))
+                in_db = {row[0] for row in cur.fetchall()}
+                wanted = {c.course_id for c in s.registered_courses}
+                added.extend((s.student_id, cid) for cid in wanted - in_db)
+                dropped.extend((s.student_id, cid) for cid in in_db - wanted)
+                tick()
+            cur.executemany("DELETE FROM registrations WHERE student_id=? AND course_id=?", dropped)
+            cur.executemany("INSERT INTO registrations(student_id,course_id) VALUES(?,?)", added)
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    if removed:
+        for ids in removed.values():
+            ids.clear()
+    for obj in students_dirty:
+        obj.mark_clean()
+    for obj in instructors:
+        obj.mark_clean()
+    for obj in courses:
+        obj.mark_clean()
+
+def _rows(cur: sqlite3.Cursor, tick: _Ticker):
+    while True:
+        batch = cur.fetchmany(BATCH_SIZE)
+        if not batch:
+            return
+        yield from batch
+        tick(len(batch))
 
-def load_all(conn: sqlite3.Connection) -> Tuple[list, list, list]:
-    """Reads all rows and rebuilds in-memory object graph."""
+def load_all(conn: sqlite3.Connection, into: SchoolRegistry = None,
+             progress: Optional[Callable[[int, int], None]] = None,
+             lazy: bool = False) -> Tuple[list, list, list]:
+    """Reads all rows and rebuilds in-memory object graph.
+
+    If a registry is given it is repopulated with the loaded records.
+    progress(done, total) counts rows read; an exception raised from it
+    stops the load before the registry is touched.
+
+    With lazy=True nothing is read up front: three LazyRecords are
+    returned instead, which build records a page at a time as they are
+    used. A registry cannot be filled that way."""
     from classes import Student, Instructor, Course  
 
+    if lazy:
+        if into is not None:
+            raise ValueError("load_all(lazy=True) cannot fill a registry")
+        session = _LazySession(conn)
+        return (LazyRecords(session, "students"), LazyRecords(session, "instructors"),
+                LazyRecords(session, "courses"))
     cur = conn.cursor()
+    total = 0
+    if progress is not None:
+        total = cur.execute("SELECT (SELECT COUNT(*) FROM students) + (SELECT COUNT(*) FROM instructors)"
+                            " + (SELECT COUNT(*) FROM courses) + (SELECT COUNT(*) FROM registrations)"
+                            ).fetchone()[0]
+    tick = _Ticker(progress, total)
     
     cur.execute("SELECT student_id,name,age,email FROM students ORDER BY student_id")
-    rows = cur.fetchall()
+    rows = _rows(cur, tick)
     students = [Student(name=r[1], age=int(r[2]), email=r[3], student_id=r[0]) for r in rows]
     S = {s.student_id: s for s in students}
 
     cur.execute("SELECT instructor_id,name,age,email FROM instructors ORDER BY instructor_id")
-    rows = cur.fetchall()
+    rows = _rows(cur, tick)
     instructors = [Instructor(name=r[1], age=int(r[2]), email=r[3], instructor_id=r[0]) for r in rows]
     I = {i.instructor_id: i for i in instructors}
 
     cur.execute("SELECT course_id,course_name,instructor_id FROM courses ORDER BY course_id")
-    rows = cur.fetchall()
+    rows = _rows(cur, tick)
     courses = []
     C = {}
     for cid, cname, iid in rows:
@@ -115,15 +525,496 @@ def load_all(conn: sqlite3.Connection) -> Tuple[list, list, list]:
         C[cid] = c
 
     cur.execute("SELECT student_id, course_id FROM registrations")
-    for sid, cid in cur.fetchall():
+    for sid, cid in _rows(cur, tick):
         s = S.get(sid)
         c = C.get(cid)
         if s and c:
             s.register(c) 
 
+    for obj in (*students, *instructors, *courses):
+        obj.mark_clean()
+    if into is not None:
+        into.replace(students, instructors, courses, synced=True)
     return students, instructors, courses
 
-def backup_to(conn: sqlite3.Connection, backup_path: str):
+# Tables in foreign-key order (parents first) with their primary keys.
+_BACKUP_TABLES = (
+    ("instructors", ("instructor_id",)),
+    ("students", ("student_id",)),
+    ("courses", ("course_id",)),
+    ("registrations", ("student_id", "course_id")),
+)
+
+def backup_to(conn: sqlite3.Connection, backup_path: str,
+              progress: Optional[Callable[[int, int], None]] = None,
+              pages: int = BACKUP_PAGES, sleep: float = 0.25,
+              incremental: bool = False) -> str:
+    """Copies the database to backup_path; returns "full" or "incremental".
+
+    A full backup copies `pages` pages per step and lets other connections
+    write in between, sleeping `sleep` seconds whenever the source is
+    locked. progress(done, total) gets pages copied. The copy is written
+    next to the target and only renamed over it when complete, so an
+    exception raised from progress leaves any earlier backup in place.
+
+    With incremental=True and an existing backup at the same schema
+    version, only the rows that differ are written into it, in one
+    transaction (progress counts tables), and the backup's own triggers
+    keep its search index in step. Anything else falls back to a full copy.
+    """
+    if incremental and _backup_version(backup_path) == _user_version(conn):
+        _sync_backup(conn, backup_path, progress)
+        return "incremental"
     Path(backup_path).parent.mkdir(parents=True, exist_ok=True)
-    with sqlite3.connect(backup_path) as dest:
-        conn.backup(dest)
+    part = f"{backup_path}.part"
+    dest = sqlite3.connect(part)
+    try:
+        conn.backup(dest, pages=pages, sleep=sleep,
+                    progress=None if progress is None else
+                    lambda status, remaining, total: progress(total - remaining, total))
+        dest.close()
+        os.replace(part, backup_path)
+    except BaseException:
+        dest.close()
+        os.remove(part)
+        raise
+    return "full"
+
+def _user_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def _backup_version(backup_path: str) -> Optional[int]:
+    """The backup's schema version, or None if there is no usable backup."""
+    if not os.path.isfile(backup_path):
+        return None
+    try:
+        bak = sqlite3.connect(f"file:{Path(backup_path).resolve().as_posix()}?mode=ro", uri=True)
+        try:
+            names = {row[0] for row in bak.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            if not names.issuperset(table for table, _ in _BACKUP_TABLES):
+                return None
+            return _user_version(bak)
+        finally:
+            bak.close()
+    except sqlite3.DatabaseError:
+        return None
+
+def _sync_backup(conn: sqlite3.Connection, backup_path: str,
+                 progress: Optional[Callable[[int, int], None]]):
+    conn.execute("ATTACH DATABASE ? AS bak", (backup_path,))
+    tick = _Ticker(progress, 2 * len(_BACKUP_TABLES))
+    try:
+        conn.execute("BEGIN")
+        # children first, so the cascades have nothing left to do
+        for table, key in reversed(_BACKUP_TABLES):
+            match = " AND ".join(f"m.{k} = b.{k}" for k in key)
+            conn.execute(f"DELETE FROM bak.{table} AS b WHERE NOT EXISTS "
+                         f"(SELECT 1 FROM main.{table} AS m WHERE {match})")
+            tick(1)
+        for table, key in _BACKUP_TABLES:
+            cols = [row[1] for row in conn.execute(f"PRAGMA main.table_info({table})")]
+            same = " AND ".join(f"b.{c} {'=' if c in key else 'IS'} m.{c}" for c in cols)
+            update = ", ".join(f"{c}=excluded.{c}" for c in cols if c not in key)
+            conn.execute(
+                f"INSERT INTO bak.{table}({', '.join(cols)}) "
+                f"SELECT {', '.join(f'm.{c}' for c in cols)} FROM main.{table} AS m WHERE NOT EXISTS "
+                f"(SELECT 1 FROM bak.{table} AS b WHERE {same}) "
+                f"ON CONFLICT({', '.join(key)}) DO " + (f"UPDATE SET {update}" if update else "NOTHING"))
+            tick(1)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute("DETACH DATABASE bak")
+
+
+# ---- filtered, paged reads for the records tables ------------------------
+
+PAGE_SIZE = 200
+_MAX_CACHED_PAGES = 16
+
+def _like(expr: str) -> str:
+    return f"{expr} LIKE ? ESCAPE '\\'"
+
+def _list_column(display: str, joins: str, where: str, order: str) -> Tuple[str, str]:
+    """A comma-joined list column: its display subquery and its EXISTS filter.
+
+    An empty list is '' rather than group_concat's NULL, so the column
+    sorts and compares like the others in the keyset seeks of _fetch()."""
+    select = (f"COALESCE((SELECT group_concat(item, ', ') FROM "
+              f"(SELECT {display} AS item FROM {joins} WHERE {where} ORDER BY {order})), '')")
+    return select, f"EXISTS (SELECT 1 FROM {joins} WHERE {where} AND {_like(display)})"
+
+# The columns each GUI table shows, as (select expression, filter expression)
+# pairs. Column 0 is always the record id and doubles as the paging key.
+_RECORD_TABLES = {
+    "students": [
+        ("t.student_id", _like("t.student_id")),
+        ("t.name", _like("t.name")),
+        ("t.age", _like("CAST(t.age AS TEXT)")),
+        ("t.email", _like("t.email")),
+        _list_column("c.course_name || ' ' || c.course_id",
+                     "registrations r JOIN courses c ON c.course_id = r.course_id",
+                     "r.student_id = t.student_id", "r.rowid"),
+    ],
+    "instructors": [
+        ("t.instructor_id", _like("t.instructor_id")),
+        ("t.name", _like("t.name")),
+        ("t.age", _like("CAST(t.age AS TEXT)")),
+        ("t.email", _like("t.email")),
+        _list_column("c.course_name || ' ' || c.course_id", "courses c",
+                     "c.instructor_id = t.instructor_id", "c.rowid"),
+    ],
+    "courses": [
+        ("t.course_id", _like("t.course_id")),
+        ("t.course_name", _like("t.course_name")),
+        ("COALESCE((SELECT i.name FROM instructors i WHERE i.instructor_id = t.instructor_id), '')",
+         "EXISTS (SELECT 1 FROM instructors i WHERE i.instructor_id = t.instructor_id "
+         f"AND {_like('i.name')})"),
+        _list_column("s.student_id || '-' || s.name",
+                     "registrations r JOIN students s ON s.student_id = r.student_id",
+                     "r.course_id = t.course_id", "r.rowid"),
+    ],
+}
+
+def _like_pattern(q: str) -> str:
+    q = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{q}%"
+
+
+class RecordsQuery:
+    """Filtered, paged display rows of one table, read straight from SQLite.
+
+    It has the same search()/row() interface as search_index.SearchIndex,
+    so the GUIs' tables can browse the database without load_all(). The
+    per-column filters become LIKE tests (ASCII case-insensitive, like the
+    in-memory filters for plain text); search() returns a PagedKeys that
+    counts the matches with COUNT(*) and fetches them a page at a time.
+    Rows are re-read after every search(), so each one starts a new
+    `stamp` and every row's version() is that stamp.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, table: str, page_size: int = PAGE_SIZE):
+        self.conn = conn
+        self.table = table
+        self.page_size = page_size
+        self.columns = _RECORD_TABLES[table]
+        self._rows: Dict[str, tuple] = {}
+        self.stamp = 0
+
+    def __len__(self) -> int:
+        return self.conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def version(self, key: str) -> int:
+        return self.stamp
+
+    def _where(self, queries: Sequence[str]) -> Tuple[str, list]:
+        clauses, params = [], []
+        for (_, test), q in zip(self.columns, queries):
+            q = q.strip()
+            if q:
+                clauses.append(test)
+                params.append(_like_pattern(q))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def search(self, queries: Sequence[str], order: Optional[Tuple[int, bool]] = None) -> "PagedKeys":
+        """Ids of the rows matching the per-column queries.
+
+        `order` is (column, descending); by default rows come in id order.
+        """
+        self._rows.clear()
+        self.stamp += 1
+        where, params = self._where(queries)
+        return PagedKeys(self, where, params, order)
+
+    def count(self, queries: Sequence[str]) -> int:
+        where, params = self._where(queries)
+        return self.conn.execute(f"SELECT COUNT(*) FROM {self.table} t{where}", params).fetchone()[0]
+
+    def row(self, key: str) -> tuple:
+        row = self._rows.get(key)
+        if row is None:
+            select = ", ".join(expr for expr, _ in self.columns)
+            row = self.conn.execute(
+                f"SELECT {select} FROM {self.table} t WHERE {self.columns[0][0]} = ?", (key,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(key)
+        return row
+
+    def _fetch(self, where: str, params: list, order: Optional[Tuple[int, bool]],
+               limit: int, offset: int = 0, after: Optional[tuple] = None) -> List[tuple]:
+        """One page of rows; with `after` (the previous page's last row) it is
+        a keyset query that seeks past that row instead of using OFFSET."""
+        key = self.columns[0][0]
+        col, desc = order if order is not None else (0, False)
+        sort = self.columns[col][0]
+        sort_keys = [sort] if col == 0 else [sort, key]
+        params = list(params)
+        if after is not None:
+            values = [after[0]] if col == 0 else [after[col], after[0]]
+            seek = f"({', '.join(sort_keys)}) {'<' if desc else '>'} ({', '.join('?' * len(values))})"
+            where = f"{where} AND {seek}" if where else f" WHERE {seek}"
+            params.extend(values)
+            offset = 0
+        direction = " DESC" if desc else ""
+        select = ", ".join(expr for expr, _ in self.columns)
+        sql = (f"SELECT {select} FROM {self.table} t{where} "
+               f"ORDER BY {', '.join(k + direction for k in sort_keys)} LIMIT ? OFFSET ?")
+        rows = self.conn.execute(sql, params + [limit, offset]).fetchall()
+        for r in rows:
+            self._rows[r[0]] = r
+        return rows
+
+
+class PagedKeys(Sequence):
+    """Lazy list of the ids matched by a RecordsQuery.
+
+    len() runs one COUNT(*). Items are fetched PAGE_SIZE rows at a time and
+    a page directly after a cached one is read with a keyset query, so
+    scrolling forward never pays for a growing OFFSET.
+    """
+
+    def __init__(self, query: RecordsQuery, where: str, params: list,
+                 order: Optional[Tuple[int, bool]]):
+        self.query = query
+        self._where = where
+        self._params = params
+        self._order = order
+        self._len: Optional[int] = None
+        self._pages: Dict[int, List[tuple]] = {}
+
+    def __len__(self) -> int:
+        if self._len is None:
+            self._len = self.query.conn.execute(
+                f"SELECT COUNT(*) FROM {self.query.table} t{self._where}", self._params
+            ).fetchone()[0]
+        return self._len
+
+    def ordered(self, column: int, descending: bool = False) -> "PagedKeys":
+        return PagedKeys(self.query, self._where, self._params, (column, descending))
+
+    def _page(self, n: int) -> List[tuple]:
+        rows = self._pages.get(n)
+        if rows is None:
+            if len(self._pages) >= _MAX_CACHED_PAGES:
+                self._pages.clear()
+                self.query._rows.clear()
+            size = self.query.page_size
+            prev = self._pages.get(n - 1)
+            after = prev[-1] if prev else None
+            rows = self.query._fetch(self._where, self._params, self._order,
+                                     size, offset=n * size, after=after)
+            self._pages[n] = rows
+        return rows
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        size = self.query.page_size
+        return self._page(i // size)[i % size][0]
+
+
+# ---- lazy load_all() -----------------------------------------------------
+
+_IN_CHUNK = 500
+
+class _LazySession:
+    """Identity maps and relation loading behind one load_all(lazy=True).
+
+    Each record is built once, from its row, the first time anything asks
+    for it:
+    - a student is linked to all of its courses when built, with one
+      registrations query per page of students;
+    - an instructor comes with all of its courses, and a course with its
+      instructor, so that pair is always complete;
+    - a course's enrolled_students holds the students built so far;
+      resolve_roster() builds the rest.
+    """
+
+    _SELECT = {
+        "students": "SELECT student_id, name, age, email FROM students",
+        "instructors": "SELECT instructor_id, name, age, email FROM instructors",
+        "courses": "SELECT course_id, course_name, instructor_id FROM courses",
+    }
+    KEY = {"students": "student_id", "instructors": "instructor_id", "courses": "course_id"}
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.maps: Dict[str, Dict[str, object]] = {"students": {}, "instructors": {}, "courses": {}}
+        self._rosters: Set[str] = set()
+
+    def build(self, kind: str, rows: Iterable[tuple]) -> list:
+        """Records for the given rows, building those not seen yet."""
+        known = self.maps[kind]
+        out, new = [], []
+        for row in rows:
+            obj = known.get(row[0])
+            if obj is None:
+                obj = known[row[0]] = self._make(kind, row)
+                new.append((obj, row))
+            out.append(obj)
+        if new:
+            self._link(kind, new)
+        return out
+
+    def get(self, kind: str, key: str):
+        obj = self.maps[kind].get(key)
+        if obj is None:
+            rows = self.conn.execute(f"{self._SELECT[kind]} WHERE {self.KEY[kind]} = ?", (key,)).fetchall()
+            obj = self.build(kind, rows)[0] if rows else None
+        return obj
+
+    def get_many(self, kind: str, keys: Iterable[str]) -> None:
+        known = self.maps[kind]
+        missing = [k for k in dict.fromkeys(keys) if k not in known]
+        for k in range(0, len(missing), _IN_CHUNK):
+            chunk = missing[k:k + _IN_CHUNK]
+            self.build(kind, self.conn.execute(
+                f"{self._SELECT[kind]} WHERE {self.KEY[kind]} IN ({', '.join('?' * len(chunk))})",
+                chunk).fetchall())
+
+    @staticmethod
+    def _make(kind: str, row: tuple):
+        if kind == "students":
+            return Student(name=row[1], age=int(row[2]), email=row[3], student_id=row[0])
+        if kind == "instructors":
+            return Instructor(name=row[1], age=int(row[2]), email=row[3], instructor_id=row[0])
+        return Course(course_id=row[0], course_name=row[1])
+
+    def _link(self, kind: str, new: List[tuple]) -> None:
+        if kind == "students":
+            by_id = {obj.student_id: obj for obj, _ in new}
+            ids = list(by_id)
+            pairs = []
+            for k in range(0, len(ids), _IN_CHUNK):
+                chunk = ids[k:k + _IN_CHUNK]
+                pairs += self.conn.execute(
+                    "SELECT student_id, course_id FROM registrations "
+                    f"WHERE student_id IN ({', '.join('?' * len(chunk))}) ORDER BY rowid", chunk).fetchall()
+            self.get_many("courses", [cid for _, cid in pairs])
+            courses = self.maps["courses"]
+            for sid, cid in pairs:
+                c = courses.get(cid)
+                if c is not None:
+                    by_id[sid].register(c)
+        elif kind == "instructors":
+            for obj, _ in new:
+                courses = self.build("courses", self.conn.execute(
+                    f"{self._SELECT['courses']} WHERE instructor_id = ? ORDER BY course_id", (obj.instructor_id,)))
+                # courses built on the way may have been linked first; list
+                # them all in id order, as a full load does
+                for c in courses:
+                    if c.instructor is None:
+                        c.instructor = obj
+                obj.assigned_courses.clear()
+                for c in courses:
+                    obj.assigned_courses.add(c)
+        else:
+            for obj, row in new:
+                if row[2] and obj.instructor is None:
+                    ins = self.get("instructors", row[2])
+                    # building the instructor may have set it already
+                    if ins is not None and obj.instructor is None:
+                        obj.instructor = ins
+        for obj, _ in new:
+            obj.mark_clean()
+
+    def resolve_roster(self, course: Course) -> None:
+        """Builds every student enrolled in `course`, completing enrolled_students."""
+        if course.course_id in self._rosters:
+            return
+        cur = self.conn.execute(
+            "SELECT student_id FROM registrations WHERE course_id = ? ORDER BY rowid", (course.course_id,))
+        ids = []
+        while True:
+            batch = [sid for (sid,) in cur.fetchmany(PAGE_SIZE)]
+            if not batch:
+                break
+            self.get_many("students", batch)
+            ids += batch
+        # in registration order, as a full load lists them
+        students = self.maps["students"]
+        course.enrolled_students.clear()
+        for sid in ids:
+            course.enrolled_students.add(students[sid])
+        self._rosters.add(course.course_id)
+
+
+class LazyRecords(Sequence):
+    """One table of a lazy load_all(): a read-only list of records built on demand.
+
+    len() runs one COUNT(*). Iterating walks a cursor over the table in id
+    order and builds PAGE_SIZE records per fetchmany(); indexing builds
+    just the page holding that position, and a page directly after a
+    cached one is read with a keyset query like PagedKeys. get(id) builds
+    a single record. All three tables share one session, so each row maps
+    to one object however it was reached.
+    """
+
+    def __init__(self, session: _LazySession, kind: str, page_size: int = PAGE_SIZE):
+        self.session = session
+        self.kind = kind
+        self.id_attr = _LazySession.KEY[kind]
+        self.page_size = page_size
+        self._len: Optional[int] = None
+        self._pages: Dict[int, list] = {}
+
+    def __len__(self) -> int:
+        if self._len is None:
+            self._len = self.session.conn.execute(f"SELECT COUNT(*) FROM {self.kind}").fetchone()[0]
+        return self._len
+
+    def __iter__(self):
+        cur = self.session.conn.execute(f"{_LazySession._SELECT[self.kind]} ORDER BY {self.id_attr}")
+        while True:
+            rows = cur.fetchmany(self.page_size)
+            if not rows:
+                return
+            yield from self.session.build(self.kind, rows)
+
+    def _page(self, n: int) -> list:
+        page = self._pages.get(n)
+        if page is None:
+            if len(self._pages) >= _MAX_CACHED_PAGES:
+                self._pages.clear()
+            select = _LazySession._SELECT[self.kind]
+            prev = self._pages.get(n - 1)
+            if prev:
+                rows = self.session.conn.execute(
+                    f"{select} WHERE {self.id_attr} > ? ORDER BY {self.id_attr} LIMIT ?",
+                    (getattr(prev[-1], self.id_attr), self.page_size)).fetchall()
+            else:
+                rows = self.session.conn.execute(
+                    f"{select} ORDER BY {self.id_attr} LIMIT ? OFFSET ?",
+                    (self.page_size, n * self.page_size)).fetchall()
+            page = self._pages[n] = self.session.build(self.kind, rows)
+        return page
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        page = self._page(i // self.page_size)
+        if i % self.page_size >= len(page):
+            # the table shrank since len() was counted
+            raise IndexError(i)
+        return page[i % self.page_size]
+
+    def get(self, key: str):
+        return self.session.get(self.kind, key)
+
+    def loaded(self) -> list:
+        """The records built so far."""
+        return list(self.session.maps[self.kind].values())
+
+    def resolve_roster(self, course: Course) -> None:
+        self.session.resolve_roster(course)
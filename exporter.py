@@ -0,0 +1,75 @@
+import csv
+import os
+import sqlite3
+from typing import Callable, List, Optional
+
+from datastore import write_atomically
+from db import BATCH_SIZE
+from importer import CSV_FORMATS
+
+# One query per file, in the column order of CSV_FORMATS. The id lists
+# come from correlated GROUP_CONCATs, each answered from an index
+# (registrations' primary key, courses_instructor_idx,
+# registrations_course_idx), so rows stream out in table order without
+# building the relations anywhere.
+_QUERIES = {
+    "students.csv":
+        "SELECT s.student_id, s.name, s.age, s.email, "
+        "(SELECT GROUP_CONCAT(r.course_id, ';') FROM registrations r WHERE r.student_id = s.student_id) "
+        "FROM students s ORDER BY s.rowid",
+    "instructors.csv":
+        "SELECT i.instructor_id, i.name, i.age, i.email, "
+        "(SELECT GROUP_CONCAT(c.course_id, ';') FROM courses c WHERE c.instructor_id = i.instructor_id) "
+        "FROM instructors i ORDER BY i.rowid",
+    "courses.csv":
+        "SELECT c.course_id, c.course_name, c.instructor_id, "
+        "(SELECT GROUP_CONCAT(r.student_id, ';') FROM registrations r WHERE r.course_id = c.course_id) "
+        "FROM courses c ORDER BY c.rowid",
+}
+_EXPORT_ORDER = ("students.csv", "instructors.csv", "courses.csv")
+
+
+def export_db_csv(conn: sqlite3.Connection, directory, compress: bool = False,
+                  progress: Optional[Callable[[int, int], None]] = None) -> List[str]:
+    """Writes students.csv, instructors.csv and courses.csv from the database.
+
+    Same layout as datastore.export_csv(), which importer.import_csv()
+    reads back, but the rows are fetched BATCH_SIZE at a time and written
+    as they come, so nothing has to be loaded first. With compress=True the
+    files are gzipped and named *.csv.gz. All three files are read from one
+    snapshot. progress(done, total) counts rows. Returns the paths.
+    """
+    columns = dict(CSV_FORMATS)
+    in_transaction = conn.in_transaction
+    if not in_transaction:
+        conn.execute("BEGIN")
+    try:
+        total = sum(conn.execute(f"SELECT COUNT(*) FROM {name[:-len('.csv')]}").fetchone()[0]
+                    for name in _EXPORT_ORDER) if progress is not None else 0
+        done = 0
+        paths = []
+        for name in _EXPORT_ORDER:
+            path = os.path.join(directory, f"{name}.gz" if compress else name)
+
+            def write(f):
+                nonlocal done
+                w = csv.writer(f)
+                w.writerow(columns[name])
+                cur = conn.execute(_QUERIES[name])
+                while True:
+                    rows = cur.fetchmany(BATCH_SIZE)
+                    if not rows:
+                        break
+                    w.writerows(rows)
+                    done += len(rows)
+                    if progress is not None:
+                        progress(done, total)
+
+            write_atomically(path, write, newline="", compress=compress)
+            paths.append(path)
+    finally:
+        if not in_transaction:
+            conn.rollback()
+    if progress is not None:
+        progress(done, total)
+    return paths
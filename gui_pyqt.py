@@ -1,41 +1,27 @@
+import os
 import sys
-import csv
-from db import init_db, save_all, load_all, backup_to
+import time
+from db import ConnectionPool, RecordsQuery, load_all, search
+from background import Cancelled, Progress, db_save, db_load, db_backup, db_export_csv, db_import_csv
 
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QTabWidget, QVBoxLayout, QGroupBox, QFormLayout,
-    QLineEdit, QPushButton, QHBoxLayout, QComboBox, QLabel, QTableWidget,
-    QTableWidgetItem, QFileDialog, QGridLayout,
-    QDialog, QDialogButtonBox, QMessageBox
+    QLineEdit, QPushButton, QHBoxLayout, QComboBox, QLabel, QTableView,
+    QHeaderView, QAbstractItemView, QFileDialog, QGridLayout,
+    QDialog, QDialogButtonBox, QMessageBox, QCheckBox, QListWidget, QProgressDialog
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer, QThread
 
 from classes import Student, Instructor, Course
-from datastore import save_json, load_json
-
-STUDENTS = []
-INSTRUCTORS = []
-COURSES = []
-
-def unlink_student_from_everything(s):
-    for c in COURSES:
-        if s in c.enrolled_students:
-            c.enrolled_students.remove(s)
-    s.registered_courses.clear()
-
-def unlink_instructor_from_everything(i):
-    for c in list(i.assigned_courses):
-        c.instructor = None
-    i.assigned_courses.clear()
-
-def unlink_course_from_everything(c):
-    for s in STUDENTS:
-        if c in s.registered_courses:
-            s.registered_courses.remove(c)
-    if c.instructor:
-        if c in c.instructor.assigned_courses:
-            c.instructor.assigned_courses.remove(c)
-        c.instructor = None
+from datastore import save_json, load_json, export_csv
+from refresh import RefreshScheduler
+from registry import SchoolRegistry
+from search_index import LazyIndex, SchoolSearch, course_row, instructor_row, student_row
+
+REGISTRY = SchoolRegistry()
+SEARCH = SchoolSearch(REGISTRY)
+DB_PATH = "school.db"
+POLL_MS = 50
 
 def set_placeholder(line: QLineEdit, text: str):
     line.setPlaceholderText(text)
@@ -46,6 +32,27 @@ def combo_values(cb: QComboBox, items):
     cb.addItems(items)
     cb.blockSignals(False)
 
+def patch_combo(cb: QComboBox, changes, label, records):
+    """Applies a RefreshScheduler batch of added, updated and removed records
+    to a combo of label(record) items; refills it from records() if None."""
+    if changes is None:
+        combo_values(cb, [label(r) for r in records])
+        return
+    cb.blockSignals(True)
+    for event, rec in changes:
+        text = label(rec)
+        # ids are case-sensitive, and findText is not by default
+        pos = cb.findText(f"{label_key(text)} | ", Qt.MatchStartsWith | Qt.MatchCaseSensitive)
+        if event == "added":
+            cb.addItem(text)
+        elif pos < 0:
+            continue
+        elif event == "removed":
+            cb.removeItem(pos)
+        else:
+            cb.setItemText(pos, text)
+    cb.blockSignals(False)
+
 def student_label(s: Student):
     return f"{s.student_id} | {s.name}"
 
@@ -55,26 +62,221 @@ def instructor_label(i: Instructor):
 def course_label(c: Course):
     return f"{c.course_id} | {c.course_name}"
 
-def fill_table(table: QTableWidget, rows, headers):
-    table.setRowCount(0)
-    table.setColumnCount(len(headers))
-    table.setHorizontalHeaderLabels(headers)
-    table.setSortingEnabled(False)
-    for r, row in enumerate(rows):
-        table.insertRow(r)
-        for c, val in enumerate(row):
-            item = QTableWidgetItem("" if val is None else str(val))
-            item.setTextAlignment(Qt.AlignVCenter | Qt.AlignLeft)
-            table.setItem(r, c, item)
-    table.setSortingEnabled(True)
-    table.resizeColumnsToContents()
+def label_key(label: str) -> str:
+    return label.split(" | ", 1)[0]
+
+FILTER_DELAY_MS = 150
+
+def _sort_key(val):
+    if isinstance(val, (int, float)):
+        return (0, val, "")
+    return (1, 0, "" if val is None else str(val).lower())
+
+class RecordsModel(QAbstractTableModel):
+    """Read-only table model over a search_index.SearchIndex.
+
+    The view only asks data() for the rows on screen, so nothing is
+    materialized for the rest. Filtering and sorting work on a list of
+    record keys, like a QSortFilterProxyModel, and changing them never
+    touches the index. With a db.RecordsQuery as the index the keys are a
+    lazy PagedKeys and filtering and sorting are done in SQL.
+    """
+    PATCH_LIMIT = 100
+
+    def __init__(self, headers, index, parent=None):
+        super().__init__(parent)
+        self.headers = list(headers)
+        self.index = index
+        self._visible = []
+        self._queries = [""] * len(self.headers)
+        self._sort = None
+        # (index, index.stamp) as of the last reload; reload() patches from it
+        self._seen = (None, 0)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._visible)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            try:
+                val = self.index.row(self._visible[index.row()])[index.column()]
+            except (KeyError, IndexError):
+                # gone from the index (or the table shrank under a PagedKeys);
+                # the row itself goes at the next reload
+                return None
+            return "" if val is None else str(val)
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignVCenter | Qt.AlignLeft)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.headers[section]
+        return None
+
+    def key(self, r: int):
+        return self._visible[r]
+
+    def reload(self):
+        """Re-runs the current filters against the (possibly changed) index.
+
+        With an in-memory index only the records changed since the last
+        reload are looked at: each one is removed, inserted or moved at its
+        sorted position, or reported by dataChanged, so the view keeps its
+        selection and scroll position and repaints only those rows. More
+        than PATCH_LIMIT changes, or a lazy PagedKeys, reset the model.
+        """
+        seen_index, seen_stamp = self._seen
+        changed = None
+        if seen_index is self.index and isinstance(self._visible, list):
+            changed = self.index.changed_since(seen_stamp)
+        if changed is None or len(changed) > self.PATCH_LIMIT:
+            self.beginResetModel()
+            self._visible = self._sorted(self.index.search(self._queries))
+            self.endResetModel()
+        else:
+            self._patch(changed)
+        self._seen = (self.index, self.index.stamp)
+
+    def _patch(self, changed):
+        visible, index, queries = self._visible, self.index, self._queries
+        shown = {k for k in changed if k in index and index.matches(k, queries)}
+        order_key, descending = self._order()
+        # rows of the changed keys, good until a row is removed or inserted
+        rows = {}
+        for key in changed:
+            try:
+                rows[key] = visible.index(key)
+            except ValueError:
+                pass
+
+        def row(key):
+            return rows[key] if rows else visible.index(key)
+
+        def in_order(a, b):
+            return order_key(b) <= order_key(a) if descending else order_key(a) <= order_key(b)
+
+        def remove(key):
+            r = row(key)
+            rows.clear()
+            self.beginRemoveRows(QModelIndex(), r, r)
+            del visible[r]
+            self.endRemoveRows()
+
+        # Changed rows that left the filter go, and so do changed rows out
+        # of order with a neighbour until none are: the rest is then sorted
+        # and the dropped rows that still match can be put back in place.
+        kept = set(rows)
+        for key in kept - shown:
+            remove(key)
+        kept &= shown
+        while kept:
+            bad = set()
+            for key in kept:
+                r = row(key)
+                if (r > 0 and not in_order(visible[r - 1], key)
+                        or r + 1 < len(visible) and not in_order(key, visible[r + 1])):
+                    bad.add(key)
+            if not bad:
+                break
+            for key in bad:
+                remove(key)
+            kept -= bad
+        for key in changed:
+            if key in shown and key not in kept:
+                r = self._position(key)
+                rows.clear()
+                self.beginInsertRows(QModelIndex(), r, r)
+                visible.insert(r, key)
+                self.endInsertRows()
+        last = len(self.headers) - 1
+        for key in kept:
+            r = row(key)
+            self.dataChanged.emit(self.createIndex(r, 0), self.createIndex(r, last))
+
+    def _order(self):
+        """(sort key function, descending) of the current order."""
+        if self._sort is None:
+            return self.index.seq, False
+        col, order = self._sort
+        row = self.index.row
+        return (lambda k: _sort_key(row(k)[col])), order == Qt.DescendingOrder
+
+    def _position(self, key) -> int:
+        """Row at which `key` goes to keep the rows in order."""
+        order_key, descending = self._order()
+        k = order_key(key)
+        lo, hi = 0, len(self._visible)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            m = order_key(self._visible[mid])
+            if (m < k) if descending else (k < m):
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    def set_queries(self, queries):
+        """Applies new per-column filters.
+
+        When every query only got longer (each old query is a substring of
+        the new one) the matches can only shrink, so the current visible
+        rows are narrowed in place, keeping their sort order. Otherwise, or
+        if the index changed since the last reload, it is searched again.
+        """
+        new = [q.strip().lower() for q in queries]
+        self.beginResetModel()
+        if self._current() and all(old in q for old, q in zip(self._queries, new)):
+            self._queries = new
+            matches = self.index.matches
+            self._visible = [k for k in self._visible if matches(k, new)]
+        else:
+            self._queries = new
+            self._visible = self._sorted(self.index.search(new))
+        self.endResetModel()
+        self._seen = (self.index, self.index.stamp)
+
+    def _current(self) -> bool:
+        """True if the visible rows are an in-memory list that is up to date
+        with the index, so they can be narrowed or re-sorted as they are."""
+        return isinstance(self._visible, list) and self._seen == (self.index, self.index.stamp)
+
+    def total(self) -> int:
+        return len(self.index)
+
+    def _sorted(self, keys):
+        if self._sort is None:
+            return keys
+        col, order = self._sort
+        if not isinstance(keys, list):
+            return keys.ordered(col, order == Qt.DescendingOrder)
+        row = self.index.row
+        keys.sort(key=lambda k: _sort_key(row(k)[col]), reverse=order == Qt.DescendingOrder)
+        return keys
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self._sort = (column, order)
+        if isinstance(self._visible, list) and not self._current():
+            # rows came or went since the last reload: take them in now
+            self.beginResetModel()
+            self._visible = self._sorted(self.index.search(self._queries))
+            self.endResetModel()
+            self._seen = (self.index, self.index.stamp)
+            return
+        self.layoutAboutToBeChanged.emit()
+        self._visible = self._sorted(self._visible)
+        self.layoutChanged.emit()
 
 class FilterableTable(QWidget):
     
-    def __init__(self, title: str, columns, get_rows, parent=None):
+    def __init__(self, title: str, columns, index, parent=None):
         super().__init__(parent)
         self.columns = columns
-        self.get_rows = get_rows
 
         self.group = QGroupBox(title, self)
         outer = QVBoxLayout(self)
@@ -86,7 +288,7 @@ class FilterableTable(QWidget):
         for col, spec in enumerate(columns):
             e = QLineEdit()
             e.setPlaceholderText(spec.get("placeholder", f"search {spec['title'].lower()}"))
-            e.textChanged.connect(self.refresh)
+            e.textChanged.connect(self._schedule_filter)
             self.filters.append(e)
             g.addWidget(e, 0, col)
         btn_clear = QPushButton("🧹 Clear filters")
@@ -94,45 +296,70 @@ class FilterableTable(QWidget):
         g.addWidget(btn_clear, 0, len(columns), alignment=Qt.AlignRight)
 
        
-        self.table = QTableWidget()
-        self.table.setColumnCount(len(columns))
-        self.table.setHorizontalHeaderLabels([c["title"] for c in columns])
+        self.model = RecordsModel([c["title"] for c in columns], index, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
         self.table.horizontalHeader().setStretchLastSection(True)
         self.table.horizontalHeader().setDefaultSectionSize(160)
+        # Size columns from a sample of rows instead of measuring all of them.
+        self.table.horizontalHeader().setResizeContentsPrecision(50)
         self.table.verticalHeader().setVisible(False)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.table.setSortingEnabled(True)
 
         g.addWidget(self.table, 1, 0, 1, len(columns) + 1)
 
+        self.status = QLabel("")
+        self.status.setStyleSheet("color: gray")
+        g.addWidget(self.status, 2, 0, 1, len(columns) + 1)
+
+        # Typing restarts the timer; the filter runs once the user pauses.
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(FILTER_DELAY_MS)
+        self._filter_timer.timeout.connect(self.apply_filters)
+
+    def _schedule_filter(self):
+        self._filter_timer.start()
+
+    def _show_status(self, elapsed: float):
+        self.status.setText(
+            f"{self.model.rowCount():,} of {self.model.total():,} rows · filtered in {elapsed * 1000:.1f} ms"
+        )
+
     def clear_filters(self):
         for e in self.filters:
             e.blockSignals(True)
             e.clear()
             e.blockSignals(False)
-        self.refresh()
+        self.apply_filters()
+
+    def apply_filters(self):
+        self._filter_timer.stop()
+        t0 = time.perf_counter()
+        self.model.set_queries([e.text() for e in self.filters])
+        self._show_status(time.perf_counter() - t0)
+
+    def selected_key(self):
+        """Returns the first-column value (the record id) of the selected row."""
+        idxs = self.table.selectionModel().selectedRows()
+        if not idxs:
+            return None
+        return str(self.model.key(idxs[0].row()))
 
-    def _row_matches(self, row_vals):
-        for e, val in zip(self.filters, row_vals):
-            q = e.text().strip().lower()
-            if not q:
-                continue
-            v = "" if val is None else str(val).lower()
-            if q not in v:
-                return False
-        return True
+    def set_index(self, index):
+        self.model.index = index
+        self.refresh()
 
     def refresh(self):
-        rows = [r for r in self.get_rows() if self._row_matches(r)]
-        self.table.setSortingEnabled(False)
-        self.table.setRowCount(0)
-        for r_idx, row in enumerate(rows):
-            self.table.insertRow(r_idx)
-            for c_idx, val in enumerate(row):
-                item = QTableWidgetItem("" if val is None else str(val))
-                item.setTextAlignment(Qt.AlignVCenter | Qt.AlignLeft)
-                self.table.setItem(r_idx, c_idx, item)
-        self.table.setSortingEnabled(True)
-        self.table.resizeColumnsToContents()
+        first_fill = self.model.rowCount() == 0
+        t0 = time.perf_counter()
+        self.model.reload()
+        self._show_status(time.perf_counter() - t0)
+        if first_fill:
+            self.table.resizeColumnsToContents()
 
 class StudentEditDialog(QDialog):
     def __init__(self, s: Student, parent=None):
@@ -153,9 +380,10 @@ class StudentEditDialog(QDialog):
 
     def _apply(self):
         try:
-            self.s.name  = self.e_name.text().strip()
-            self.s.age   = int(self.e_age.text().strip())
-            self.s.email = self.e_mail.text().strip()
+            REGISTRY.update_student(self.s,
+                                    self.e_name.text().strip(),
+                                    int(self.e_age.text().strip()),
+                                    self.e_mail.text().strip())
             self.accept()
         except Exception as e:
             QMessageBox.critical(self, "Edit Student", str(e))
@@ -179,9 +407,10 @@ class InstructorEditDialog(QDialog):
 
     def _apply(self):
         try:
-            self.i.name  = self.e_name.text().strip()
-            self.i.age   = int(self.e_age.text().strip())
-            self.i.email = self.e_mail.text().strip()
+            REGISTRY.update_instructor(self.i,
+                                       self.e_name.text().strip(),
+                                       int(self.e_age.text().strip()),
+                                       self.e_mail.text().strip())
             self.accept()
         except Exception as e:
             QMessageBox.critical(self, "Edit Instructor", str(e))
@@ -200,8 +429,32 @@ class CourseEditDialog(QDialog):
         form.addRow(btns)
 
     def _apply(self):
-        self.c.course_name = self.e_name.text().strip()
-        self.accept()
+        try:
+            REGISTRY.update_course(self.c, self.e_name.text().strip())
+            self.accept()
+        except Exception as e:
+            QMessageBox.critical(self, "Edit Course", str(e))
+
+class TaskThread(QThread):
+    """Runs fn(*args, progress=self.progress) off the GUI thread.
+
+    The outcome is left in `result` / `error` for the `finished` handler,
+    which Qt runs back on the GUI thread.
+    """
+
+    def __init__(self, fn, *args, parent=None):
+        super().__init__(parent)
+        self.fn = fn
+        self.args = args
+        self.progress = Progress()
+        self.result = None
+        self.error = None
+
+    def run(self):
+        try:
+            self.result = self.fn(*self.args, progress=self.progress)
+        except BaseException as e:
+            self.error = e
 
 class MainWindow(QWidget):
     def __init__(self):
@@ -209,10 +462,12 @@ class MainWindow(QWidget):
         self.setWindowTitle("School Management System (PyQt5)")
         self.resize(980, 820)
 
+        # self.conn is the GUI thread's connection; background jobs borrow their own.
         try:
-            self.conn = init_db("school.db") 
+            self.pool = ConnectionPool(DB_PATH)
+            self.conn = self.pool.acquire()
         except Exception as e:
-            self.conn = None
+            self.pool = self.conn = None
             QMessageBox.critical(self, "Database", f"DB init failed: {e}")
 
         self.tabs = QTabWidget()
@@ -228,8 +483,10 @@ class MainWindow(QWidget):
         self._build_forms_tab()
         self._build_records_tab()
 
-        
-        self.global_refresh()
+        # Widgets repaint from registry events, once per event-loop tick.
+        self.scheduler = RefreshScheduler(REGISTRY, lambda fn: QTimer.singleShot(0, fn))
+        self._watch_registry()
+        self.scheduler.refresh_all()
         
         self.tabs.setCurrentWidget(self.records_tab)
 
@@ -323,14 +580,40 @@ class MainWindow(QWidget):
         btn_export = QPushButton("Export CSV"); btn_export.clicked.connect(self.on_export_csv)
 
         btn_db_save = QPushButton("DB Save"); btn_db_save.clicked.connect(self.on_db_save)
-        btn_db_load = QPushButton("DB Load"); btn_db_load.clicked.connect(self.on_db_load)
+        self.btn_db_load = QPushButton("DB Load"); self.btn_db_load.clicked.connect(self.on_db_load)
         btn_db_backup = QPushButton("DB Backup"); btn_db_backup.clicked.connect(self.on_db_backup)
+        btn_db_export = QPushButton("DB Export CSV"); btn_db_export.clicked.connect(self.on_db_export_csv)
+        btn_db_import = QPushButton("DB Import CSV"); btn_db_import.clicked.connect(self.on_db_import_csv)
 
         row.addWidget(btn_save); row.addWidget(btn_load); row.addWidget(btn_export)
-        row.addWidget(btn_db_save); row.addWidget(btn_db_load); row.addWidget(btn_db_backup)
+        row.addWidget(btn_db_save); row.addWidget(self.btn_db_load); row.addWidget(btn_db_backup)
+        row.addWidget(btn_db_export); row.addWidget(btn_db_import)
+        self.chk_browse_db = QCheckBox("Browse DB")
+        self.chk_browse_db.toggled.connect(self.on_browse_db)
+        row.addWidget(self.chk_browse_db)
         row.addStretch(1)
         lay.addLayout(row)
 
+        gb_search = QGroupBox("Search database")
+        vs = QVBoxLayout(gb_search)
+        rs = QHBoxLayout()
+        self.e_global_search = QLineEdit()
+        self.e_global_search.setPlaceholderText("names, emails, course names…")
+        self.lbl_global_search = QLabel("")
+        self.lbl_global_search.setStyleSheet("color: gray")
+        rs.addWidget(self.e_global_search, 1); rs.addWidget(self.lbl_global_search)
+        vs.addLayout(rs)
+        self.lst_global_search = QListWidget()
+        self.lst_global_search.setMaximumHeight(120)
+        vs.addWidget(self.lst_global_search)
+        lay.addWidget(gb_search)
+
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(FILTER_DELAY_MS)
+        self._search_timer.timeout.connect(self.run_global_search)
+        self.e_global_search.textChanged.connect(self._search_timer.start)
+
         self.tbl_students = FilterableTable(
             title="Students",
             columns=[
@@ -340,15 +623,7 @@ class MainWindow(QWidget):
                 {"title": "Email",              "placeholder": "search by Email"},
                 {"title": "Registered Courses", "placeholder": "search by Course"},
             ],
-            get_rows=lambda: [
-                (
-                    s.student_id,
-                    s.name,
-                    s.age,
-                    s.email,
-                    ", ".join(f"{c.course_name} {c.course_id}" for c in s.registered_courses),
-                ) for s in STUDENTS
-            ],
+            index=SEARCH.students,
             parent=self.records_tab,
         )
         lay.addWidget(self.tbl_students)
@@ -362,15 +637,8 @@ class MainWindow(QWidget):
         lay.addLayout(row_stu)
 
         def _selected_student():
-            idxs = self.tbl_students.table.selectionModel().selectedRows()
-            if not idxs:
-                return None
-            r = idxs[0].row()
-            sid = self.tbl_students.table.item(r, 0).text()
-            for s in STUDENTS:
-                if s.student_id == sid:
-                    return s
-            return None
+            key = self.tbl_students.selected_key()
+            return REGISTRY.get_student(key) if key is not None else None
 
         def on_edit_student():
             s = _selected_student()
@@ -378,8 +646,7 @@ class MainWindow(QWidget):
                 QMessageBox.information(self, "Edit Student", "Select a student row first.")
                 return
             dlg = StudentEditDialog(s, self)
-            if dlg.exec_():
-                self.global_refresh()
+            dlg.exec_()
 
         def on_delete_student():
             s = _selected_student()
@@ -391,10 +658,9 @@ class MainWindow(QWidget):
                 QMessageBox.Yes | QMessageBox.No
             )
             if confirm == QMessageBox.Yes:
-                unlink_student_from_everything(s)
-                STUDENTS.remove(s)
-                self.global_refresh()
+                REGISTRY.remove_student(s)
 
+        self._record_buttons = [btn_stu_edit, btn_stu_del]
         btn_stu_edit.clicked.connect(on_edit_student)
         btn_stu_del.clicked.connect(on_delete_student)
 
@@ -407,15 +673,7 @@ class MainWindow(QWidget):
                 {"title": "Email",             "placeholder": "search by Email"},
                 {"title": "Assigned Courses",  "placeholder": "search by Course"},
             ],
-            get_rows=lambda: [
-                (
-                    i.instructor_id,
-                    i.name,
-                    i.age,
-                    i.email,
-                    ", ".join(f"{c.course_name} {c.course_id}" for c in i.assigned_courses),
-                ) for i in INSTRUCTORS
-            ],
+            index=SEARCH.instructors,
             parent=self.records_tab,
         )
         lay.addWidget(self.tbl_instructors)
@@ -429,15 +687,8 @@ class MainWindow(QWidget):
         lay.addLayout(row_ins)
 
         def _selected_instructor():
-            idxs = self.tbl_instructors.table.selectionModel().selectedRows()
-            if not idxs:
-                return None
-            r = idxs[0].row()
-            iid = self.tbl_instructors.table.item(r, 0).text()
-            for i in INSTRUCTORS:
-                if i.instructor_id == iid:
-                    return i
-            return None
+            key = self.tbl_instructors.selected_key()
+            return REGISTRY.get_instructor(key) if key is not None else None
 
         def on_edit_instructor():
             i = _selected_instructor()
@@ -445,8 +696,7 @@ class MainWindow(QWidget):
                 QMessageBox.information(self, "Edit Instructor", "Select an instructor row first.")
                 return
             dlg = InstructorEditDialog(i, self)
-            if dlg.exec_():
-                self.global_refresh()
+            dlg.exec_()
 
         def on_delete_instructor():
             i = _selected_instructor()
@@ -458,10 +708,9 @@ class MainWindow(QWidget):
                 QMessageBox.Yes | QMessageBox.No
             )
             if confirm == QMessageBox.Yes:
-                unlink_instructor_from_everything(i)
-                INSTRUCTORS.remove(i)
-                self.global_refresh()
+                REGISTRY.remove_instructor(i)
 
+        self._record_buttons += [btn_ins_edit, btn_ins_del]
         btn_ins_edit.clicked.connect(on_edit_instructor)
         btn_ins_del.clicked.connect(on_delete_instructor)
 
@@ -473,14 +722,7 @@ class MainWindow(QWidget):
                 {"title": "Instructor",        "placeholder": "search by Instructor"},
                 {"title": "Enrolled Students", "placeholder": "search by Student"},
             ],
-            get_rows=lambda: [
-                (
-                    c.course_id,
-                    c.course_name,
-                    c.instructor.name if c.instructor else "",
-                    ", ".join(f"{s.student_id}-{s.name}" for s in c.enrolled_students),
-                ) for c in COURSES
-            ],
+            index=SEARCH.courses,
             parent=self.records_tab,
         )
         lay.addWidget(self.tbl_courses)
@@ -494,15 +736,8 @@ class MainWindow(QWidget):
         lay.addLayout(row_crs)
 
         def _selected_course():
-            idxs = self.tbl_courses.table.selectionModel().selectedRows()
-            if not idxs:
-                return None
-            r = idxs[0].row()
-            cid = self.tbl_courses.table.item(r, 0).text()
-            for c in COURSES:
-                if c.course_id == cid:
-                    return c
-            return None
+            key = self.tbl_courses.selected_key()
+            return REGISTRY.get_course(key) if key is not None else None
 
         def on_edit_course():
             c = _selected_course()
@@ -510,8 +745,7 @@ class MainWindow(QWidget):
                 QMessageBox.information(self, "Edit Course", "Select a course row first.")
                 return
             dlg = CourseEditDialog(c, self)
-            if dlg.exec_():
-                self.global_refresh()
+            dlg.exec_()
 
         def on_delete_course():
             c = _selected_course()
@@ -523,10 +757,9 @@ class MainWindow(QWidget):
                 QMessageBox.Yes | QMessageBox.No
             )
             if confirm == QMessageBox.Yes:
-                unlink_course_from_everything(c)
-                COURSES.remove(c)
-                self.global_refresh()
+                REGISTRY.remove_course(c)
 
+        self._record_buttons += [btn_crs_edit, btn_crs_del]
         btn_crs_edit.clicked.connect(on_edit_course)
         btn_crs_del.clicked.connect(on_delete_course)
 
@@ -536,9 +769,8 @@ class MainWindow(QWidget):
                         int(self.s_age.text().strip()),
                         self.s_email.text().strip(),
                         self.s_id.text().strip())
-            STUDENTS.append(s)
+            REGISTRY.add_student(s)
             self.s_name.clear(); self.s_age.clear(); self.s_email.clear(); self.s_id.clear()
-            self.global_refresh()
         except Exception as e:
             self._error(f"Add Student: {e}")
 
@@ -548,18 +780,16 @@ class MainWindow(QWidget):
                            int(self.i_age.text().strip()),
                            self.i_email.text().strip(),
                            self.i_id.text().strip())
-            INSTRUCTORS.append(i)
+            REGISTRY.add_instructor(i)
             self.i_name.clear(); self.i_age.clear(); self.i_email.clear(); self.i_id.clear()
-            self.global_refresh()
         except Exception as e:
             self._error(f"Add Instructor: {e}")
 
     def on_add_course(self):
         try:
             c = Course(self.c_id.text().strip(), self.c_name.text().strip(), None)
-            COURSES.append(c)
+            REGISTRY.add_course(c)
             self.c_id.clear(); self.c_name.clear()
-            self.global_refresh()
         except Exception as e:
             self._error(f"Add Course: {e}")
 
@@ -570,22 +800,17 @@ class MainWindow(QWidget):
             QMessageBox.information(self, "Register", "Select both a student and a course.")
             return
 
-        s = STUDENTS[s_idx]
-        c = COURSES[c_idx]
-
-        if not hasattr(s, "registered_courses") or s.registered_courses is None:
-            s.registered_courses = []
-        if not hasattr(c, "enrolled_students") or c.enrolled_students is None:
-            c.enrolled_students = []
+        s = REGISTRY.get_student(label_key(self.cb_student.currentText()))
+        c = REGISTRY.get_course(label_key(self.cb_course.currentText()))
+        if s is None or c is None:
+            QMessageBox.information(self, "Register", "The selected record no longer exists.")
+            return
 
         if (c in s.registered_courses) or (s in c.enrolled_students):
             QMessageBox.information(self, "Register", f"{s.name} is already registered in {c.course_name} ({c.course_id}).")
             return
 
-        s.registered_courses.append(c)
-        c.enrolled_students.append(s)
-
-        self.global_refresh()
+        REGISTRY.register(s, c)
         QMessageBox.information(self, "Register", f"Registered {s.name} → {c.course_name} ({c.course_id}).")
 
     def on_assign_instructor(self):
@@ -594,104 +819,236 @@ class MainWindow(QWidget):
         if i_idx < 0 or c_idx < 0:
             self._error("Select both an instructor and a course.")
             return
-        ins = INSTRUCTORS[i_idx]; c = COURSES[c_idx]
+        ins = REGISTRY.get_instructor(label_key(self.cb_inst2.currentText()))
+        c = REGISTRY.get_course(label_key(self.cb_course2.currentText()))
+        if ins is None or c is None:
+            self._error("The selected record no longer exists.")
+            return
         try:
-            ins.assign_course(c)
+            REGISTRY.assign(ins, c)
         except Exception as e:
-            self._error(str(e)); return
-        self.global_refresh()
+            self._error(str(e))
+
+    def run_task(self, title, fn, *args, on_done=None, on_end=None, modal=True):
+        """Runs fn(*args, progress=...) on a TaskThread behind a progress dialog.
+
+        The event loop keeps running; the dialog polls the task's Progress
+        and its Cancel button cancels it. on_done(result) runs on the GUI
+        thread if the task succeeded; on_end(), if given, runs before that
+        whatever the outcome. With modal=False the window stays usable
+        while the dialog is up.
+        """
+        task = TaskThread(fn, *args, parent=self)
+        dlg = QProgressDialog(f"{title}…", "Cancel", 0, 0, self)
+        dlg.setWindowTitle(title)
+        dlg.setWindowModality(Qt.WindowModal if modal else Qt.NonModal)
+        dlg.setAutoClose(False)
+        dlg.setAutoReset(False)
+        dlg.setMinimumDuration(0)
+        dlg.canceled.connect(task.progress.cancel)
+
+        timer = QTimer(dlg)
+        timer.setInterval(POLL_MS)
+
+        def poll():
+            p = task.progress
+            frac = p.fraction()
+            if frac is not None and not p.cancelled:
+                dlg.setMaximum(1000)
+                dlg.setValue(int(frac * 1000))
+                dlg.setLabelText(f"{title}… {p.done:,} / {p.total:,}")
+        timer.timeout.connect(poll)
+
+        def finished():
+            timer.stop()
+            dlg.canceled.disconnect()
+            dlg.close()
+            task.deleteLater()
+            if on_end is not None:
+                on_end()
+            if isinstance(task.error, Cancelled):
+                QMessageBox.information(self, title, "Cancelled.")
+            elif task.error is not None:
+                QMessageBox.critical(self, title, str(task.error))
+            elif on_done is not None:
+                on_done(task.result)
+        task.finished.connect(finished)
+
+        timer.start()
+        task.start()
+        dlg.show()
 
     def on_save(self):
         path, _ = QFileDialog.getSaveFileName(self, "Save data", "", "JSON (*.json)")
         if not path:
             return
-        save_json(path, STUDENTS, INSTRUCTORS, COURSES)
+        self.run_task("Save", save_json, path,
+                      list(REGISTRY.students), list(REGISTRY.instructors), list(REGISTRY.courses))
 
     def on_load(self):
         path, _ = QFileDialog.getOpenFileName(self, "Load data", "", "JSON (*.json)")
         if not path:
             return
-        students, instructors, courses = load_json(path)
-        STUDENTS[:] = students
-        INSTRUCTORS[:] = instructors
-        COURSES[:] = courses
-        self.global_refresh()
+
+        def done(loaded):
+            REGISTRY.replace(*loaded)
+        self.run_task("Load", load_json, path, on_done=done)
 
     def on_export_csv(self):
         directory = QFileDialog.getExistingDirectory(self, "Choose folder to save CSV files")
         if not directory:
             return
 
-        stu_path = f"{directory}/students.csv"
-        with open(stu_path, "w", newline="", encoding="utf-8") as f:
-            w = csv.writer(f)
-            w.writerow(["student_id", "name", "age", "email", "registered_course_ids"])
-            for s in STUDENTS:
-                course_ids = ";".join(c.course_id for c in getattr(s, "registered_courses", []))
-                w.writerow([s.student_id, s.name, s.age, s.email, course_ids])
-
-        inst_path = f"{directory}/instructors.csv"
-        with open(inst_path, "w", newline="", encoding="utf-8") as f:
-            w = csv.writer(f)
-            w.writerow(["instructor_id", "name", "age", "email", "assigned_course_ids"])
-            for i in INSTRUCTORS:
-                course_ids = ";".join(c.course_id for c in getattr(i, "assigned_courses", []))
-                w.writerow([i.instructor_id, i.name, i.age, i.email, course_ids])
-
-        crs_path = f"{directory}/courses.csv"
-        with open(crs_path, "w", newline="", encoding="utf-8") as f:
-            w = csv.writer(f)
-            w.writerow(["course_id", "course_name", "instructor_id", "enrolled_student_ids"])
-            for c in COURSES:
-                instr_id = c.instructor.instructor_id if c.instructor else ""
-                stu_ids = ";".join(s.student_id for s in getattr(c, "enrolled_students", []))
-                w.writerow([c.course_id, c.course_name, instr_id, stu_ids])
-
-        QMessageBox.information(self, "Export Complete", f"Exported:\n- {stu_path}\n- {inst_path}\n- {crs_path}")
+        def done(paths):
+            QMessageBox.information(self, "Export Complete",
+                                    "Exported:\n" + "\n".join(f"- {p}" for p in paths))
+        self.run_task("Export CSV", export_csv, directory,
+                      list(REGISTRY.students), list(REGISTRY.instructors), list(REGISTRY.courses),
+                      on_done=done)
 
     def on_db_save(self):
         if not self.conn:
             QMessageBox.critical(self, "Database", "No DB connection.")
             return
-        try:
-            save_all(self.conn, STUDENTS, INSTRUCTORS, COURSES)
+
+        def done(_):
+            if self.chk_browse_db.isChecked():
+                self.refresh_tables()
             QMessageBox.information(self, "Database", "Saved to SQLite database (school.db).")
-        except Exception as e:
-            QMessageBox.critical(self, "Database Save", str(e))
+        self.run_task("Database Save", db_save, self.pool,
+                      list(REGISTRY.students), list(REGISTRY.instructors), list(REGISTRY.courses),
+                      REGISTRY.removed, on_done=done)
 
     def on_db_load(self):
         if not self.conn:
             QMessageBox.critical(self, "Database", "No DB connection.")
             return
-        try:
-            students, instructors, courses = load_all(self.conn)
-            STUDENTS[:] = students
-            INSTRUCTORS[:] = instructors
-            COURSES[:] = courses
-            self.global_refresh()
+
+        # The tables show the database at once through a lazy load_all(),
+        # built a page at a time as they scroll, while the full load that
+        # editing needs runs behind a dialog that leaves them usable.
+        self.btn_db_load.setEnabled(False)
+        self.chk_browse_db.setEnabled(False)
+        if not self.chk_browse_db.isChecked():
+            self._show_lazy(load_all(self.conn, lazy=True))
+
+        def end():
+            self.btn_db_load.setEnabled(True)
+            self.chk_browse_db.setEnabled(True)
+            self.on_browse_db(self.chk_browse_db.isChecked())
+
+        def done(loaded):
+            REGISTRY.replace(*loaded, synced=True)
             QMessageBox.information(self, "Database", "Loaded from SQLite database (school.db).")
-        except Exception as e:
-            QMessageBox.critical(self, "Database Load", str(e))
+        self.run_task("Database Load", db_load, self.pool, on_done=done, on_end=end, modal=False)
+
+    def _show_lazy(self, records):
+        """Points the tables at the records of a load_all(lazy=True), read-only."""
+        for btn in self._record_buttons:
+            btn.setEnabled(False)
+        for tbl, table, recs, row_fn in zip((self.tbl_students, self.tbl_instructors, self.tbl_courses),
+                                            ("students", "instructors", "courses"), records,
+                                            (student_row, instructor_row, course_row)):
+            tbl.set_index(LazyIndex(recs, row_fn, RecordsQuery(self.conn, table)))
+
+    def on_db_export_csv(self):
+        if not self.conn:
+            QMessageBox.critical(self, "Database", "No DB connection.")
+            return
+        directory = QFileDialog.getExistingDirectory(self, "Choose folder to save CSV files")
+        if not directory:
+            return
+        compress = QMessageBox.question(self, "Export CSV", "Compress the files with gzip?") == QMessageBox.Yes
 
-    def on_db_backup(self):
+        def done(paths):
+            QMessageBox.information(self, "Export Complete",
+                                    "Exported:\n" + "\n".join(f"- {p}" for p in paths))
+        self.run_task("Export CSV", db_export_csv, self.pool, directory, compress, on_done=done)
+
+    def on_db_import_csv(self):
         if not self.conn:
             QMessageBox.critical(self, "Database", "No DB connection.")
             return
+        directory = QFileDialog.getExistingDirectory(self, "Choose folder with the CSV files")
+        if not directory:
+            return
+
+        def done(report):
+            if self.chk_browse_db.isChecked():
+                self.refresh_tables()
+            lines = [f"- {name}: {n} rows" for name, n in report.imported.items()]
+            lines.append(f"- {report.links} registrations/assignments")
+            if report.error_count:
+                lines.append(f"\n{report.error_count} rows or links skipped:")
+                lines += [f"{name}:{line}: {msg}" for name, line, msg in report.errors[:20]]
+                if report.error_count > 20:
+                    lines.append("…")
+            lines.append("\nUse DB Load to edit the imported records.")
+            QMessageBox.information(self, "Import Complete", "\n".join(lines))
+        self.run_task("Import CSV", db_import_csv, self.pool, directory, on_done=done)
+
+    def run_global_search(self):
+        self.lst_global_search.clear()
+        text = self.e_global_search.text().strip()
+        if not text:
+            self.lbl_global_search.setText("")
+            return
+        if not self.conn:
+            self.lbl_global_search.setText("No DB connection.")
+            return
+        t0 = time.perf_counter()
         try:
-            path, _ = QFileDialog.getSaveFileName(self, "Backup database to…", "school-backup.db", "DB (*.db)")
-            if not path:
-                return
-            backup_to(self.conn, path)
-            QMessageBox.information(self, "Database", f"Backup written to:\n{path}")
+            rows = search(self.conn, text)
         except Exception as e:
-            QMessageBox.critical(self, "Database Backup", str(e))
+            self.lbl_global_search.setText(str(e))
+            return
+        self.lst_global_search.addItems(
+            f"{kind:<10} {rid} | {name}" + (f" <{email}>" if email else "")
+            for kind, rid, name, email in rows
+        )
+        self.lbl_global_search.setText(
+            f"{len(rows)} hits in {(time.perf_counter() - t0) * 1000:.1f} ms")
 
-    def global_refresh(self):
-        combo_values(self.cb_student, [f"{s.student_id} | {s.name}" for s in STUDENTS])
-        combo_values(self.cb_course,  [f"{c.course_id} | {c.course_name}" for c in COURSES])
-        combo_values(self.cb_inst2,   [f"{i.instructor_id} | {i.name}" for i in INSTRUCTORS])
-        combo_values(self.cb_course2, [f"{c.course_id} | {c.course_name}" for c in COURSES])
+    def on_browse_db(self, checked: bool):
+        """Shows the rows in the database instead of REGISTRY, without load_all()."""
+        if checked and not self.conn:
+            QMessageBox.critical(self, "Database", "No DB connection.")
+            self.chk_browse_db.setChecked(False)
+            return
+        for btn in self._record_buttons:
+            btn.setEnabled(not checked)
+        for tbl, table, index in ((self.tbl_students, "students", SEARCH.students),
+                                  (self.tbl_instructors, "instructors", SEARCH.instructors),
+                                  (self.tbl_courses, "courses", SEARCH.courses)):
+            tbl.set_index(RecordsQuery(self.conn, table) if checked else index)
 
+    def on_db_backup(self):
+        if not self.conn:
+            QMessageBox.critical(self, "Database", "No DB connection.")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Backup database to…", "school-backup.db", "DB (*.db)")
+        if not path:
+            return
+        incremental = os.path.exists(path) and QMessageBox.question(
+            self, "Database", "Update the existing backup with the changed rows only?\n"
+                              "(No writes a complete new copy.)") == QMessageBox.Yes
+        self.run_task("Database Backup", db_backup, self.pool, path, incremental,
+                      on_done=lambda mode: QMessageBox.information(
+                          self, "Database", f"{mode.capitalize()} backup written to:\n{path}"))
+
+    def _watch_registry(self):
+        watch = self.scheduler.watch
+        watch(lambda ch: patch_combo(self.cb_student, ch, student_label, REGISTRY.students), "students")
+        watch(lambda ch: patch_combo(self.cb_course, ch, course_label, REGISTRY.courses), "courses")
+        watch(lambda ch: patch_combo(self.cb_inst2, ch, instructor_label, REGISTRY.instructors), "instructors")
+        watch(lambda ch: patch_combo(self.cb_course2, ch, course_label, REGISTRY.courses), "courses")
+        # each table follows the records it lists and the names and links its rows show
+        watch(lambda _: self.tbl_students.refresh(), "students", "registrations", "courses updated")
+        watch(lambda _: self.tbl_instructors.refresh(), "instructors", "assignments", "courses updated")
+        watch(lambda _: self.tbl_courses.refresh(), "courses", "registrations", "assignments",
+              "students updated", "instructors updated")
+
+    def refresh_tables(self):
         self.tbl_students.refresh()
         self.tbl_instructors.refresh()
         self.tbl_courses.refresh()
@@ -702,7 +1059,8 @@ class MainWindow(QWidget):
     def closeEvent(self, event):
         try:
             if getattr(self, "conn", None):
-                self.conn.close()
+                self.pool.release(self.conn)
+                self.pool.close()
         except Exception:
             pass
         super().closeEvent(event)
@@ -1,36 +1,64 @@
+import os
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox
 import tkinter.filedialog as fd
 from classes import Student, Instructor, Course
 from datastore import save_json, load_json
-from db import init_db, save_all, load_all, backup_to  
-
-STUDENTS = []
-INSTRUCTORS = []
-COURSES = []
-
-DB_CONN = None
-
-def unlink_student_from_everything(s):
-    
-    for c in COURSES:
-        if s in c.enrolled_students:
-            c.enrolled_students.remove(s)
-    s.registered_courses.clear()
-
-def unlink_instructor_from_everything(i):
-    for c in list(i.assigned_courses):
-        c.instructor = None
-    i.assigned_courses.clear()
-
-def unlink_course_from_everything(c):
-    for s in STUDENTS:
-        if c in s.registered_courses:
-            s.registered_courses.remove(c)
-    if c.instructor:
-        if c in c.instructor.assigned_courses:
-            c.instructor.assigned_courses.remove(c)
-        c.instructor = None
+from db import ConnectionPool, RecordsQuery, load_all, search
+from background import Cancelled, submit, db_save, db_load, db_backup, db_export_csv
+from refresh import RefreshScheduler
+from registry import SchoolRegistry
+from search_index import LazyIndex, SchoolSearch, course_row, instructor_row, student_row
+
+REGISTRY = SchoolRegistry()
+SEARCH = SchoolSearch(REGISTRY)
+
+DB_PATH = "school.db"
+DB_POOL = None
+DB_CONN = None  # the GUI thread's connection, borrowed from DB_POOL
+POLL_MS = 50
+
+def label_key(label: str) -> str:
+    """Returns the id part of an "id | name" combobox label."""
+    return label.split(" | ", 1)[0]
+
+def student_label(s: Student):
+    return f"{s.student_id} | {s.name}"
+
+def instructor_label(i: Instructor):
+    return f"{i.instructor_id} | {i.name}"
+
+def course_label(c: Course):
+    return f"{c.course_id} | {c.course_name}"
+
+def patch_combo(cb: ttk.Combobox, values: list, changes, label, records):
+    """Applies a RefreshScheduler batch of added, updated and removed records
+    to `values`, the label(record) items cb shows, and hands them back to
+    cb; refills them from records if changes is None.
+
+    Only the changed labels are made; Tk still gets the whole list, as a
+    combobox has no per-item calls.
+    """
+    if changes is None:
+        values[:] = [label(r) for r in records]
+    else:
+        where = None  # id -> position in values, made on the first edit
+        for event, rec in changes:
+            text = label(rec)
+            key = label_key(text)
+            if event == "added":
+                values.append(text)
+                if where is not None:
+                    where[key] = len(values) - 1
+                continue
+            if where is None:
+                where = {label_key(v): k for k, v in enumerate(values) if v is not None}
+            k = where.pop(key, None) if event == "removed" else where.get(key)
+            if k is not None:
+                values[k] = None if event == "removed" else text
+        values[:] = [v for v in values if v is not None]
+    cb["values"] = values
 
 def add_placeholder(entry: ttk.Entry, text: str):
     entry.delete(0, "end")
@@ -134,7 +162,7 @@ def build_student_form(parent, on_changed=None):
             sid   = "" if e_sid.cget("foreground")  == "#888" else e_sid.get()
 
             s = Student(name, int(age_s), email, sid)
-            STUDENTS.append(s)
+            REGISTRY.add_student(s)
 
             for w, ph in ((e_name,"enter name"), (e_age,"enter age"),
                           (e_email,"enter email"), (e_sid,"enter student id")):
@@ -181,7 +209,7 @@ def build_instructor_form(parent, on_changed=None):
             iid   = "" if e_iid.cget("foreground")  == "#888" else e_iid.get()
 
             i = Instructor(name, int(age_s), email, iid)
-            INSTRUCTORS.append(i)
+            REGISTRY.add_instructor(i)
 
             for w, ph in ((e_name,"enter name"), (e_age,"enter age"),
                           (e_email,"enter email"), (e_iid,"enter instructor id")):
@@ -217,7 +245,7 @@ def build_course_form(parent, on_changed=None):
             cname = "" if e_cname.cget("foreground") == "#888" else e_cname.get()
 
             c = Course(cid, cname, None)
-            COURSES.append(c)
+            REGISTRY.add_course(c)
 
             for w, ph in ((e_cid,"enter course id"), (e_cname,"enter course name")):
                 add_placeholder(w, ph)
@@ -231,7 +259,7 @@ def build_course_form(parent, on_changed=None):
     return frame
 
 
-def build_registration_form(parent, on_refresh):
+def build_registration_form(parent, scheduler):
     frame = ttk.LabelFrame(parent, text="Register Student to Course", padding=10)
     frame.columnconfigure(1, weight=1)
 
@@ -247,9 +275,13 @@ def build_registration_form(parent, on_refresh):
     status = ttk.Label(frame, text="", foreground="gray")
     status.grid(row=3, column=0, columnspan=2, sticky="w", pady=2)
 
-    def refresh_options():
-        cb_student["values"] = [f"{s.student_id} | {s.name}" for s in STUDENTS]
-        cb_course["values"]  = [f"{c.course_id} | {c.course_name}" for c in COURSES]
+    students, courses = [], []
+
+    def refresh_students(changes=None):
+        patch_combo(cb_student, students, changes, student_label, REGISTRY.students)
+
+    def refresh_courses(changes=None):
+        patch_combo(cb_course, courses, changes, course_label, REGISTRY.courses)
 
     def on_register():
         try:
@@ -257,22 +289,23 @@ def build_registration_form(parent, on_refresh):
             c_idx = cb_course.current()
             if s_idx < 0 or c_idx < 0:
                 raise ValueError("Select both a student and a course.")
-            s = STUDENTS[s_idx]
-            c = COURSES[c_idx]
-            msg = s.register(c) 
+            s = REGISTRY.get_student(label_key(cb_student.get()))
+            c = REGISTRY.get_course(label_key(cb_course.get()))
+            if s is None or c is None:
+                raise ValueError("The selected record no longer exists.")
+            msg = REGISTRY.register(s, c)
             status.config(text=msg)
-            on_refresh()
         except Exception as ex:
             messagebox.showerror("Register Student", str(ex))
 
     ttk.Button(frame, text="Register", command=on_register)\
        .grid(row=2, column=0, columnspan=2, pady=8)
 
-    refresh_options()
-    frame.refresh_options = refresh_options
+    scheduler.watch(refresh_students, "students")
+    scheduler.watch(refresh_courses, "courses")
     return frame
 
-def build_assignment_form(parent, on_refresh):
+def build_assignment_form(parent, scheduler):
     frame = ttk.LabelFrame(parent, text="Assign Instructor to Course", padding=10)
     frame.columnconfigure(1, weight=1)
 
@@ -288,9 +321,13 @@ def build_assignment_form(parent, on_refresh):
     status = ttk.Label(frame, text="", foreground="gray")
     status.grid(row=3, column=0, columnspan=2, sticky="w", pady=2)
 
-    def refresh_options():
-        cb_inst["values"]   = [f"{i.instructor_id} | {i.name}" for i in INSTRUCTORS]
-        cb_course["values"] = [f"{c.course_id} | {c.course_name}" for c in COURSES]
+    instructors, courses = [], []
+
+    def refresh_instructors(changes=None):
+        patch_combo(cb_inst, instructors, changes, instructor_label, REGISTRY.instructors)
+
+    def refresh_courses(changes=None):
+        patch_combo(cb_course, courses, changes, course_label, REGISTRY.courses)
 
     def on_assign():
         try:
@@ -298,22 +335,23 @@ def build_assignment_form(parent, on_refresh):
             c_idx = cb_course.current()
             if i_idx < 0 or c_idx < 0:
                 raise ValueError("Select both an instructor and a course.")
-            ins = INSTRUCTORS[i_idx]
-            c = COURSES[c_idx]
-            msg = ins.assign_course(c) 
+            ins = REGISTRY.get_instructor(label_key(cb_inst.get()))
+            c = REGISTRY.get_course(label_key(cb_course.get()))
+            if ins is None or c is None:
+                raise ValueError("The selected record no longer exists.")
+            msg = REGISTRY.assign(ins, c)
             status.config(text=msg)
-            on_refresh()
         except Exception as ex:
             messagebox.showerror("Assign Instructor", str(ex))
 
     ttk.Button(frame, text="Assign", command=on_assign)\
        .grid(row=2, column=0, columnspan=2, pady=8)
 
-    refresh_options()
-    frame.refresh_options = refresh_options
+    scheduler.watch(refresh_instructors, "instructors")
+    scheduler.watch(refresh_courses, "courses")
     return frame
 
-def edit_dialog_student(parent, s, on_ok):
+def edit_dialog_student(parent, s, on_ok=None):
     win = tk.Toplevel(parent)
     win.title(f"Edit Student – {s.student_id}")
     win.grab_set()
@@ -335,10 +373,10 @@ def edit_dialog_student(parent, s, on_ok):
 
     def ok():
         try:
-            s.name = e_name.get().strip()
-            s.age = int(e_age.get().strip())
-            s.email = e_email.get().strip()
-            on_ok()
+            REGISTRY.update_student(s, e_name.get().strip(),
+                                    int(e_age.get().strip()),
+                                    e_email.get().strip())
+            if on_ok: on_ok()
             win.destroy()
         except Exception as ex:
             messagebox.showerror("Edit Student", str(ex), parent=win)
@@ -347,7 +385,7 @@ def edit_dialog_student(parent, s, on_ok):
     ttk.Button(win, text="Cancel", command=win.destroy).grid(row=3, column=1, padx=6, pady=8)
 
 
-def edit_dialog_instructor(parent, i, on_ok):
+def edit_dialog_instructor(parent, i, on_ok=None):
     win = tk.Toplevel(parent)
     win.title(f"Edit Instructor – {i.instructor_id}")
     win.grab_set()
@@ -369,10 +407,10 @@ def edit_dialog_instructor(parent, i, on_ok):
 
     def ok():
         try:
-            i.name = e_name.get().strip()
-            i.age = int(e_age.get().strip())
-            i.email = e_email.get().strip()
-            on_ok()
+            REGISTRY.update_instructor(i, e_name.get().strip(),
+                                       int(e_age.get().strip()),
+                                       e_email.get().strip())
+            if on_ok: on_ok()
             win.destroy()
         except Exception as ex:
             messagebox.showerror("Edit Instructor", str(ex), parent=win)
@@ -381,7 +419,7 @@ def edit_dialog_instructor(parent, i, on_ok):
     ttk.Button(win, text="Cancel", command=win.destroy).grid(row=3, column=1, padx=6, pady=8)
 
 
-def edit_dialog_course(parent, c, on_ok):
+def edit_dialog_course(parent, c, on_ok=None):
     win = tk.Toplevel(parent)
     win.title(f"Edit Course – {c.course_id}")
     win.grab_set()
@@ -392,22 +430,46 @@ def edit_dialog_course(parent, c, on_ok):
     e_name.grid(row=0, column=1, padx=6, pady=4)
 
     def ok():
-        c.course_name = e_name.get().strip()
-        on_ok()
-        win.destroy()
+        try:
+            REGISTRY.update_course(c, e_name.get().strip())
+            if on_ok: on_ok()
+            win.destroy()
+        except Exception as ex:
+            messagebox.showerror("Edit Course", str(ex), parent=win)
 
     ttk.Button(win, text="OK", command=ok).grid(row=1, column=0, padx=6, pady=8)
     ttk.Button(win, text="Cancel", command=win.destroy).grid(row=1, column=1, padx=6, pady=8)
 
 
-def build_tables_and_search(parent):
+def build_tables_and_search(parent, scheduler=None):
     class FilterableTable:
+        """Filterable Treeview that only holds a window of the matching rows.
+
+        Rows come from a search_index.SearchIndex, so filtering is an index
+        lookup and only the keys of the matches are kept. A db.RecordsQuery
+        can take its place to browse the database page by page. The Treeview
+        contains the rows around the viewport plus WINDOW_BUFFER rows on
+        each side. The scrollbar covers all matches, and the window slides
+        (reusing its items) as the view nears an edge. A refresh or slide
+        touches only the items of records that entered or left the
+        window or whose row version changed.
+        """
         PIX_PER_CHAR = 8
+        WINDOW_BUFFER = 30
 
-        def __init__(self, parent, title, columns, get_rows):
+        def __init__(self, parent, title, columns, index):
             self.frame = ttk.LabelFrame(parent, text=title, padding=8)
-            self.get_rows = get_rows
+            self.index = index
             self.columns = columns
+            self._matches = []
+            self._iids = []
+            self._items = {}
+            self._shown = {}
+            self._shown_index = index
+            self._win_start = 0
+            self._top = 0
+            self._slide_pending = False
+            self._selected_key = None
 
             # filter row
             self.filter_row = ttk.Frame(self.frame)
@@ -427,9 +489,10 @@ def build_tables_and_search(parent):
             self.frame.columnconfigure(0, weight=1)
             self.frame.rowconfigure(1, weight=1)
 
-            vs = ttk.Scrollbar(self.frame, orient="vertical", command=self.tv.yview)
-            self.tv.configure(yscrollcommand=vs.set)
-            vs.grid(row=1, column=1, sticky="ns")
+            self.vs = ttk.Scrollbar(self.frame, orient="vertical", command=self._on_scrollbar)
+            self.tv.configure(yscrollcommand=self._on_tv_scroll)
+            self.vs.grid(row=1, column=1, sticky="ns")
+            self.tv.bind("<<TreeviewSelect>>", self._remember_selection)
 
             # columns + filters
             self.filters = []
@@ -466,17 +529,12 @@ def build_tables_and_search(parent):
             self.btn_edit.pack(side="left")
             self.btn_del.pack(side="left", padx=6)
 
-        def _match_row(self, values):
-            for idx, (entry, ph_text) in enumerate(self.filters):
+        def _queries(self):
+            queries = []
+            for entry, ph_text in self.filters:
                 q = entry.get().strip().lower()
-                if q == ph_text.lower():
-                    q = ""
-                if not q:
-                    continue
-                v = "" if values[idx] is None else str(values[idx]).lower()
-                if q not in v:
-                    return False
-            return True
+                queries.append("" if q == ph_text.lower() else q)
+            return queries
 
         def clear_filters(self):
             for entry, ph_text in self.filters:
@@ -486,11 +544,112 @@ def build_tables_and_search(parent):
             self.refresh()
 
         def refresh(self):
-            for iid in self.tv.get_children():
-                self.tv.delete(iid)
-            for row in self.get_rows():
-                if self._match_row(row):
-                    self.tv.insert("", "end", values=row)
+            self._matches = self.index.search(self._queries())
+            self._render(self._top)
+
+        def selected_key(self):
+            """Returns the id (first column) of the selected row, as a string."""
+            sel = self.tv.selection()
+            if not sel or sel[0] not in self._iids:
+                return None
+            return str(self._matches[self._win_start + self._iids.index(sel[0])])
+
+        def _view_rows(self):
+            return max(1, int(self.tv.cget("height")))
+
+        def _render(self, top):
+            """Fills the Treeview with the window around `top` and scrolls to it."""
+            self._slide_pending = False
+            n = len(self._matches)
+            top = max(0, min(top, n - self._view_rows()))
+            start = max(0, top - self.WINDOW_BUFFER)
+            keys = self._matches[start:top + self._view_rows() + self.WINDOW_BUFFER]
+            items, shown, version = self._items, self._shown, self.index.version
+            if self._shown_index is not self.index:
+                # versions from another index say nothing about these rows
+                shown.clear()
+                self._shown_index = self.index
+
+            # Items belong to record ids: ids that left the window lose
+            # theirs, new ids get one, and an item is only rewritten when
+            # its row's version changed.
+            wanted = set(keys)
+            gone = [k for k in items if k not in wanted]
+            if gone:
+                self.tv.delete(*(items.pop(k) for k in gone))
+                for k in gone:
+                    shown.pop(k, None)
+            live = set(items.values())
+            order = [iid for iid in self._iids if iid in live]
+            for pos, key in enumerate(keys):
+                v = version(key)
+                iid = items.get(key)
+                if iid is None:
+                    iid = items[key] = self.tv.insert("", pos, values=self.index.row(key))
+                    order.insert(pos, iid)
+                else:
+                    if order[pos] != iid:
+                        self.tv.move(iid, "", pos)
+                        order.remove(iid)
+                        order.insert(pos, iid)
+                    if shown.get(key) != v:
+                        self.tv.item(iid, values=self.index.row(key))
+                shown[key] = v
+            self._iids = order
+
+            self._win_start = start
+            self._top = top
+            self._restore_selection()
+            self.tv.yview_moveto((top - start) / len(keys) if keys else 0.0)
+            self._update_scrollbar()
+
+        def _update_scrollbar(self):
+            n = len(self._matches)
+            if n == 0:
+                self.vs.set(0.0, 1.0)
+                return
+            self.vs.set(self._top / n, min(1.0, (self._top + self._view_rows()) / n))
+
+        def _on_tv_scroll(self, first, last):
+            # Called by the Treeview whenever its own view moves (wheel, keys, moveto).
+            in_window = len(self._iids)
+            if not in_window:
+                self._update_scrollbar()
+                return
+            self._top = self._win_start + int(round(float(first) * in_window))
+            self._update_scrollbar()
+            margin = self.WINDOW_BUFFER // 3
+            end = self._win_start + in_window
+            near_start = self._win_start > 0 and self._top - self._win_start < margin
+            near_end = end < len(self._matches) and end - (self._top + self._view_rows()) < margin
+            if (near_start or near_end) and not self._slide_pending:
+                self._slide_pending = True
+                self.tv.after_idle(lambda: self._render(self._top))
+
+        def _on_scrollbar(self, *args):
+            if args[0] == "moveto":
+                top = int(float(args[1]) * len(self._matches))
+            elif args[0] == "scroll":
+                step = int(args[1]) * (self._view_rows() if args[2] == "pages" else 1)
+                top = self._top + step
+            else:
+                return
+            if top != self._top:
+                self._render(top)
+
+        def _remember_selection(self, _=None):
+            key = self.selected_key()
+            if key is not None:
+                self._selected_key = key
+
+        def _restore_selection(self):
+            # Window items are reused for other rows, so reselect by record id.
+            for k, iid in enumerate(self._iids):
+                if str(self._matches[self._win_start + k]) == self._selected_key:
+                    self.tv.selection_set(iid)
+                    return
+            if self.tv.selection():
+                self.tv.selection_remove(*self.tv.selection())
 
     
     outer = ttk.Frame(parent, padding=8)
@@ -508,28 +667,19 @@ def build_tables_and_search(parent):
             ("email",   "Email",               260, "w", "search by Email"),
             ("courses", "Registered Courses",  300, "w", "search by Course"),
         ],
-        get_rows=lambda: [
-            (s.student_id, s.name, s.age, s.email,
-             ", ".join(f"{c.course_name} {c.course_id}" for c in s.registered_courses))
-            for s in STUDENTS
-        ],
+        index=SEARCH.students,
     )
     students_tbl.frame.grid(row=0, column=0, sticky="nsew", pady=(0, 8))
 
     def student_selected():
-        sel = students_tbl.tv.selection()
-        if not sel: return None
-        sid = students_tbl.tv.item(sel[0], "values")[0]
-        for s in STUDENTS:
-            if s.student_id == sid:
-                return s
-        return None
+        sid = students_tbl.selected_key()
+        return REGISTRY.get_student(sid) if sid is not None else None
 
     def on_edit_student():
         s = student_selected()
         if not s:
             messagebox.showinfo("Edit Student", "Select a student row first."); return
-        edit_dialog_student(outer, s, on_ok=lambda: refresh_tables())
+        edit_dialog_student(outer, s)
 
     def on_del_student():
         s = student_selected()
@@ -537,9 +687,7 @@ def build_tables_and_search(parent):
             messagebox.showinfo("Delete Student", "Select a student row first."); return
         if not messagebox.askyesno("Delete Student", f"Delete {s.name} ({s.student_id})?"):
             return
-        unlink_student_from_everything(s)
-        STUDENTS.remove(s)
-        refresh_tables()
+        REGISTRY.remove_student(s)
 
     students_tbl.btn_edit.config(command=on_edit_student)
     students_tbl.btn_del.config(command=on_del_student)
@@ -553,28 +701,19 @@ def build_tables_and_search(parent):
             ("email",   "Email",               260, "w", "search by Email"),
             ("courses", "Assigned Courses",    300, "w", "search by Course"),
         ],
-        get_rows=lambda: [
-            (i.instructor_id, i.name, i.age, i.email,
-             ", ".join(f"{c.course_name} {c.course_id}" for c in i.assigned_courses))
-            for i in INSTRUCTORS
-        ],
+        index=SEARCH.instructors,
     )
     instructors_tbl.frame.grid(row=1, column=0, sticky="nsew", pady=(0, 8))
 
     def instructor_selected():
-        sel = instructors_tbl.tv.selection()
-        if not sel: return None
-        iid = instructors_tbl.tv.item(sel[0], "values")[0]
-        for i in INSTRUCTORS:
-            if i.instructor_id == iid:
-                return i
-        return None
+        iid = instructors_tbl.selected_key()
+        return REGISTRY.get_instructor(iid) if iid is not None else None
 
     def on_edit_instructor():
         i = instructor_selected()
         if not i:
             messagebox.showinfo("Edit Instructor", "Select an instructor row first."); return
-        edit_dialog_instructor(outer, i, on_ok=lambda: refresh_tables())
+        edit_dialog_instructor(outer, i)
 
     def on_del_instructor():
         i = instructor_selected()
@@ -582,9 +721,7 @@ def build_tables_and_search(parent):
             messagebox.showinfo("Delete Instructor", "Select an instructor row first."); return
         if not messagebox.askyesno("Delete Instructor", f"Delete {i.name} ({i.instructor_id})?"):
             return
-        unlink_instructor_from_everything(i)
-        INSTRUCTORS.remove(i)
-        refresh_tables()
+        REGISTRY.remove_instructor(i)
 
     instructors_tbl.btn_edit.config(command=on_edit_instructor)
     instructors_tbl.btn_del.config(command=on_del_instructor)
@@ -597,29 +734,19 @@ def build_tables_and_search(parent):
             ("inst",     "Instructor",        200, "w", "search by Instructor"),
             ("students", "Enrolled Students", 340, "w", "search by Student"),
         ],
-        get_rows=lambda: [
-            (c.course_id, c.course_name,
-             c.instructor.name if c.instructor else "",
-             ", ".join(f"{s.student_id}-{s.name}" for s in c.enrolled_students))
-            for c in COURSES
-        ],
+        index=SEARCH.courses,
     )
     courses_tbl.frame.grid(row=2, column=0, sticky="nsew")
 
     def course_selected():
-        sel = courses_tbl.tv.selection()
-        if not sel: return None
-        cid = courses_tbl.tv.item(sel[0], "values")[0]
-        for c in COURSES:
-            if c.course_id == cid:
-                return c
-        return None
+        cid = courses_tbl.selected_key()
+        return REGISTRY.get_course(cid) if cid is not None else None
 
     def on_edit_course():
         c = course_selected()
         if not c:
             messagebox.showinfo("Edit Course", "Select a course row first."); return
-        edit_dialog_course(outer, c, on_ok=lambda: refresh_tables())
+        edit_dialog_course(outer, c)
 
     def on_del_course():
         c = course_selected()
@@ -627,9 +754,7 @@ def build_tables_and_search(parent):
             messagebox.showinfo("Delete Course", "Select a course row first."); return
         if not messagebox.askyesno("Delete Course", f"Delete {c.course_name} ({c.course_id})?"):
             return
-        unlink_course_from_everything(c)
-        COURSES.remove(c)
-        refresh_tables()
+        REGISTRY.remove_course(c)
 
     courses_tbl.btn_edit.config(command=on_edit_course)
     courses_tbl.btn_del.config(command=on_del_course)
@@ -639,57 +764,206 @@ def build_tables_and_search(parent):
         instructors_tbl.refresh()
         courses_tbl.refresh()
 
+    def browse_db(conn, lazy=None):
+        """Shows the rows in the database (conn) instead of REGISTRY; None switches back.
+
+        With `lazy`, the records of a load_all(conn, lazy=True), the rows are
+        built from those instead."""
+        state = "normal" if conn is None else "disabled"
+        tables = ((students_tbl, "students", SEARCH.students, student_row),
+                  (instructors_tbl, "instructors", SEARCH.instructors, instructor_row),
+                  (courses_tbl, "courses", SEARCH.courses, course_row))
+        for k, (tbl, table, index, row_fn) in enumerate(tables):
+            if conn is None:
+                tbl.index = index
+            elif lazy is not None:
+                tbl.index = LazyIndex(lazy[k], row_fn, RecordsQuery(conn, table))
+            else:
+                tbl.index = RecordsQuery(conn, table)
+            tbl.btn_edit.config(state=state)
+            tbl.btn_del.config(state=state)
+            tbl._top = 0
+            tbl.refresh()
+
+    if scheduler is not None:
+        # each table follows the records it lists and the names and links its rows show
+        scheduler.watch(lambda _: students_tbl.refresh(), "students", "registrations", "courses updated")
+        scheduler.watch(lambda _: instructors_tbl.refresh(), "instructors", "assignments", "courses updated")
+        scheduler.watch(lambda _: courses_tbl.refresh(), "courses", "registrations", "assignments",
+                        "students updated", "instructors updated")
+
     outer.refresh_tables = refresh_tables
+    outer.browse_db = browse_db
     return outer
 
 
 
 
 
-def build_save_load_bar(parent, on_refresh):
+def run_task(parent, title, fn, *args, on_done=None, on_end=None, modal=True):
+    """Runs fn(*args, progress=...) on the background worker.
+
+    A window with a progress bar and a Cancel button stays up while it
+    runs, modal unless modal=False; the Tk loop keeps going and polls the
+    task with after(). on_done(result) is then called on the Tk thread if
+    it succeeded; on_end(), if given, is called before that whatever the
+    outcome.
+    """
+    future, progress = submit(fn, *args)
+
+    win = tk.Toplevel(parent)
+    win.title(title)
+    win.transient(parent.winfo_toplevel())
+    win.resizable(False, False)
+    bar = ttk.Progressbar(win, length=300, mode="indeterminate", maximum=1000)
+    bar.pack(padx=12, pady=(12, 4))
+    status = ttk.Label(win, text="Working…")
+    status.pack(padx=12)
+
+    def on_cancel():
+        progress.cancel()
+        status.config(text="Cancelling…")
+        btn_cancel.config(state="disabled")
+
+    btn_cancel = ttk.Button(win, text="Cancel", command=on_cancel)
+    btn_cancel.pack(pady=(6, 12))
+    win.protocol("WM_DELETE_WINDOW", on_cancel)
+    if modal:
+        win.grab_set()
+    bar.start(15)
+
+    def poll():
+        frac = progress.fraction()
+        if frac is not None and not progress.cancelled:
+            if str(bar.cget("mode")) != "determinate":
+                bar.stop()
+                bar.config(mode="determinate")
+            bar.config(value=frac * 1000)
+            status.config(text=f"{progress.done:,} / {progress.total:,}")
+        if not future.done():
+            win.after(POLL_MS, poll)
+            return
+        if modal:
+            win.grab_release()
+        win.destroy()
+        if on_end is not None:
+            on_end()
+        try:
+            result = future.result()
+        except Cancelled:
+            messagebox.showinfo(title, "Cancelled.")
+            return
+        except Exception as e:
+            messagebox.showerror(title, str(e))
+            return
+        if on_done is not None:
+            on_done(result)
+
+    win.after(POLL_MS, poll)
+
+SEARCH_DELAY_MS = 150
+
+def build_global_search(parent):
+    """Search box over the saved records (db.search), best matches first."""
+    frame = ttk.LabelFrame(parent, text="Search database", padding=8)
+    frame.columnconfigure(0, weight=1)
+
+    e = ttk.Entry(frame)
+    e.grid(row=0, column=0, sticky="ew")
+    status = ttk.Label(frame, foreground="#888")
+    status.grid(row=0, column=1, padx=(8, 0))
+    hits = tk.Listbox(frame, height=6)
+    hits.grid(row=1, column=0, columnspan=2, sticky="ew", pady=(4, 0))
+
+    pending = [None]
+
+    def run_search():
+        pending[0] = None
+        hits.delete(0, "end")
+        text = e.get().strip()
+        if not text:
+            status.config(text="")
+            return
+        if DB_CONN is None:
+            status.config(text="No DB connection.")
+            return
+        t0 = time.perf_counter()
+        try:
+            rows = search(DB_CONN, text)
+        except Exception as ex:
+            status.config(text=str(ex))
+            return
+        for kind, rid, name, email in rows:
+            hits.insert("end", f"{kind:<10} {rid} | {name}" + (f" <{email}>" if email else ""))
+        status.config(text=f"{len(rows)} hits in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    def on_key(_):
+        # Wait for a pause in typing before querying.
+        if pending[0] is not None:
+            e.after_cancel(pending[0])
+        pending[0] = e.after(SEARCH_DELAY_MS, run_search)
+
+    e.bind("<KeyRelease>", on_key)
+    return frame
+
+def build_save_load_bar(parent, on_db_changed, on_browse=None):
     bar = ttk.Frame(parent); bar.columnconfigure(5, weight=1)  
+    browse_var = tk.BooleanVar(value=False)
 
     def on_save():
         path = fd.asksaveasfilename(defaultextension=".json",
                                     filetypes=[("JSON","*.json")],
                                     title="Save data")
         if not path: return
-        save_json(path, STUDENTS, INSTRUCTORS, COURSES)
-        messagebox.showinfo("Save", "Data saved.")
+        run_task(bar, "Save", save_json, path,
+                 list(REGISTRY.students), list(REGISTRY.instructors), list(REGISTRY.courses),
+                 on_done=lambda _: messagebox.showinfo("Save", "Data saved."))
 
     def on_load():
         path = fd.askopenfilename(filetypes=[("JSON","*.json")], title="Load data")
         if not path: return
-        students, instructors, courses = load_json(path)
-        STUDENTS[:] = students
-        INSTRUCTORS[:] = instructors
-        COURSES[:] = courses
-        on_refresh()
-        messagebox.showinfo("Load", "Data loaded.")
+
+        def done(loaded):
+            REGISTRY.replace(*loaded)
+            messagebox.showinfo("Load", "Data loaded.")
+        run_task(bar, "Load", load_json, path, on_done=done)
 
     def on_db_save():
         if DB_CONN is None:
             messagebox.showerror("Database", "No DB connection.")
             return
-        try:
-            save_all(DB_CONN, STUDENTS, INSTRUCTORS, COURSES)
+
+        def done(_):
+            if browse_var.get():
+                on_db_changed()
             messagebox.showinfo("Database", "Saved to SQLite (school.db).")
-        except Exception as e:
-            messagebox.showerror("Database Save", str(e))
+        run_task(bar, "Database Save", db_save, DB_POOL,
+                 list(REGISTRY.students), list(REGISTRY.instructors), list(REGISTRY.courses),
+                 REGISTRY.removed, on_done=done)
 
     def on_db_load():
         if DB_CONN is None:
             messagebox.showerror("Database", "No DB connection.")
             return
-        try:
-            students, instructors, courses = load_all(DB_CONN)
-            STUDENTS[:] = students
-            INSTRUCTORS[:] = instructors
-            COURSES[:] = courses
-            on_refresh()
+
+        # The tables show the database at once through a lazy load_all(),
+        # built a page at a time as they scroll, while the full load that
+        # editing needs runs behind a window that leaves them usable.
+        btn_db_load.config(state="disabled")
+        chk_browse.config(state="disabled")
+        if on_browse is not None and not browse_var.get():
+            on_browse(DB_CONN, load_all(DB_CONN, lazy=True))
+
+        def end():
+            btn_db_load.config(state="normal")
+            chk_browse.config(state="normal")
+            if on_browse is not None:
+                on_browse(DB_CONN if browse_var.get() else None)
+
+        def done(loaded):
+            REGISTRY.replace(*loaded, synced=True)
             messagebox.showinfo("Database", "Loaded from SQLite (school.db).")
-        except Exception as e:
-            messagebox.showerror("Database Load", str(e))
+        run_task(bar, "Database Load", db_load, DB_POOL, on_done=done, on_end=end, modal=False)
 
     def on_db_backup():
         if DB_CONN is None:
@@ -703,52 +977,77 @@ def build_save_load_bar(parent, on_refresh):
         )
         if not path:
             return
-        try:
-            backup_to(DB_CONN, path)
-            messagebox.showinfo("Database", f"Backup written to:\n{path}")
-        except Exception as e:
-            messagebox.showerror("Database Backup", str(e))
+        incremental = os.path.exists(path) and messagebox.askyesno(
+            "Database", "Update the existing backup with the changed rows only?\n"
+                        "(No writes a complete new copy.)")
+        run_task(bar, "Database Backup", db_backup, DB_POOL, path, incremental,
+                 on_done=lambda mode: messagebox.showinfo("Database", f"{mode.capitalize()} backup written to:\n{path}"))
+
+    def on_db_export_csv():
+        if DB_CONN is None:
+            messagebox.showerror("Database", "No DB connection.")
+            return
+        directory = fd.askdirectory(title="Choose folder to save CSV files")
+        if not directory:
+            return
+        compress = messagebox.askyesno("Export CSV", "Compress the files with gzip?")
+
+        def done(paths):
+            messagebox.showinfo("Export Complete", "Exported:\n" + "\n".join(f"- {p}" for p in paths))
+        run_task(bar, "Export CSV", db_export_csv, DB_POOL, directory, compress, on_done=done)
+
+    def on_toggle_browse():
+        if DB_CONN is None:
+            browse_var.set(False)
+            messagebox.showerror("Database", "No DB connection.")
+            return
+        on_browse(DB_CONN if browse_var.get() else None)
 
     ttk.Button(bar, text="Save", command=on_save).grid(row=0, column=0, padx=4)
     ttk.Button(bar, text="Load", command=on_load).grid(row=0, column=1, padx=4)
 
     ttk.Separator(bar, orient="vertical").grid(row=0, column=2, padx=8, sticky="ns")
     ttk.Button(bar, text="DB Save",   command=on_db_save).grid(row=0, column=3, padx=4)
-    ttk.Button(bar, text="DB Load",   command=on_db_load).grid(row=0, column=4, padx=4)
+    btn_db_load = ttk.Button(bar, text="DB Load", command=on_db_load)
+    btn_db_load.grid(row=0, column=4, padx=4)
     ttk.Button(bar, text="DB Backup", command=on_db_backup).grid(row=0, column=5, padx=4)
+    ttk.Button(bar, text="DB Export CSV", command=on_db_export_csv).grid(row=0, column=6, padx=4)
+    chk_browse = ttk.Checkbutton(bar, text="Browse DB", variable=browse_var, command=on_toggle_browse)
+    if on_browse is not None:
+        chk_browse.grid(row=0, column=7, padx=4)
 
     return bar
 
-def build_forms_tab(parent, on_refresh):
+def build_forms_tab(parent, scheduler):
     tab = ttk.Frame(parent, padding=0)
 
     scroller = ScrollableFrame(tab)
     scroller.pack(fill="both", expand=True, padx=8, pady=8)
     host = scroller.inner
 
-    student_frame    = build_student_form(host, on_changed=on_refresh);    student_frame.pack(anchor="w", pady=4)
-    instructor_frame = build_instructor_form(host, on_changed=on_refresh); instructor_frame.pack(anchor="w", pady=4)
-    course_frame     = build_course_form(host, on_changed=on_refresh);     course_frame.pack(anchor="w", pady=4)
+    student_frame    = build_student_form(host);    student_frame.pack(anchor="w", pady=4)
+    instructor_frame = build_instructor_form(host); instructor_frame.pack(anchor="w", pady=4)
+    course_frame     = build_course_form(host);     course_frame.pack(anchor="w", pady=4)
 
-    reg_frame = build_registration_form(host, on_refresh=on_refresh); reg_frame.pack(anchor="w", pady=6)
-    asg_frame = build_assignment_form(host, on_refresh=on_refresh);   asg_frame.pack(anchor="w", pady=6)
-
-    tab.reg_frame = reg_frame
-    tab.asg_frame = asg_frame
+    reg_frame = build_registration_form(host, scheduler); reg_frame.pack(anchor="w", pady=6)
+    asg_frame = build_assignment_form(host, scheduler);   asg_frame.pack(anchor="w", pady=6)
     return tab
 
 
-def build_records_tab(parent, on_refresh):
+def build_records_tab(parent, scheduler):
     tab = ttk.Frame(parent, padding=0)
 
     scroller = ScrollableFrame(tab)
     scroller.pack(fill="both", expand=True, padx=8, pady=8)
     host = scroller.inner  
 
-    tables = build_tables_and_search(host)
+    search_box = build_global_search(host)
+    search_box.pack(fill="x", pady=(0,8))
+
+    tables = build_tables_and_search(host, scheduler)
     tables.pack(fill="both", expand=True, pady=(0,8))
 
-    bar = build_save_load_bar(host, on_refresh=on_refresh)
+    bar = build_save_load_bar(host, on_db_changed=tables.refresh_tables, on_browse=tables.browse_db)
     bar.pack(fill="x", pady=6)
 
     tab.tables = tables
@@ -756,7 +1055,7 @@ def build_records_tab(parent, on_refresh):
 
 
 def main():
-    global DB_CONN
+    global DB_POOL, DB_CONN
 
     root = tk.Tk()
     root.title("School Management System")
@@ -769,9 +1068,10 @@ def main():
 
    
     try:
-        DB_CONN = init_db("school.db")  
+        DB_POOL = ConnectionPool(DB_PATH)
+        DB_CONN = DB_POOL.acquire()
     except Exception as e:
-        DB_CONN = None
+        DB_POOL = DB_CONN = None
         messagebox.showerror("Database", f"DB init failed: {e}")
 
     container = ttk.Frame(root, padding=10)
@@ -780,26 +1080,22 @@ def main():
     nb = ttk.Notebook(container)
     nb.pack(fill="both", expand=True)
 
-    forms_tab = records_tab = None
-
-    def global_refresh():
-        records_tab.tables.refresh_tables()
-        forms_tab.reg_frame.refresh_options()
-        forms_tab.asg_frame.refresh_options()
-
-    forms_tab   = build_forms_tab(nb, on_refresh=global_refresh)
-    records_tab = build_records_tab(nb, on_refresh=global_refresh)
+    # Widgets repaint from registry events, once per idle tick.
+    scheduler = RefreshScheduler(REGISTRY, root.after_idle)
+    forms_tab   = build_forms_tab(nb, scheduler)
+    records_tab = build_records_tab(nb, scheduler)
 
     nb.add(forms_tab,   text="Forms")
     nb.add(records_tab, text="Records & Search")
 
-    global_refresh()
+    scheduler.refresh_all()
     nb.select(records_tab) 
 
     def _on_close():
         try:
             if DB_CONN is not None:
-                DB_CONN.close()
+                DB_POOL.release(DB_CONN)
+                DB_POOL.close()
         except Exception:
             pass
         root.destroy()
@@ -1,13 +1,198 @@
-from flask import Flask
-from flask import Flask, render_template
-from classes import Person, Student, Instructor, Course
-from GUIbase.datastore import save_json, load_json
+import atexit
+import gzip
+import os
+
+from flask import Flask, abort, g, jsonify, request, url_for
+from werkzeug.exceptions import HTTPException
+
+from classes import _require_id
+from api import (RESOURCES, cache_stats, course_students_page, exists, get_record, invalidate, list_page,
+                 page_limit, search_items, writing)
+from db import ConnectionPool
 
 app = Flask(__name__)
 
-@app.route('/')
+DB_PATH = os.environ.get("SCHOOL_DB", "school.db")
+POOL = ConnectionPool(DB_PATH, size=int(os.environ.get("SCHOOL_DB_POOL", "8")))
+atexit.register(POOL.close)
+
+GZIP_MIN_BYTES = 1024
+
+
+# ---- per-request pooled connection -----------------------------------
+
+def _conn():
+    # Borrowed on first use and handed back in _release_conn(), so
+    # requests that never touch the database never wait for the pool.
+    if "conn" not in g:
+        g.conn = POOL.acquire()
+    return g.conn
+
+@app.teardown_request
+def _release_conn(exc):
+    conn = g.pop("conn", None)
+    if conn is not None:
+        POOL.release(conn)
+
+
+# ---- responses -------------------------------------------------------
+
+def _json(payload):
+    """A JSON response with a weak ETag; answers If-None-Match with 304."""
+    resp = jsonify(payload)
+    resp.add_etag(weak=True)
+    return resp.make_conditional(request)
+
+@app.after_request
+def _compress(resp):
+    if resp.mimetype != "application/json":
+        return resp
+    resp.vary.add("Accept-Encoding")
+    if (resp.status_code == 200 and not resp.direct_passthrough
+            and "Content-Encoding" not in resp.headers
+            and "gzip" in request.headers.get("Accept-Encoding", "")
+            and (resp.content_length or 0) >= GZIP_MIN_BYTES):
+        resp.set_data(gzip.compress(resp.get_data(), compresslevel=6))
+        resp.headers["Content-Encoding"] = "gzip"
+    return resp
+
+@app.errorhandler(HTTPException)
+def _http_error(e):
+    resp = jsonify(error=e.description)
+    resp.status_code = e.code
+    return resp
+
+@app.errorhandler(TimeoutError)
+def _pool_exhausted(e):
+    # every pooled connection stayed busy for POOL.acquire_timeout seconds
+    resp = jsonify(error="server busy, try again")
+    resp.status_code = 503
+    resp.headers["Retry-After"] = "1"
+    return resp
+
+
+# ---- reads -----------------------------------------------------------
+
+def _page_args():
+    try:
+        limit = page_limit(request.args.get("limit"))
+    except ValueError as e:
+        abort(400, str(e))
+    return request.args.get("after", ""), limit
+
+def _page(endpoint: str, page, key: str, limit: int, **values):
+    items, more = page
+    nxt = url_for(endpoint, after=items[-1][key], limit=limit, **values) if more else None
+    return _json({"items": items, "next": nxt})
+
+@app.route("/")
 def index():
-    return render_template('index.html')
-    
+    return _json({
+        "students": url_for("list_records", resource="students"),
+        "instructors": url_for("list_records", resource="instructors"),
+        "courses": url_for("list_records", resource="courses"),
+        "search": url_for("search_records", q=""),
+    })
+
+@app.route("/api/<any(students, instructors, courses):resource>")
+def list_records(resource):
+    after, limit = _page_args()
+    return _page("list_records", list_page(_conn(), resource, after, limit),
+                 RESOURCES[resource][1], limit, resource=resource)
+
+@app.route("/api/<any(students, instructors, courses):resource>/<record_id>")
+def show_record(resource, record_id):
+    item = get_record(_conn(), resource, record_id)
+    if item is None:
+        abort(404, f"no {resource[:-1]} {record_id!r}")
+    return _json(item)
+
+@app.route("/api/courses/<course_id>/students")
+def course_students(course_id):
+    after, limit = _page_args()
+    _require_course(course_id)
+    return _page("course_students", course_students_page(_conn(), course_id, after, limit),
+                 "student_id", limit, course_id=course_id)
+
+@app.route("/api/search")
+def search_records():
+    try:
+        limit = page_limit(request.args.get("limit"))
+    except ValueError as e:
+        abort(400, str(e))
+    return _json({"items": search_items(_conn(), request.args.get("q", ""), limit)})
+
+@app.route("/api/cache")
+def cache_statistics():
+    return _json(cache_stats())
+
+
+# ---- registration and assignment -------------------------------------
+
+def _require_course(course_id: str):
+    if not exists(_conn(), "courses", "course_id", course_id):
+        abort(404, f"no course {course_id!r}")
+
+def _require_person(table: str, key: str, record_id: str):
+    if not exists(_conn(), table, key, record_id):
+        abort(404, f"no {table[:-1]} {record_id!r}")
+
+def _registration_changed(student_id: str, course_id: str):
+    invalidate("students", student_id)
+    invalidate("courses", course_id)
+
+def _assignment_changed(course_id: str, *instructor_ids):
+    invalidate("courses", course_id)
+    invalidate("instructors", *filter(None, instructor_ids))
+
+@app.route("/api/courses/<course_id>/students/<student_id>", methods=["PUT", "DELETE"])
+def registration(course_id, student_id):
+    conn = _conn()
+    _require_course(course_id)
+    _require_person("students", "student_id", student_id)
+    if request.method == "PUT":
+        with writing(conn):
+            cur = conn.execute("INSERT OR IGNORE INTO registrations(student_id, course_id) VALUES(?, ?)",
+                               (student_id, course_id))
+        _registration_changed(student_id, course_id)
+        return _json({"student_id": student_id, "course_id": course_id}), 201 if cur.rowcount else 200
+    with writing(conn):
+        cur = conn.execute("DELETE FROM registrations WHERE student_id = ? AND course_id = ?",
+                           (student_id, course_id))
+    _registration_changed(student_id, course_id)
+    if not cur.rowcount:
+        abort(404, f"student {student_id!r} is not registered in {course_id!r}")
+    return "", 204
+
+def _instructor_of(conn, course_id: str):
+    return conn.execute("SELECT instructor_id FROM courses WHERE course_id = ?", (course_id,)).fetchone()[0]
+
+@app.route("/api/courses/<course_id>/instructor", methods=["PUT", "DELETE"])
+def assignment(course_id):
+    conn = _conn()
+    _require_course(course_id)
+    if request.method == "DELETE":
+        with writing(conn):
+            old = _instructor_of(conn, course_id)
+            conn.execute("UPDATE courses SET instructor_id = NULL WHERE course_id = ?", (course_id,))
+        _assignment_changed(course_id, old)
+        return "", 204
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        abort(400, 'expected a JSON object like {"instructor_id": "..."}')
+    try:
+        instructor_id = _require_id(body.get("instructor_id"), "instructor_id")
+    except ValueError as e:
+        abort(400, str(e))
+    _require_person("instructors", "instructor_id", instructor_id)
+    with writing(conn):
+        old = _instructor_of(conn, course_id)
+        conn.execute("UPDATE courses SET instructor_id = ? WHERE course_id = ?", (instructor_id, course_id))
+    _assignment_changed(course_id, old, instructor_id)
+    return _json({"course_id": course_id, "instructor_id": instructor_id})
 
 
+if __name__ == "__main__":
+    # Flask's own server, threaded; for real load run it under a WSGI
+    # server, e.g. gunicorn -w 4 --threads 8 hello:app
+    app.run(threaded=True)
@@ -0,0 +1,243 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlencode
+
+import api
+from db import ConnectionPool
+
+# The read side of hello.py as a plain ASGI app, for read-heavy traffic:
+# one event loop takes the connections and a few threads run the SQLite
+# queries. Serve it with any ASGI server, e.g.
+#     uvicorn hello_async:app --port 8000
+
+DB_PATH = os.environ.get("SCHOOL_DB", "school.db")
+READERS = int(os.environ.get("SCHOOL_DB_READERS", "8"))
+MAX_PENDING = int(os.environ.get("SCHOOL_API_PENDING", "256"))
+GZIP_MIN_BYTES = 1024
+
+
+def _dumps(payload) -> bytes:
+    # same bytes as Flask's jsonify(), so both modes send the same ETags
+    return (json.dumps(payload, sort_keys=True, separators=(",", ":")) + "\n").encode()
+
+
+class _Reply:
+    """One rendered response, shared by every request it was coalesced for."""
+    __slots__ = ("status", "body", "gzipped", "etag")
+
+    def __init__(self, status: int, payload):
+        self.status = status
+        self.body = _dumps(payload)
+        self.gzipped = gzip.compress(self.body, compresslevel=6) if len(self.body) >= GZIP_MIN_BYTES else None
+        self.etag = f'W/"{hashlib.sha1(self.body).hexdigest()}"'.encode() if status == 200 else None
+
+
+class _NotFound(Exception):
+    pass
+
+
+class ReadService:
+    """ASGI app serving hello.py's GET endpoints, plus
+    /api/stream/<students|instructors|courses|registrations>, every record
+    as NDJSON sent as it is read.
+
+    Queries run on `readers` threads, each borrowing a pooled connection,
+    so the event loop never waits on SQLite. Identical GETs (same path and
+    query string) that arrive while one is being answered wait for that
+    answer instead of running the query again. At most `max_pending`
+    distinct queries are queued or running; past that, and past
+    `readers // 2` open streams, requests get 503 with Retry-After.
+    """
+
+    def __init__(self, db_path: str, readers: int = READERS, max_pending: int = MAX_PENDING):
+        self.max_pending = max_pending
+        self.max_streams = max(1, readers // 2)
+        # open streams keep their connection between batches; the extra
+        # ones keep every reader thread able to get one
+        self.pool = ConnectionPool(db_path, size=readers + self.max_streams, acquire_timeout=5.0)
+        self.executor = ThreadPoolExecutor(readers, thread_name_prefix="sqlite-reader")
+        self._pending = {}
+        self._streams = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+        self.pool.close()
+
+    # ---- requests --------------------------------------------------------
+
+    async def _http(self, scope, receive, send):
+        headers = dict(scope["headers"])
+        accepts_gzip = b"gzip" in headers.get(b"accept-encoding", b"")
+        if scope["method"] not in ("GET", "HEAD"):
+            return await self._send(send, _Reply(405, {"error": "this service is read-only"}),
+                                    accepts_gzip, extra=[(b"allow", b"GET, HEAD")])
+        path = scope["path"]
+        parts = path.strip("/").split("/")
+        if len(parts) == 3 and parts[:2] == ["api", "stream"] and (
+                parts[2] in api.RESOURCES or parts[2] == "registrations"):
+            return await self._stream(parts[2], receive, send, accepts_gzip)
+
+        key = (path, scope["query_string"])
+        reply = self._pending.get(key)
+        if reply is None:
+            if len(self._pending) >= self.max_pending:
+                return await self._send(send, _Reply(503, {"error": "server busy, try again"}),
+                                        accepts_gzip, extra=[(b"retry-after", b"1")])
+            params = {k: v[0] for k, v in parse_qs(scope["query_string"].decode("latin-1")).items()}
+            loop = asyncio.get_running_loop()
+            reply = self._pending[key] = loop.run_in_executor(self.executor, self._read, parts, params)
+            reply.add_done_callback(lambda _: self._pending.pop(key, None))
+        # shielded: a client that hangs up does not cancel the others' answer
+        reply = await asyncio.shield(reply)
+        if reply.etag is not None and reply.etag in headers.get(b"if-none-match", b""):
+            return await self._send(send, reply, accepts_gzip, not_modified=True)
+        await self._send(send, reply, accepts_gzip, head=scope["method"] == "HEAD")
+
+    async def _send(self, send, reply: _Reply, accepts_gzip: bool, not_modified: bool = False,
+                    head: bool = False, extra=()):
+        body = reply.body
+        headers = [(b"content-type", b"application/json"), (b"vary", b"Accept-Encoding")]
+        if reply.etag is not None:
+            headers.append((b"etag", reply.etag))
+        if not_modified:
+            body = b""
+        else:
+            if accepts_gzip and reply.gzipped is not None and reply.status == 200:
+                body = reply.gzipped
+                headers.append((b"content-encoding", b"gzip"))
+            headers.append((b"content-length", str(len(body)).encode()))
+        await send({"type": "http.response.start", "status": 304 if not_modified else reply.status,
+                    "headers": headers + list(extra)})
+        await send({"type": "http.response.body", "body": b"" if head else body})
+
+    def _read(self, parts, params) -> _Reply:
+        # runs on a reader thread
+        try:
+            with self.pool.connection() as conn:
+                return _Reply(200, self._route(conn, parts, params))
+        except _NotFound as e:
+            return _Reply(404, {"error": str(e)})
+        except ValueError as e:
+            return _Reply(400, {"error": str(e)})
+        except TimeoutError:
+            return _Reply(503, {"error": "server busy, try again"})
+
+    def _route(self, conn, parts, params):
+        if parts == [""]:
+            return {name: f"/api/{name}" for name in api.RESOURCES} | {"search": "/api/search?q="}
+        if parts[0] != "api" or len(parts) < 2:
+            raise _NotFound("not found")
+        after = params.get("after", "")
+        if parts[1] == "cache" and len(parts) == 2:
+            return api.cache_stats()
+        if parts[1] == "search" and len(parts) == 2:
+            return {"items": api.search_items(conn, params.get("q", ""), api.page_limit(params.get("limit")))}
+        if parts[1] not in api.RESOURCES:
+            raise _NotFound("not found")
+        resource, key = parts[1], api.RESOURCES[parts[1]][1]
+        if len(parts) == 2:
+            limit = api.page_limit(params.get("limit"))
+            return self._page(f"/api/{resource}", api.list_page(conn, resource, after, limit), key, limit)
+        if len(parts) == 3:
+            item = api.get_record(conn, resource, parts[2])
+            if item is None:
+                raise _NotFound(f"no {resource[:-1]} {parts[2]!r}")
+            return item
+        if len(parts) == 4 and resource == "courses" and parts[3] == "students":
+            limit = api.page_limit(params.get("limit"))
+            if not api.exists(conn, "courses", "course_id", parts[2]):
+                raise _NotFound(f"no course {parts[2]!r}")
+            return self._page(f"/api/courses/{parts[2]}/students",
+                              api.course_students_page(conn, parts[2], after, limit), "student_id", limit)
+        raise _NotFound("not found")
+
+    @staticmethod
+    def _page(path: str, page, key: str, limit: int) -> dict:
+        items, more = page
+        nxt = f"{path}?{urlencode({'after': items[-1][key], 'limit': limit})}" if more else None
+        return {"items": items, "next": nxt}
+
+    # ---- streams ---------------------------------------------------------
+
+    async def _stream(self, resource: str, receive, send, accepts_gzip: bool):
+        if self._streams >= self.max_streams:
+            return await self._send(send, _Reply(503, {"error": "too many open streams, try again"}),
+                                    accepts_gzip, extra=[(b"retry-after", b"1")])
+        self._streams += 1
+        loop = asyncio.get_running_loop()
+        conn = None
+        disconnected = asyncio.Event()
+
+        async def watch():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        watcher = asyncio.ensure_future(watch())
+        try:
+            try:
+                conn = await loop.run_in_executor(self.executor, self.pool.acquire)
+            except TimeoutError:
+                return await self._send(send, _Reply(503, {"error": "server busy, try again"}),
+                                        accepts_gzip, extra=[(b"retry-after", b"1")])
+            # one read transaction, so the stream is a single snapshot
+            await loop.run_in_executor(self.executor, conn.execute, "BEGIN")
+            batches = api.stream_items(conn, resource)
+            deflate = zlib.compressobj(6, zlib.DEFLATED, 31) if accepts_gzip else None
+            headers = [(b"content-type", b"application/x-ndjson"), (b"vary", b"Accept-Encoding")]
+            if deflate is not None:
+                headers.append((b"content-encoding", b"gzip"))
+            await send({"type": "http.response.start", "status": 200, "headers": headers})
+            while not disconnected.is_set():
+                chunk = await loop.run_in_executor(self.executor, _next_chunk, batches, deflate)
+                if chunk is None:
+                    break
+                # waits while the client's socket buffer is full
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": deflate.flush() if deflate else b""})
+        finally:
+            watcher.cancel()
+            self._streams -= 1
+            if conn is not None:
+                await loop.run_in_executor(self.executor, self.pool.release, conn)
+
+
+def _next_chunk(batches, deflate):
+    # one batch of rows as NDJSON, gzipped up to a sync point so the client
+    # can decode it right away; None at the end
+    batch = next(batches, None)
+    if batch is None:
+        return None
+    data = "".join(json.dumps(item, sort_keys=True, separators=(",", ":")) + "\n" for item in batch).encode()
+    if deflate is None:
+        return data
+    return deflate.compress(data) + deflate.flush(zlib.Z_SYNC_FLUSH)
+
+
+app = ReadService(DB_PATH)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, port=8000, lifespan="on", log_level="warning")
@@ -0,0 +1,259 @@
+import csv
+import gzip
+import io
+import os
+import sqlite3
+from contextlib import ExitStack
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+from classes import _require_email, _require_id, _require_nonneg_int, _require_str
+from db import BATCH_SIZE, bulk_writes
+
+# The files datastore.export_csv() and exporter.export_db_csv() write, in
+# import order, with their columns. The last column of each holds
+# ';'-joined ids and may be absent.
+CSV_FORMATS = (
+    ("instructors.csv", ("instructor_id", "name", "age", "email", "assigned_course_ids")),
+    ("students.csv", ("student_id", "name", "age", "email", "registered_course_ids")),
+    ("courses.csv", ("course_id", "course_name", "instructor_id", "enrolled_student_ids")),
+)
+MAX_ERRORS = 1000
+# An import switches to db.bulk_writes() once its rows plus links reach
+# both BULK_MIN_ROWS and the rows already in the database. Below that,
+# rebuilding every index and all of search_fts costs more than the bulk
+# path saves (about as much per existing row as it saves per new one).
+BULK_MIN_ROWS = 20_000
+
+_UPSERTS = {
+    "instructors.csv":
+        "INSERT INTO instructors(instructor_id,name,age,email) VALUES(?,?,?,?) "
+        "ON CONFLICT(instructor_id) DO UPDATE SET name=excluded.name, age=excluded.age, email=excluded.email",
+    "students.csv":
+        "INSERT INTO students(student_id,name,age,email) VALUES(?,?,?,?) "
+        "ON CONFLICT(student_id) DO UPDATE SET name=excluded.name, age=excluded.age, email=excluded.email",
+    "courses.csv":
+        "INSERT INTO courses(course_id,course_name) VALUES(?,?) "
+        "ON CONFLICT(course_id) DO UPDATE SET course_name=excluded.course_name",
+}
+
+# Links are staged here until every file is in, with the file and line
+# they came from for error reports.
+_STAGING = """
+CREATE TEMP TABLE import_registrations(student_id TEXT, course_id TEXT, file INTEGER, line INTEGER);
+CREATE TEMP TABLE import_teaches(instructor_id TEXT, course_id TEXT, priority INTEGER, file INTEGER, line INTEGER);
+"""
+
+
+class ImportReport:
+    """What import_csv() did.
+
+    `imported` counts the rows written per file and `links` the
+    registrations and instructor assignments. `errors` holds
+    (file name, line, message) for the first MAX_ERRORS rejected rows or
+    links; `error_count` counts all of them.
+    """
+
+    def __init__(self):
+        self.imported: Dict[str, int] = {}
+        self.links = 0
+        self.errors: List[Tuple[str, int, str]] = []
+        self.error_count = 0
+
+    def error(self, name: str, line: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((name, line, message))
+
+
+def _age(value) -> int:
+    try:
+        n = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("age must be an integer") from None
+    return _require_nonneg_int(n, "age")
+
+@lru_cache(maxsize=1 << 16)
+def _link_id(value: str, field: str) -> str:
+    # the same few course ids recur on every roster row
+    return _require_id(value, field)
+
+def _ids(value, field: str) -> List[str]:
+    return [_link_id(v, field) for v in (value or "").split(";") if v.strip()]
+
+# Each validator turns one CSV row into (row for _UPSERTS, registrations
+# as (student_id, course_id), teaches as (instructor_id, course_id,
+# priority)), or raises ValueError.
+
+def _instructor(row):
+    iid = _require_id(row[0], "instructor_id")
+    return ((iid, _require_str(row[1], "name"), _age(row[2]), _require_email(row[3])),
+            (), [(iid, cid, 1) for cid in _ids(row[4], "assigned_course_ids")])
+
+def _student(row):
+    sid = _require_id(row[0], "student_id")
+    return ((sid, _require_str(row[1], "name"), _age(row[2]), _require_email(row[3])),
+            [(sid, cid) for cid in _ids(row[4], "registered_course_ids")], ())
+
+def _course(row):
+    cid = _require_id(row[0], "course_id")
+    # the course's own instructor_id wins over the instructors' lists
+    teaches = [(_require_id(row[2], "instructor_id"), cid, 0)] if row[2] and row[2].strip() else ()
+    return ((cid, _require_str(row[1], "course_name")),
+            [(sid, cid) for sid in _ids(row[3], "enrolled_student_ids")], teaches)
+
+_VALIDATORS = {"instructors.csv": _instructor, "students.csv": _student, "courses.csv": _course}
+
+
+def import_csv(conn: sqlite3.Connection, directory,
+               progress: Optional[Callable[[int, int], None]] = None) -> ImportReport:
+    """Imports the export_csv() files found in directory into the database.
+
+    Each file is streamed in batches of BATCH_SIZE rows: the rows are
+    checked with the classes.py validators, and the good ones are upserted
+    with one executemany. A bad row is skipped and reported in the
+    returned ImportReport. The ';'-joined id columns are staged in temp
+    tables and linked at the end, so a file may refer to records in the
+    others; links to ids that exist nowhere are reported too. Nothing is
+    deleted, and existing registrations and instructors stay unless a file
+    sets a new one.
+
+    Each file may also be gzipped (students.csv.gz and so on, as
+    exporter.export_db_csv() writes them). Everything is one transaction;
+    a large import goes on under db.bulk_writes() once it is past the
+    threshold (see BULK_MIN_ROWS). progress(done, total) counts bytes
+    read; an exception raised from it rolls the import back.
+    """
+    files = []
+    for name, columns in CSV_FORMATS:
+        for path in (os.path.join(directory, name), os.path.join(directory, f"{name}.gz")):
+            if os.path.isfile(path):
+                files.append((name, columns, path))
+                break
+    if not files:
+        raise FileNotFoundError(f"no {', '.join(name for name, _ in CSV_FORMATS)} in {directory}")
+    total = sum(os.path.getsize(path) for _, _, path in files)
+    report = ImportReport()
+    done = 0
+
+    def tick(n: int) -> None:
+        nonlocal done
+        done += n
+        if progress is not None:
+            progress(min(done, total), total)
+
+    cur = conn.cursor()
+    try:
+        if not conn.in_transaction:
+            cur.execute("BEGIN")
+        for sql in _STAGING.strip().split(";\n"):
+            cur.execute(sql)
+        with ExitStack() as stack:
+            bulk_at = max(BULK_MIN_ROWS, _rows_in(cur))
+            written = 0
+
+            def on_batch(n: int) -> None:
+                nonlocal written
+                if written < bulk_at <= written + n:
+                    stack.enter_context(bulk_writes(conn))
+                written += n
+
+            for n, (name, columns, path) in enumerate(files):
+                report.imported[name] = _import_file(cur, n, name, columns, path, report, tick, on_batch)
+            _link(cur, [name for name, _, _ in files], report)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cur.execute("DROP TABLE IF EXISTS temp.import_registrations")
+        cur.execute("DROP TABLE IF EXISTS temp.import_teaches")
+    if progress is not None:
+        progress(total, total)
+    return report
+
+def _rows_in(cur) -> int:
+    # max(rowid) is an index lookup, where COUNT(*) reads the whole table;
+    # deleted rows make it an overestimate
+    return sum(cur.execute(f"SELECT coalesce(max(rowid), 0) FROM {table}").fetchone()[0]
+               for table in ("students", "instructors", "courses", "registrations"))
+
+def _import_file(cur, file_no, name, columns, path, report, tick, on_batch) -> int:
+    validate = _VALIDATORS[name]
+    with open(path, "rb") as binary:
+        f = io.TextIOWrapper(gzip.GzipFile(fileobj=binary) if path.endswith(".gz") else binary,
+                             encoding="utf-8", newline="")
+        read = 0
+
+        def advance():
+            # progress is in bytes of the file on disk, compressed or not
+            nonlocal read
+            tick(binary.tell() - read)
+            read = binary.tell()
+
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader, [])]
+        missing = [c for c in columns[:-1] if c not in header]
+        if missing:
+            report.error(name, 1, f"missing column(s): {', '.join(missing)}")
+            advance()
+            return 0
+        # absent optional column -> index past the end of every row -> ""
+        picks = [header.index(c) if c in header else len(header) + 1 for c in columns]
+
+        written = 0
+        while True:
+            rows, registrations, teaches = [], [], []
+            for raw in reader:
+                line = reader.line_num
+                if not raw:
+                    continue
+                try:
+                    row, row_regs, row_teaches = validate([raw[k] if k < len(raw) else "" for k in picks])
+                except ValueError as e:
+                    report.error(name, line, str(e))
+                    continue
+                rows.append(row)
+                registrations.extend(link + (file_no, line) for link in row_regs)
+                teaches.extend(link + (file_no, line) for link in row_teaches)
+                if len(rows) == BATCH_SIZE:
+                    break
+            if not rows:
+                break
+            on_batch(len(rows) + len(registrations) + len(teaches))
+            cur.executemany(_UPSERTS[name], rows)
+            cur.executemany("INSERT INTO temp.import_registrations VALUES(?,?,?,?)", registrations)
+            cur.executemany("INSERT INTO temp.import_teaches VALUES(?,?,?,?,?)", teaches)
+            written += len(rows)
+            advance()
+        advance()
+    return written
+
+_STUDENT_FOUND = "EXISTS (SELECT 1 FROM students s WHERE s.student_id = l.student_id)"
+_INSTRUCTOR_FOUND = "EXISTS (SELECT 1 FROM instructors i WHERE i.instructor_id = l.instructor_id)"
+_COURSE_FOUND = "EXISTS (SELECT 1 FROM courses c WHERE c.course_id = l.course_id)"
+
+def _link(cur, names: List[str], report: ImportReport) -> None:
+    dangling = cur.execute(
+        f"SELECT * FROM (SELECT l.file, l.line, 'student', l.student_id, {_STUDENT_FOUND} AS has_person, "
+        f"l.course_id, {_COURSE_FOUND} AS has_course FROM temp.import_registrations l "
+        f"UNION ALL SELECT l.file, l.line, 'instructor', l.instructor_id, {_INSTRUCTOR_FOUND}, "
+        f"l.course_id, {_COURSE_FOUND} FROM temp.import_teaches l) "
+        "WHERE NOT (has_person AND has_course) ORDER BY 1, 2").fetchall()
+    for file_no, line, person, person_id, has_person, course_id, has_course in dangling:
+        unknown = [f"{person} {person_id!r}"] * (not has_person) + [f"course {course_id!r}"] * (not has_course)
+        report.error(names[file_no], line, f"unknown {' and '.join(unknown)}")
+
+    cur.execute(
+        "INSERT OR IGNORE INTO registrations(student_id, course_id) "
+        f"SELECT l.student_id, l.course_id FROM temp.import_registrations l "
+        f"WHERE {_STUDENT_FOUND} AND {_COURSE_FOUND} ORDER BY l.student_id, l.course_id")
+    report.links += max(cur.rowcount, 0)
+
+    cur.execute("CREATE INDEX temp.import_teaches_course ON import_teaches(course_id)")
+    teachers = f"FROM temp.import_teaches l WHERE {_INSTRUCTOR_FOUND}"
+    cur.execute(
+        f"UPDATE courses SET instructor_id = (SELECT l.instructor_id {teachers} "
+        "AND l.course_id = courses.course_id ORDER BY l.priority, l.rowid LIMIT 1) "
+        f"WHERE course_id IN (SELECT l.course_id {teachers})")
+    report.links += max(cur.rowcount, 0)
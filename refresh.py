@@ -0,0 +1,79 @@
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from classes import Student, Instructor, Course
+from registry import SchoolRegistry
+
+# A widget watches the topics it shows: "students", "instructors" and
+# "courses" change when a record is added, removed or edited; the
+# "<kind> updated" topics only on edits (for widgets that show a related
+# record's name); "registrations" and "assignments" change with the links.
+KINDS = ((Student, "students"), (Instructor, "instructors"), (Course, "courses"))
+TOPICS = frozenset(["students", "instructors", "courses", "students updated", "instructors updated",
+                    "courses updated", "registrations", "assignments"])
+MAX_CHANGES = 1000
+
+def change_topics(event: str, *records) -> FrozenSet[str]:
+    """The topics a SchoolRegistry event touches."""
+    if event == "reset":
+        return TOPICS
+    if event in ("enrolled", "unenrolled"):
+        return frozenset(["registrations"])
+    if event in ("assigned", "unassigned"):
+        return frozenset(["assignments"])
+    kind = next(name for cls, name in KINDS if isinstance(records[0], cls))
+    return frozenset([kind, f"{kind} updated"]) if event == "updated" else frozenset([kind])
+
+
+class RefreshScheduler:
+    """Calls each widget's refresh once per event-loop tick after changes it shows.
+
+    Widgets watch() the topics they display with a refresh(changes)
+    callback. Registry events are queued per widget, and the first one
+    asks `call_soon` (Tk's after_idle, or QTimer.singleShot(0, ...) in Qt)
+    to flush() once the loop is idle, so a burst of changes, such as
+    deleting a course with 500 students, repaints each widget once.
+    `changes` lists the (event, *records) tuples in order, or is None
+    after a reset or more than MAX_CHANGES, when the widget should
+    rebuild from the registry.
+    """
+
+    def __init__(self, registry: SchoolRegistry, call_soon: Callable[[Callable], None]):
+        self.call_soon = call_soon
+        self._watchers: List[Tuple[FrozenSet[str], Callable]] = []
+        self._due: Dict[Callable, Optional[list]] = {}
+        registry.subscribe(self._on_change)
+
+    def watch(self, refresh: Callable[[Optional[list]], None], *topics: str) -> None:
+        unknown = set(topics) - TOPICS
+        if unknown:
+            raise ValueError(f"unknown topics: {', '.join(sorted(unknown))}")
+        self._watchers.append((frozenset(topics), refresh))
+
+    def _on_change(self, event: str, *records) -> None:
+        touched = change_topics(event, *records)
+        for topics, refresh in self._watchers:
+            if not topics & touched:
+                continue
+            if not self._due:
+                self.call_soon(self.flush)
+            if refresh in self._due:
+                changes = self._due[refresh]
+                if changes is not None:
+                    if event == "reset" or len(changes) >= MAX_CHANGES:
+                        self._due[refresh] = None
+                    else:
+                        changes.append((event, *records))
+            else:
+                self._due[refresh] = None if event == "reset" else [(event, *records)]
+
+    def flush(self) -> None:
+        """Runs the queued refreshes now (a no-op if none are queued)."""
+        due, self._due = self._due, {}
+        for refresh, changes in due.items():
+            refresh(changes)
+
+    def refresh_all(self) -> None:
+        """Rebuilds every watching widget now, e.g. to fill them at start-up."""
+        self._due = {}
+        for _, refresh in self._watchers:
+            refresh(None)
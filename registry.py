@@ -0,0 +1,318 @@
+from __future__ import annotations
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from classes import Student, Instructor, Course
+
+PREFIX_LEN = 3
+
+def _prefixes(name: str):
+    key = name.lower()
+    return [key[:n] for n in range(1, min(len(key), PREFIX_LEN) + 1)]
+
+
+class _PersonIndex:
+    """Hash indexes over one kind of person: id, email and name prefix."""
+
+    def __init__(self, id_attr: str):
+        self.id_attr = id_attr
+        self.by_id: Dict[str, object] = {}
+        self.by_email: Dict[str, Set[str]] = {}
+        self.by_prefix: Dict[str, Set[str]] = {}
+
+    def add(self, p) -> None:
+        pid = getattr(p, self.id_attr)
+        self.by_id[pid] = p
+        self._index(pid, p.name, p.email)
+
+    def discard(self, p) -> None:
+        pid = getattr(p, self.id_attr)
+        if self.by_id.get(pid) is not p:
+            return
+        del self.by_id[pid]
+        self._unindex(pid, p.name, p.email)
+
+    def reindex(self, p, old_name: str, old_email: str) -> None:
+        pid = getattr(p, self.id_attr)
+        self._unindex(pid, old_name, old_email)
+        self._index(pid, p.name, p.email)
+
+    def _index(self, pid, name, email):
+        self.by_email.setdefault(email.lower(), set()).add(pid)
+        for pre in _prefixes(name):
+            self.by_prefix.setdefault(pre, set()).add(pid)
+
+    def _unindex(self, pid, name, email):
+        ids = self.by_email.get(email.lower())
+        if ids is not None:
+            ids.discard(pid)
+            if not ids:
+                del self.by_email[email.lower()]
+        for pre in _prefixes(name):
+            ids = self.by_prefix.get(pre)
+            if ids is not None:
+                ids.discard(pid)
+                if not ids:
+                    del self.by_prefix[pre]
+
+    def find_email(self, email: str) -> list:
+        return [self.by_id[pid] for pid in self.by_email.get(email.strip().lower(), ())]
+
+    def find_prefix(self, prefix: str) -> list:
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return list(self.by_id.values())
+        ids = self.by_prefix.get(prefix[:PREFIX_LEN], ())
+        hits = [self.by_id[pid] for pid in ids]
+        if len(prefix) > PREFIX_LEN:
+            hits = [p for p in hits if p.name.lower().startswith(prefix)]
+        return hits
+
+    def clear(self) -> None:
+        self.by_id.clear()
+        self.by_email.clear()
+        self.by_prefix.clear()
+
+
+class SchoolRegistry:
+    """In-memory store of students, instructors and courses.
+
+    Every record is reachable by id in O(1); people are also indexed by
+    email and by name prefix. All changes to the school (adding, editing,
+    deleting, registering, assigning) go through the methods below so the
+    indexes and the two-way relations stay consistent.
+
+    ``removed`` collects the ids deleted since the last database sync;
+    db.save_all() consumes it to issue the matching DELETEs.
+
+    Listeners registered with subscribe() are called after each change as
+    ``listener(event, *records)`` with one of:
+    ("added", rec), ("updated", rec), ("removed", rec),
+    ("enrolled", student, course), ("unenrolled", student, course),
+    ("assigned", instructor, course), ("unassigned", instructor, course),
+    ("reset",) after replace().
+    """
+
+    def __init__(self):
+        self._students = _PersonIndex("student_id")
+        self._instructors = _PersonIndex("instructor_id")
+        self._courses: Dict[str, Course] = {}
+        self._course_prefix: Dict[str, Set[str]] = {}
+        self.removed: Dict[str, Set[str]] = {"students": set(), "instructors": set(), "courses": set()}
+        self._listeners: List[Callable] = []
+
+    # ---- change notification -----------------------------------------
+    def subscribe(self, listener: Callable) -> None:
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _emit(self, event: str, *records) -> None:
+        for listener in list(self._listeners):
+            listener(event, *records)
+
+    # ---- read access -------------------------------------------------
+    @property
+    def students(self):
+        return self._students.by_id.values()
+
+    @property
+    def instructors(self):
+        return self._instructors.by_id.values()
+
+    @property
+    def courses(self):
+        return self._courses.values()
+
+    def get_student(self, student_id: str) -> Optional[Student]:
+        return self._students.by_id.get(student_id)
+
+    def get_instructor(self, instructor_id: str) -> Optional[Instructor]:
+        return self._instructors.by_id.get(instructor_id)
+
+    def get_course(self, course_id: str) -> Optional[Course]:
+        return self._courses.get(course_id)
+
+    def students_by_email(self, email: str) -> list:
+        return self._students.find_email(email)
+
+    def instructors_by_email(self, email: str) -> list:
+        return self._instructors.find_email(email)
+
+    def students_by_name(self, prefix: str) -> list:
+        return self._students.find_prefix(prefix)
+
+    def instructors_by_name(self, prefix: str) -> list:
+        return self._instructors.find_prefix(prefix)
+
+    def courses_by_name(self, prefix: str) -> list:
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return list(self._courses.values())
+        ids = self._course_prefix.get(prefix[:PREFIX_LEN], ())
+        hits = [self._courses[cid] for cid in ids]
+        if len(prefix) > PREFIX_LEN:
+            hits = [c for c in hits if c.course_name.lower().startswith(prefix)]
+        return hits
+
+    def __len__(self) -> int:
+        return len(self._students.by_id) + len(self._instructors.by_id) + len(self._courses)
+
+    # ---- adding ------------------------------------------------------
+    def add_student(self, s: Student) -> Student:
+        if s.student_id in self._students.by_id:
+            raise ValueError(f"student_id {s.student_id} already exists")
+        self._students.add(s)
+        self.removed["students"].discard(s.student_id)
+        self._emit("added", s)
+        return s
+
+    def add_instructor(self, i: Instructor) -> Instructor:
+        if i.instructor_id in self._instructors.by_id:
+            raise ValueError(f"instructor_id {i.instructor_id} already exists")
+        self._instructors.add(i)
+        self.removed["instructors"].discard(i.instructor_id)
+        self._emit("added", i)
+        return i
+
+    def add_course(self, c: Course) -> Course:
+        if c.course_id in self._courses:
+            raise ValueError(f"course_id {c.course_id} already exists")
+        self._courses[c.course_id] = c
+        self._index_course(c.course_id, c.course_name)
+        self.removed["courses"].discard(c.course_id)
+        self._emit("added", c)
+        return c
+
+    def _index_course(self, cid, name):
+        for pre in _prefixes(name):
+            self._course_prefix.setdefault(pre, set()).add(cid)
+
+    def _unindex_course(self, cid, name):
+        for pre in _prefixes(name):
+            ids = self._course_prefix.get(pre)
+            if ids is not None:
+                ids.discard(cid)
+                if not ids:
+                    del self._course_prefix[pre]
+
+    # ---- editing -----------------------------------------------------
+    def update_student(self, s: Student, name: str, age: int, email: str) -> None:
+        old_name, old_email = s.name, s.email
+        try:
+            s.name = name
+            s.age = age
+            s.email = email
+        finally:
+            self._students.reindex(s, old_name, old_email)
+            self._emit("updated", s)
+
+    def update_instructor(self, i: Instructor, name: str, age: int, email: str) -> None:
+        old_name, old_email = i.name, i.email
+        try:
+            i.name = name
+            i.age = age
+            i.email = email
+        finally:
+            self._instructors.reindex(i, old_name, old_email)
+            self._emit("updated", i)
+
+    def update_course(self, c: Course, course_name: str) -> None:
+        old_name = c.course_name
+        c.course_name = course_name
+        if c.course_name != old_name:
+            self._unindex_course(c.course_id, old_name)
+            self._index_course(c.course_id, c.course_name)
+        self._emit("updated", c)
+
+    def register(self, s: Student, c: Course) -> str:
+        already = c in s.registered_courses
+        msg = s.register(c)
+        if not already:
+            self._emit("enrolled", s, c)
+        return msg
+
+    def unregister(self, s: Student, c: Course) -> None:
+        if c in s.registered_courses or s in c.enrolled_students:
+            s.unregister(c)
+            self._emit("unenrolled", s, c)
+
+    def assign(self, i: Instructor, c: Course) -> str:
+        already = c in i.assigned_courses and c.instructor is i
+        msg = i.assign_course(c)
+        if not already:
+            self._emit("assigned", i, c)
+        return msg
+
+    def unassign(self, i: Instructor, c: Course) -> None:
+        if c in i.assigned_courses or c.instructor is i:
+            i.unassign_course(c)
+            self._emit("unassigned", i, c)
+
+    # ---- deleting ----------------------------------------------------
+    def remove_student(self, s: Student) -> None:
+        for c in list(s.registered_courses):
+            self.unregister(s, c)
+        if self._students.by_id.get(s.student_id) is s:
+            self._students.discard(s)
+            self.removed["students"].add(s.student_id)
+            self._emit("removed", s)
+
+    def remove_instructor(self, i: Instructor) -> None:
+        for c in list(i.assigned_courses):
+            self.unassign(i, c)
+        if self._instructors.by_id.get(i.instructor_id) is i:
+            self._instructors.discard(i)
+            self.removed["instructors"].add(i.instructor_id)
+            self._emit("removed", i)
+
+    def remove_course(self, c: Course) -> None:
+        for s in list(c.enrolled_students):
+            self.unregister(s, c)
+        if c.instructor:
+            self.unassign(c.instructor, c)
+        if self._courses.get(c.course_id) is c:
+            del self._courses[c.course_id]
+            self._unindex_course(c.course_id, c.course_name)
+            self.removed["courses"].add(c.course_id)
+            self._emit("removed", c)
+
+    # ---- bulk --------------------------------------------------------
+    def clear(self) -> None:
+        self._students.clear()
+        self._instructors.clear()
+        self._courses.clear()
+        self._course_prefix.clear()
+
+    def replace(self, students: Iterable[Student],
+                instructors: Iterable[Instructor],
+                courses: Iterable[Course],
+                synced: bool = False) -> None:
+        """Drops the current contents and loads the given records (e.g. after a load).
+
+        With ``synced=True`` the records are known to match the database
+        (they were just read from it) and the pending deletions are dropped;
+        otherwise every record that disappears is queued for deletion.
+        """
+        old = {"students": set(self._students.by_id),
+               "instructors": set(self._instructors.by_id),
+               "courses": set(self._courses)}
+        self.clear()
+        for s in students:
+            self._students.add(s)
+        for i in instructors:
+            self._instructors.add(i)
+        for c in courses:
+            self._courses[c.course_id] = c
+            self._index_course(c.course_id, c.course_name)
+        if synced:
+            for ids in self.removed.values():
+                ids.clear()
+        else:
+            for kind, current in (("students", self._students.by_id),
+                                  ("instructors", self._instructors.by_id),
+                                  ("courses", self._courses)):
+                self.removed[kind].update(old[kind].difference(current))
+                self.removed[kind].difference_update(current)
+        self._emit("reset")
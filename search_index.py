@@ -0,0 +1,360 @@
+from __future__ import annotations
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from classes import Student, Instructor, Course
+from registry import SchoolRegistry
+
+GRAM = 3
+
+def student_row(s: Student) -> tuple:
+    return (s.student_id, s.name, s.age, s.email,
+            ", ".join(f"{c.course_name} {c.course_id}" for c in s.registered_courses))
+
+def instructor_row(i: Instructor) -> tuple:
+    return (i.instructor_id, i.name, i.age, i.email,
+            ", ".join(f"{c.course_name} {c.course_id}" for c in i.assigned_courses))
+
+def course_row(c: Course) -> tuple:
+    return (c.course_id, c.course_name,
+            c.instructor.name if c.instructor else "",
+            ", ".join(f"{s.student_id}-{s.name}" for s in c.enrolled_students))
+
+def _grams(text: str) -> Set[str]:
+    return {text[k:k + GRAM] for k in range(len(text) - GRAM + 1)}
+
+def _add_grams(index: Dict[str, Set[str]], key: str, text: str) -> None:
+    for g in _grams(text):
+        keys = index.get(g)
+        if keys is None:
+            index[g] = {key}
+        else:
+            keys.add(key)
+
+
+class SearchIndex:
+    """Display rows of one table, with a trigram index per column.
+
+    Each row is stored with its column values lowercased once. A substring
+    query of GRAM or more characters is answered by intersecting the key
+    sets of its trigrams and then checking only those candidates. Shorter
+    queries fall back to a scan of the pre-lowered values.
+
+    A column's trigram index is built the first time that column is
+    searched, and kept up to date from then on, so loading a large
+    school does not pay for columns nobody filters on.
+
+    touch() queues a record to be re-rendered with `row_fn`; queued rows are
+    rebuilt on the next read, so a burst of changes to one record (e.g. a
+    course gaining 5,000 students) re-renders it once.
+
+    Every row that actually changes gets a new version from a counter
+    shared by the index; `stamp` is the latest one. A view that remembers
+    the stamp it last drew at only has to redraw the rows with a higher
+    version(), and changed_since() lists those without a scan.
+    """
+
+    def __init__(self, n_columns: int, row_fn: Optional[Callable] = None):
+        self.row_fn = row_fn
+        self._pending: Dict[str, object] = {}
+        self._rows: Dict[str, tuple] = {}
+        self._lower: Dict[str, Tuple[str, ...]] = {}
+        self._seq: Dict[str, int] = {}
+        self._next_seq = 0
+        # key -> version, oldest first; discarded keys stay as tombstones
+        # until clear() so changed_since() can report them
+        self._versions: Dict[str, int] = {}
+        self._stamp = 0
+        self._cleared = 0
+        self._grams: List[Optional[Dict[str, Set[str]]]] = [None] * n_columns
+
+    def __len__(self) -> int:
+        self.flush()
+        return len(self._rows)
+
+    def __contains__(self, key) -> bool:
+        self.flush()
+        return key in self._rows
+
+    def keys(self) -> List[str]:
+        self.flush()
+        return list(self._rows)
+
+    def row(self, key: str) -> tuple:
+        self.flush()
+        return self._rows[key]
+
+    def version(self, key: str) -> int:
+        self.flush()
+        return self._versions[key]
+
+    def seq(self, key: str) -> int:
+        """Position of `key` in insertion order, the order search() returns."""
+        self.flush()
+        return self._seq[key]
+
+    def changed_since(self, stamp: int) -> Optional[List[str]]:
+        """Keys put or discarded after `stamp`, oldest first; None if the
+        index was cleared since, as the cleared keys are not known."""
+        self.flush()
+        if stamp < self._cleared:
+            return None
+        keys = []
+        for key, version in reversed(self._versions.items()):
+            if version <= stamp:
+                break
+            keys.append(key)
+        keys.reverse()
+        return keys
+
+    @property
+    def stamp(self) -> int:
+        self.flush()
+        return self._stamp
+
+    def touch(self, key: str, record) -> None:
+        self._pending[key] = record
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        for key, record in pending.items():
+            self.put(key, self.row_fn(record))
+
+    def put(self, key: str, row: Sequence) -> None:
+        row = tuple(row)
+        if self._rows.get(key) == row:
+            return
+        self._stamp += 1
+        self._versions.pop(key, None)
+        self._versions[key] = self._stamp
+        lowered = tuple("" if v is None else str(v).lower() for v in row)
+        old = self._lower.get(key)
+        if old == lowered:
+            self._rows[key] = row
+            return
+        if old is not None:
+            self._unindex(key, old)
+        else:
+            self._seq[key] = self._next_seq
+            self._next_seq += 1
+        self._rows[key] = row
+        self._lower[key] = lowered
+        for col, text in enumerate(lowered):
+            if self._grams[col] is not None:
+                _add_grams(self._grams[col], key, text)
+
+    def discard(self, key: str) -> None:
+        self._pending.pop(key, None)
+        old = self._lower.pop(key, None)
+        if old is None:
+            return
+        self._unindex(key, old)
+        del self._rows[key]
+        del self._seq[key]
+        self._stamp += 1
+        del self._versions[key]
+        self._versions[key] = self._stamp
+
+    def _unindex(self, key, lowered):
+        for col, text in enumerate(lowered):
+            index = self._grams[col]
+            if index is None:
+                continue
+            for g in _grams(text):
+                keys = index.get(g)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del index[g]
+
+    def clear(self) -> None:
+        self._pending.clear()
+        self._rows.clear()
+        self._lower.clear()
+        self._seq.clear()
+        self._versions.clear()
+        self._stamp += 1
+        self._cleared = self._stamp
+        self._grams = [None] * len(self._grams)
+
+    def _column_index(self, col: int) -> Dict[str, Set[str]]:
+        index = self._grams[col]
+        if index is None:
+            index = self._grams[col] = {}
+            for key, lowered in self._lower.items():
+                _add_grams(index, key, lowered[col])
+        return index
+
+    def matches(self, key: str, queries: Sequence[str]) -> bool:
+        """True if every non-empty (already lowercased) query is in its column."""
+        self.flush()
+        lowered = self._lower[key]
+        for q, text in zip(queries, lowered):
+            if q and q not in text:
+                return False
+        return True
+
+    def search(self, queries: Sequence[str]) -> List[str]:
+        """Keys whose columns contain the per-column queries, in insertion order."""
+        self.flush()
+        queries = [q.strip().lower() for q in queries]
+        candidates: Optional[Set[str]] = None
+        for col, q in enumerate(queries):
+            if len(q) < GRAM:
+                continue
+            index = self._column_index(col)
+            sets = sorted((index.get(g, ()) for g in _grams(q)), key=len)
+            if not sets or not sets[0]:
+                return []
+            hits = set(sets[0])
+            for other in sets[1:]:
+                hits &= other
+                if not hits:
+                    return []
+            candidates = hits if candidates is None else candidates & hits
+            if not candidates:
+                return []
+        if candidates is None:
+            if not any(queries):
+                return list(self._rows)
+            return [k for k in self._rows if self.matches(k, queries)]
+        found = [k for k in candidates if self.matches(k, queries)]
+        found.sort(key=self._seq.__getitem__)
+        return found
+
+
+
+class LazyIndex:
+    """Display rows of a db.LazyRecords, for a table to show before a full load.
+
+    It has the search()/row() interface of SearchIndex. Unfiltered, the
+    keys are read off the records by position, so a view builds only the
+    pages it shows. Filters and sorting are handed to `query`, a
+    db.RecordsQuery over the same table, so they never walk the table
+    either. A course's row names every enrolled student, so courses are
+    shown with the query's own rows instead of building whole rosters.
+    Rows are built once and never change, so every version() and `stamp`
+    are 0.
+    """
+    stamp = 0
+
+    def __init__(self, records, row_fn: Callable, query):
+        self.records = records
+        self.row_fn = row_fn
+        self.query = query
+        self._rows: Dict[str, tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def version(self, key: str) -> int:
+        return 0
+
+    def changed_since(self, stamp: int) -> Optional[List[str]]:
+        return []
+
+    def row(self, key: str) -> tuple:
+        row = self._rows.get(key)
+        if row is None:
+            if self.records.kind == "courses":
+                row = self.query.row(key)
+            else:
+                rec = self.records.get(key)
+                if rec is None:
+                    raise KeyError(key)
+                row = tuple(self.row_fn(rec))
+            self._rows[key] = row
+        return row
+
+    def search(self, queries: Sequence[str]):
+        if any(q.strip() for q in queries):
+            return self.query.search(queries)
+        return _LazyKeys(self.records, self.query)
+
+
+class _LazyKeys(Sequence):
+    """Ids of every record of a LazyRecords, in id order, read by position."""
+
+    def __init__(self, records, query):
+        self.records = records
+        self.query = query
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        return getattr(self.records[i], self.records.id_attr)
+
+    def ordered(self, column: int, descending: bool = False):
+        return self.query.search(()).ordered(column, descending)
+
+class SchoolSearch:
+    """Keeps a SearchIndex per table in step with a SchoolRegistry.
+
+    Subscribes to the registry's change events and re-renders only the
+    rows an event touches: for example, renaming a course updates that
+    course and the rows of its students and instructor.
+    """
+
+    def __init__(self, registry: SchoolRegistry):
+        self.registry = registry
+        self.students = SearchIndex(5, student_row)
+        self.instructors = SearchIndex(5, instructor_row)
+        self.courses = SearchIndex(4, course_row)
+        self.rebuild()
+        registry.subscribe(self._on_change)
+
+    def rebuild(self) -> None:
+        for index in (self.students, self.instructors, self.courses):
+            index.clear()
+        for s in self.registry.students:
+            self.students.touch(s.student_id, s)
+        for i in self.registry.instructors:
+            self.instructors.touch(i.instructor_id, i)
+        for c in self.registry.courses:
+            self.courses.touch(c.course_id, c)
+
+    def _put(self, rec) -> None:
+        if isinstance(rec, Student):
+            if self.registry.get_student(rec.student_id) is rec:
+                self.students.touch(rec.student_id, rec)
+        elif isinstance(rec, Instructor):
+            if self.registry.get_instructor(rec.instructor_id) is rec:
+                self.instructors.touch(rec.instructor_id, rec)
+        elif isinstance(rec, Course):
+            if self.registry.get_course(rec.course_id) is rec:
+                self.courses.touch(rec.course_id, rec)
+
+    def _on_change(self, event: str, *records) -> None:
+        if event == "reset":
+            self.rebuild()
+            return
+        if event == "removed":
+            rec = records[0]
+            if isinstance(rec, Student):
+                self.students.discard(rec.student_id)
+            elif isinstance(rec, Instructor):
+                self.instructors.discard(rec.instructor_id)
+            else:
+                self.courses.discard(rec.course_id)
+            return
+        for rec in records:
+            self._put(rec)
+        if event == "updated":
+            for related in shown_with(records[0]):
+                self._put(related)
+
+
+def shown_with(rec) -> Iterable:
+    """Records whose rows display part of `rec` (its name)."""
+    if isinstance(rec, Student):
+        return list(rec.registered_courses)
+    if isinstance(rec, Instructor):
+        return list(rec.assigned_courses)
+    related = list(rec.enrolled_students)
+    if rec.instructor is not None:
+        related.append(rec.instructor)
+    return related
@@ -0,0 +1,39 @@
+import random
+
+import pytest
+
+from classes import OrderedSet
+
+
+def test_ordered_set_matches_a_list_across_the_small_limit():
+    rng = random.Random(1)
+    s, model = OrderedSet(), []
+    for step in range(2000):
+        item = rng.randrange(OrderedSet.SMALL * 3)
+        r = rng.random()
+        if r < .6:
+            s.add(item)
+            if item not in model:
+                model.append(item)
+        elif r < .9:
+            s.discard(item)
+            if item in model:
+                model.remove(item)
+        elif item in model:
+            s.remove(item)
+            model.remove(item)
+        else:
+            with pytest.raises(ValueError):
+                s.remove(item)
+        if r > .995:
+            s.clear()
+            model.clear()
+        assert s == model and len(s) == len(model), step
+        assert (item in s) == (item in model)
+
+
+def test_ordered_set_is_not_indexable():
+    s = OrderedSet("abc")
+    assert list(s) == ["a", "b", "c"] and s == OrderedSet("abc") and s != OrderedSet("cba")
+    with pytest.raises(TypeError):
+        s[0]
@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+pytest.importorskip("tkinter")
+
+from classes import Course, Student
+from gui_tkinter import course_label, patch_combo, student_label
+from refresh import MAX_CHANGES, RefreshScheduler
+from registry import SchoolRegistry
+
+
+class Combo(dict):
+    """Stands in for a ttk.Combobox: patch_combo only sets cb["values"]."""
+
+
+def test_patched_values_match_a_rebuild():
+    rng = random.Random(5)
+    reg = SchoolRegistry()
+    queued = []
+    scheduler = RefreshScheduler(reg, queued.append)
+    cb_student, cb_course = Combo(), Combo()
+    students, courses = [], []
+    batches = []
+
+    def refresh_students(changes):
+        batches.append(changes)
+        patch_combo(cb_student, students, changes, student_label, reg.students)
+
+    scheduler.watch(refresh_students, "students")
+    scheduler.watch(lambda changes: patch_combo(cb_course, courses, changes, course_label, reg.courses),
+                    "courses")
+    scheduler.refresh_all()
+    for k in range(30):
+        reg.add_course(Course(f"C{k}", f"Course {k}"))
+    n = 0
+    for step in range(200):
+        for _ in range(rng.choice([1, 3, 10])):
+            r, people = rng.random(), list(reg.students)
+            if r < .4 or not people:
+                n += 1
+                reg.add_student(Student(f"Student {n}", 20, f"s{n}@school.edu", f"S{n}"))
+            elif r < .6:
+                s = rng.choice(people)
+                reg.update_student(s, f"Renamed {rng.randrange(999)}", s.age, s.email)
+            elif r < .75:
+                reg.remove_student(rng.choice(people))
+            elif r < .85:
+                # gone and back under the same id within one batch
+                s = rng.choice(people)
+                reg.remove_student(s)
+                reg.add_student(Student("Back", 20, s.email, s.student_id))
+            elif r < .95:
+                reg.register(rng.choice(people), rng.choice(list(reg.courses)))
+            else:
+                c = rng.choice(list(reg.courses))
+                reg.update_course(c, f"Course {rng.randrange(999)}")
+        for flush in queued:
+            flush()
+        queued.clear()
+        assert cb_student["values"] == [student_label(s) for s in reg.students], step
+        assert cb_course["values"] == [course_label(c) for c in reg.courses], step
+    assert batches[0] is None and all(b is not None for b in batches[1:])
+
+
+def test_large_batch_refills():
+    reg = SchoolRegistry()
+    queued = []
+    scheduler = RefreshScheduler(reg, queued.append)
+    cb, values = Combo(), []
+    scheduler.watch(lambda changes: patch_combo(cb, values, changes, student_label, reg.students), "students")
+    for k in range(MAX_CHANGES + 5):
+        reg.add_student(Student(f"Student {k}", 20, f"s{k}@school.edu", f"S{k}"))
+    queued.pop()()
+    assert cb["values"] == [student_label(s) for s in reg.students]
+
+
+def test_only_changed_records_are_labelled():
+    reg = SchoolRegistry()
+    people = [reg.add_student(Student(f"Student {k}", 20, f"s{k}@school.edu", f"S{k}")) for k in range(100)]
+    labelled = []
+
+    def label(s):
+        labelled.append(s)
+        return student_label(s)
+    cb, values = Combo(), []
+    patch_combo(cb, values, None, label, reg.students)
+    labelled.clear()
+    reg.update_student(people[7], "Seven", 20, people[7].email)
+    reg.remove_student(people[8])
+    patch_combo(cb, values, [("updated", people[7]), ("removed", people[8])], label, reg.students)
+    assert labelled == [people[7], people[8]]
+    assert cb["values"] == [student_label(s) for s in reg.students]
@@ -0,0 +1,98 @@
+import gc
+import json
+
+import pytest
+
+import datastore
+from classes import Course, Instructor, Student
+from datastore import iter_json_records, load_json, save_json
+
+
+def school(n_students=50):
+    instructors = [Instructor(f"Ïnstructor {k}", 40 + k, f"i{k}@school.edu", f"I{k}") for k in range(3)]
+    courses = [Course(f"C{k}", f"Course \"{k}\"") for k in range(4)]
+    students = [Student(f"Stüdent {k}", 18 + k % 30, f"s{k}@school.edu", f"S{k:03d}") for k in range(n_students)]
+    for k, s in enumerate(students):
+        for c in courses[k % 3:k % 3 + 2]:
+            s.register(c)
+    instructors[0].assign_course(courses[0])
+    instructors[0].assign_course(courses[1])
+    instructors[2].assign_course(courses[2])
+    return students, instructors, courses
+
+
+def shape(students, instructors, courses):
+    return ([s.to_dict() for s in students], [i.to_dict() for i in instructors],
+            [(c.to_dict(), c.instructor and c.instructor.instructor_id,
+              [s.student_id for s in c.enrolled_students]) for c in courses])
+
+
+@pytest.mark.parametrize("chunk", [datastore._CHUNK_SIZE, 7])
+def test_json_round_trip(tmp_path, monkeypatch, chunk):
+    # A tiny read buffer makes records and numbers straddle chunk edges.
+    monkeypatch.setattr(datastore, "_CHUNK_SIZE", chunk)
+    path = str(tmp_path / "school.json")
+    saved = school()
+    save_json(path, *saved)
+    assert shape(*load_json(path)) == shape(*saved)
+
+
+def test_json_file_is_one_plain_document(tmp_path):
+    path = str(tmp_path / "school.json")
+    students, instructors, courses = school(5)
+    save_json(path, students, instructors, courses)
+    with open(path, encoding="utf-8") as f:
+        doc = json.load(f)
+    assert doc == {"students": [s.to_dict() for s in students],
+                   "instructors": [i.to_dict() for i in instructors],
+                   "courses": [c.to_dict() for c in courses]}
+
+
+def test_empty_sections_and_unknown_keys(tmp_path):
+    path = tmp_path / "school.json"
+    save_json(str(path), [], [], [])
+    assert load_json(str(path)) == ([], [], [])
+    path.write_text('{"version": 2, "students": [], "notes": {"a": [1, 2]}, '
+                    '"courses": [{"course_id": "C1", "course_name": "Math"}]}', encoding="utf-8")
+    assert list(iter_json_records(str(path))) == [
+        ("courses", {"course_id": "C1", "course_name": "Math"})]
+
+
+def test_truncated_document_raises(tmp_path):
+    path = tmp_path / "school.json"
+    save_json(str(path), *school(5))
+    path.write_text(path.read_text(encoding="utf-8")[:-40], encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_json(str(path))
+    assert gc.isenabled()
+
+
+def test_progress_and_cancelled_save_keeps_old_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(datastore, "_PROGRESS_EVERY", 10)
+    path = tmp_path / "school.json"
+    calls = []
+    save_json(str(path), *school(), progress=lambda done, total: calls.append((done, total)))
+    assert calls[-1] == (57, 57) and [d for d, _ in calls[:-1]] == [10, 20, 30, 40, 50]
+    before = path.read_bytes()
+
+    def cancel(done, total):
+        raise KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        save_json(str(path), *school(), progress=cancel)
+    assert path.read_bytes() == before
+    assert not (tmp_path / "school.json.part").exists()
+
+
+def test_conflicting_instructor_lists_resolve_to_one_side(tmp_path):
+    path = tmp_path / "school.json"
+    path.write_text(json.dumps({
+        "students": [],
+        "instructors": [
+            {"instructor_id": "I1", "name": "Ted", "age": 40, "email": "t@school.edu", "assigned_course_ids": ["C1"]},
+            {"instructor_id": "I2", "name": "Tia", "age": 41, "email": "tia@school.edu",
+             "assigned_course_ids": ["C1", "C2"]}],
+        "courses": [{"course_id": "C1", "course_name": "Math", "instructor_id": "I1"},
+                    {"course_id": "C2", "course_name": "Art"}]}), encoding="utf-8")
+    _, (ted, tia), (math, art) = load_json(str(path))
+    assert math.instructor is ted and art.instructor is tia
+    assert list(ted.assigned_courses) == [math] and list(tia.assigned_courses) == [art]
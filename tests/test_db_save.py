@@ -0,0 +1,107 @@
+import pytest
+
+from classes import Course, Instructor, Student
+from db import init_db, load_all, save_all
+from registry import SchoolRegistry
+
+TABLES = {"students": "student_id", "instructors": "instructor_id", "courses": "course_id",
+          "registrations": "student_id, course_id"}
+
+
+def dump(conn):
+    return {t: conn.execute(f"SELECT * FROM {t} ORDER BY {key}").fetchall() for t, key in TABLES.items()}
+
+
+def save(conn, reg, full=False):
+    save_all(conn, reg.students, reg.instructors, reg.courses, reg.removed, full=full)
+
+
+def full_save(tmp_path, reg):
+    conn = init_db(str(tmp_path / "full.db"))
+    save_all(conn, reg.students, reg.instructors, reg.courses, full=True)
+    rows = dump(conn)
+    conn.close()
+    (tmp_path / "full.db").unlink()
+    return rows
+
+
+def edits(reg):
+    """Each step changes the registry a little; incremental saves follow each one."""
+    s1, s2, s3 = (reg.get_student(f"S{k}") for k in (1, 2, 3))
+    i1 = reg.get_instructor("I1")
+    c1, c2 = reg.get_course("C1"), reg.get_course("C2")
+    yield "rename", lambda: (reg.update_student(s1, "Renamed", 30, "r@school.edu"),
+                             reg.update_course(c2, "Advanced Art"))
+    yield "register", lambda: (reg.register(s2, c2), reg.unregister(s1, c1))
+    yield "delete student", lambda: reg.remove_student(s3)
+    yield "re-add student", lambda: reg.register(
+        reg.add_student(Student("Back", 22, "back@school.edu", "S3")), c1)
+    yield "delete instructor", lambda: reg.remove_instructor(i1)
+    yield "delete course", lambda: reg.remove_course(c1)
+    yield "re-add course", lambda: reg.register(s2, reg.add_course(Course("C1", "Math II")))
+    yield "assign", lambda: reg.assign(reg.add_instructor(Instructor("New", 50, "n@school.edu", "I1")),
+                                       reg.get_course("C1"))
+
+
+@pytest.fixture
+def reg():
+    reg = SchoolRegistry()
+    i1 = reg.add_instructor(Instructor("Ted", 40, "t1@school.edu", "I1"))
+    reg.add_instructor(Instructor("Tia", 41, "t2@school.edu", "I2"))
+    c1 = reg.add_course(Course("C1", "Math"))
+    c2 = reg.add_course(Course("C2", "Art"))
+    reg.assign(i1, c1)
+    for k in range(1, 6):
+        s = reg.add_student(Student(f"Student {k}", 20 + k, f"s{k}@school.edu", f"S{k}"))
+        reg.register(s, c1 if k % 2 else c2)
+    return reg
+
+
+def test_incremental_saves_match_a_full_save(tmp_path, reg):
+    conn = init_db(str(tmp_path / "school.db"))
+    save(conn, reg)
+    assert dump(conn) == full_save(tmp_path, reg)
+    for step, apply in edits(reg):
+        apply()
+        save(conn, reg)
+        assert dump(conn) == full_save(tmp_path, reg), step
+    assert all(not ids for ids in reg.removed.values())
+    conn.close()
+
+
+def test_clean_records_are_not_rewritten(tmp_path, reg):
+    conn = init_db(str(tmp_path / "school.db"))
+    save(conn, reg)
+    conn.execute("UPDATE students SET name = 'changed behind our back' WHERE student_id = 'S4'")
+    conn.commit()
+    reg.update_student(reg.get_student("S5"), "Five", 25, "s5@school.edu")
+    save(conn, reg)
+    names = dict(conn.execute("SELECT student_id, name FROM students"))
+    assert names["S4"] == "changed behind our back" and names["S5"] == "Five"
+    conn.close()
+
+
+def test_load_all_round_trips_and_starts_clean(tmp_path, reg):
+    conn = init_db(str(tmp_path / "school.db"))
+    save(conn, reg, full=True)
+    loaded = SchoolRegistry()
+    load_all(conn, into=loaded)
+    assert not any(r.is_dirty for r in (*loaded.students, *loaded.instructors, *loaded.courses))
+    save(conn, loaded)
+    assert dump(conn) == full_save(tmp_path, reg)
+    assert {s.student_id: {c.course_id for c in s.registered_courses} for s in loaded.students} == \
+           {s.student_id: {c.course_id for c in s.registered_courses} for s in reg.students}
+    conn.close()
+
+
+def test_load_all_links_both_sides_of_an_assignment(tmp_path, reg):
+    conn = init_db(str(tmp_path / "school.db"))
+    save(conn, reg, full=True)
+    loaded = SchoolRegistry()
+    load_all(conn, into=loaded)
+    ted = loaded.get_instructor("I1")
+    math = loaded.get_course("C1")
+    assert math.instructor is ted and list(ted.assigned_courses) == [math]
+    loaded.remove_instructor(ted)
+    assert math.instructor is None
+    conn.close()
@@ -0,0 +1,61 @@
+import pytest
+
+pytest.importorskip("flask")
+
+import hello
+from db import ConnectionPool
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    pool = ConnectionPool(str(tmp_path / "school.db"), size=2)
+    monkeypatch.setattr(hello, "POOL", pool)
+    with pool.connection() as conn:
+        conn.execute("INSERT INTO instructors(instructor_id, name, age, email) VALUES('I1', 'Ted', 40, 't@x.edu')")
+        conn.execute("INSERT INTO courses(course_id, course_name) VALUES('C1', 'Math')")
+        conn.commit()
+    yield hello.app.test_client()
+    pool.close()
+
+
+@pytest.mark.parametrize("body", ['["I1"]', '"I1"', "7", "null", "not json"])
+def test_assignment_rejects_a_body_that_is_not_an_object(client, body):
+    resp = client.put("/api/courses/C1/instructor", data=body, content_type="application/json")
+    assert resp.status_code == 400
+    assert "JSON object" in resp.get_json()["error"]
+
+
+def test_assignment(client):
+    resp = client.put("/api/courses/C1/instructor", json={"instructor_id": "I9"})
+    assert resp.status_code == 404
+    resp = client.put("/api/courses/C1/instructor", json={})
+    assert resp.status_code == 400 and "instructor_id" in resp.get_json()["error"]
+    resp = client.put("/api/courses/C1/instructor", json={"instructor_id": "I1"})
+    assert resp.status_code == 200 and resp.get_json() == {"course_id": "C1", "instructor_id": "I1"}
+    assert client.get("/api/courses/C1").get_json()["instructor_id"] == "I1"
+    assert client.delete("/api/courses/C1/instructor").status_code == 204
+
+
+def test_own_writes_only_invalidate_what_they_changed(client):
+    import api
+    a, b = hello.POOL.acquire(), hello.POOL.acquire()
+    try:
+        a.executemany("INSERT INTO students(student_id, name, age, email) VALUES(?, 'S', 20, 's@x.edu')",
+                      [(f"S{i}",) for i in range(9)])
+        a.commit()
+        keys = [("students", f"S{i}") for i in range(9)]
+        for _, sid in keys:
+            api.get_record(b, "students", sid)
+        with api.writing(a):
+            a.execute("INSERT INTO registrations(student_id, course_id) VALUES('S0', 'C1')")
+        api.invalidate("students", "S0")
+        assert api.get_record(b, "students", "S0")["course_ids"] == ["C1"]
+        assert all(k in api.RECORD_CACHE for k in keys)
+        # a commit made outside writing() is foreign and clears everything
+        a.execute("UPDATE students SET age = 30 WHERE student_id = 'S1'")
+        a.commit()
+        assert api.get_record(b, "students", "S1")["age"] == 30
+        assert keys[2] not in api.RECORD_CACHE
+    finally:
+        hello.POOL.release(a)
+        hello.POOL.release(b)
@@ -0,0 +1,165 @@
+import gzip
+
+import pytest
+
+import importer
+from classes import Course, Instructor, Student
+from datastore import export_csv
+from db import init_db, search
+from importer import import_csv
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = init_db(str(tmp_path / "school.db"))
+    yield conn
+    conn.close()
+
+
+def write(directory, name, text):
+    (directory / name).write_text(text, encoding="utf-8")
+
+
+def table(conn, sql):
+    return sorted(conn.execute(sql).fetchall())
+
+
+def test_imports_an_export(tmp_path, conn):
+    instructors = [Instructor("Ted", 40, "t@school.edu", "I1"), Instructor("Tia", 41, "tia@school.edu", "I2")]
+    courses = [Course("C1", "Math"), Course("C2", "Art, Modern")]
+    students = [Student(f"Student {k}", 20 + k, f"s{k}@school.edu", f"S{k}") for k in range(4)]
+    instructors[1].assign_course(courses[1])
+    for s in students[:3]:
+        s.register(courses[0])
+    students[0].register(courses[1])
+    export_csv(str(tmp_path), students, instructors, courses)
+
+    report = import_csv(conn, str(tmp_path))
+    assert report.imported == {"instructors.csv": 2, "students.csv": 4, "courses.csv": 2}
+    assert report.errors == [] and report.error_count == 0
+    assert report.links == 5
+    assert table(conn, "SELECT * FROM students") == [(f"S{k}", f"Student {k}", 20 + k, f"s{k}@school.edu")
+                                                     for k in range(4)]
+    assert table(conn, "SELECT course_id, course_name, instructor_id FROM courses") == [
+        ("C1", "Math", None), ("C2", "Art, Modern", "I2")]
+    assert table(conn, "SELECT * FROM registrations") == [("S0", "C1"), ("S0", "C2"), ("S1", "C1"), ("S2", "C1")]
+
+
+def test_reports_rejected_rows_and_dangling_links(tmp_path, conn):
+    write(tmp_path, "students.csv",
+          "student_id,name,age,email,registered_course_ids\n"
+          "S1,Ann,20,ann@school.edu,C1;C9\n"
+          "S2,Bob,old,bob@school.edu,\n"
+          "\n"
+          "S3,Cy,21,not-an-email,C1\n"
+          ",Dee,22,dee@school.edu,\n"
+          "S5,Eve,23,eve@school.edu\n")
+    write(tmp_path, "courses.csv",
+          "course_id,course_name,instructor_id,enrolled_student_ids\n"
+          "C1,Math,I7,S5;S404\n")
+    report = import_csv(conn, str(tmp_path))
+
+    assert report.imported == {"students.csv": 2, "courses.csv": 1}
+    assert [(name, line) for name, line, _ in report.errors] == [
+        ("students.csv", 3), ("students.csv", 5), ("students.csv", 6),
+        ("students.csv", 2), ("courses.csv", 2), ("courses.csv", 2)]
+    assert report.error_count == 6
+    messages = [message for _, _, message in report.errors]
+    assert "age" in messages[0] and "email" in messages[1].lower() and "student_id" in messages[2]
+    assert messages[3] == "unknown course 'C9'"
+    assert sorted(messages[4:]) == ["unknown instructor 'I7'", "unknown student 'S404'"]
+    assert table(conn, "SELECT student_id FROM students") == [("S1",), ("S5",)]
+    assert table(conn, "SELECT * FROM registrations") == [("S1", "C1"), ("S5", "C1")]
+    assert table(conn, "SELECT instructor_id FROM courses") == [(None,)]
+
+
+def test_missing_columns_skip_the_file(tmp_path, conn):
+    write(tmp_path, "students.csv", "student_id,name,email\nS1,Ann,ann@school.edu\n")
+    write(tmp_path, "courses.csv", "course_id,course_name,instructor_id\nC1,Math,\n")
+    report = import_csv(conn, str(tmp_path))
+    assert report.imported == {"students.csv": 0, "courses.csv": 1}
+    assert report.errors == [("students.csv", 1, "missing column(s): age")]
+
+
+def test_error_list_is_capped(tmp_path, conn, monkeypatch):
+    monkeypatch.setattr(importer, "MAX_ERRORS", 3)
+    write(tmp_path, "students.csv", "student_id,name,age,email\n" +
+          "".join(f"S{k},N,-1,s{k}@school.edu\n" for k in range(10)))
+    report = import_csv(conn, str(tmp_path))
+    assert report.error_count == 10 and [line for _, line, _ in report.errors] == [2, 3, 4]
+
+
+def test_gzipped_files_and_batches(tmp_path, conn, monkeypatch):
+    monkeypatch.setattr(importer, "BATCH_SIZE", 7)
+    with gzip.open(tmp_path / "students.csv.gz", "wt", encoding="utf-8", newline="") as f:
+        f.write("student_id,name,age,email,registered_course_ids\n")
+        f.writelines(f"S{k:03d},Student {k},{18 + k % 9},s{k}@school.edu,C1\n" for k in range(50))
+    write(tmp_path, "courses.csv", "course_id,course_name,instructor_id\nC1,Math,\n")
+    calls = []
+    report = import_csv(conn, str(tmp_path), progress=lambda done, total: calls.append((done, total)))
+    assert report.imported == {"students.csv": 50, "courses.csv": 1} and report.links == 50
+    total = calls[-1][1]
+    assert calls[-1] == (total, total) and [d for d, _ in calls] == sorted(d for d, _ in calls)
+
+
+def test_cancel_rolls_back(tmp_path, conn):
+    write(tmp_path, "students.csv", "student_id,name,age,email\nS1,Ann,20,ann@school.edu\n")
+    write(tmp_path, "courses.csv", "course_id,course_name,instructor_id\nC1,Math,\n")
+
+    def cancel(done, total):
+        if done == total:
+            raise KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        import_csv(conn, str(tmp_path), progress=cancel)
+    assert table(conn, "SELECT * FROM students") == []
+    assert import_csv(conn, str(tmp_path)).imported == {"students.csv": 1, "courses.csv": 1}
+
+
+def test_no_files(tmp_path, conn):
+    with pytest.raises(FileNotFoundError):
+        import_csv(conn, str(tmp_path))
+
+
+def roster(directory, n, prefix="S"):
+    write(directory, "students.csv", "student_id,name,age,email,registered_course_ids\n" +
+          "".join(f"{prefix}{k},Student {k},20,{prefix.lower()}{k}@school.edu,C1\n" for k in range(n)))
+    write(directory, "courses.csv", "course_id,course_name,instructor_id\nC1,Math,\n")
+
+
+@pytest.fixture
+def bulk_calls(monkeypatch):
+    calls = []
+    real = importer.bulk_writes
+
+    def spy(conn):
+        calls.append(conn)
+        return real(conn)
+    monkeypatch.setattr(importer, "bulk_writes", spy)
+    return calls
+
+
+def test_small_imports_skip_the_bulk_rebuild(tmp_path, conn, bulk_calls, monkeypatch):
+    monkeypatch.setattr(importer, "BULK_MIN_ROWS", 50)
+    roster(tmp_path, 10)
+    import_csv(conn, str(tmp_path))
+    assert bulk_calls == []
+    assert [r[1] for r in search(conn, "student 7")] == ["S7"]
+
+    # 60 students and their links pass BULK_MIN_ROWS and the 21 rows already there
+    roster(tmp_path, 60, "T")
+    report = import_csv(conn, str(tmp_path))
+    assert len(bulk_calls) == 1 and report.imported["students.csv"] == 60 and report.links == 60
+    assert [r[1] for r in search(conn, "t59")] == ["T59"]
+    assert conn.execute("SELECT count(*) FROM registrations").fetchone()[0] == 70
+    indexes = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"registrations_course_idx", "students_email_idx"} <= indexes
+
+
+def test_bulk_threshold_grows_with_the_database(tmp_path, conn, bulk_calls, monkeypatch):
+    monkeypatch.setattr(importer, "BULK_MIN_ROWS", 10)
+    roster(tmp_path, 100)
+    import_csv(conn, str(tmp_path))
+    assert len(bulk_calls) == 1
+    roster(tmp_path, 20, "T")
+    import_csv(conn, str(tmp_path))
+    assert len(bulk_calls) == 1
@@ -0,0 +1,71 @@
+import pytest
+
+from db import RecordsQuery, init_db, load_all
+from registry import SchoolRegistry
+from search_index import LazyIndex, course_row, instructor_row, student_row
+
+ROW_FNS = (student_row, instructor_row, course_row)
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = init_db(str(tmp_path / "school.db"))
+    conn.executemany("INSERT INTO instructors VALUES(?,?,?,?)",
+                     ((f"I{k}", f"Teacher {k}", 40, f"t{k}@school.edu") for k in range(3)))
+    conn.executemany("INSERT INTO students VALUES(?,?,?,?)",
+                     ((f"S{k:03d}", f"Student {k}", 20, f"s{k}@school.edu") for k in range(500)))
+    conn.executemany("INSERT INTO courses VALUES(?,?,?)",
+                     (("C1", "Math", "I0"), ("C2", "Art", "I0"), ("C3", "Empty", None), ("C4", "Music", "I2")))
+    conn.executemany("INSERT INTO registrations VALUES(?,?)",
+                     ((f"S{k:03d}", c) for k in range(500) for c in ("C1", "C2", "C4")[:k % 4]))
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def _rows(records, row_fn):
+    return {row_fn(r)[0]: row_fn(r) for r in records}
+
+
+def test_lazy_records_match_the_full_load(conn):
+    eager = load_all(conn)
+    lazy = load_all(conn, lazy=True)
+    for full, records, row_fn, table in zip(eager, lazy, ROW_FNS, ("students", "instructors", "courses")):
+        index = LazyIndex(records, row_fn, RecordsQuery(conn, table))
+        assert len(records) == len(full)
+        assert {r: index.row(r) for r in _rows(full, row_fn)} == _rows(full, row_fn)
+
+
+def test_first_page_builds_only_that_page(conn):
+    students, _, courses = load_all(conn, lazy=True)
+    students.page_size = 50
+    first = students[0]
+    assert first.student_id == "S000"
+    assert len(students.loaded()) == 50
+    # a course's roster holds only what was built until it is resolved
+    math = courses.get("C1")
+    assert len(math.enrolled_students) < 375
+    courses.resolve_roster(math)
+    assert len(math.enrolled_students) == 375
+    assert students[120].student_id == "S120"
+    assert [s.student_id for s in students] == [f"S{k:03d}" for k in range(500)]
+
+
+def test_lazy_index_pages_filters_and_sorts(conn):
+    students, _, _ = load_all(conn, lazy=True)
+    students.page_size = 50
+    index = LazyIndex(students, student_row, RecordsQuery(conn, "students", page_size=50))
+    keys = index.search([""] * 5)
+    assert len(keys) == 500 and keys[1:3] == ["S001", "S002"]
+    assert len(students.loaded()) == 50
+    assert list(index.search(["", "student 49", "", "", ""])) == ["S049"] + [f"S{k}" for k in range(490, 500)]
+    desc = keys.ordered(0, True)
+    assert desc[0] == "S499"
+    assert index.row("S003")[4] == "Math C1, Art C2, Music C4"
+    with pytest.raises(KeyError):
+        index.row("S999")
+
+
+def test_lazy_load_cannot_fill_a_registry(conn):
+    with pytest.raises(ValueError):
+        load_all(conn, into=SchoolRegistry(), lazy=True)
@@ -0,0 +1,58 @@
+"""The hot queries must search an index, never scan their tables.
+
+Runs EXPLAIN QUERY PLAN on a small, ANALYZEd database built with
+init_db(), so every migration's indexes are in place.
+"""
+import pytest
+
+from db import init_db
+
+# (description, SQL, parameters, tables that must be searched, not scanned,
+#  named as the plan shows them: by alias when the query uses one)
+HOT_QUERIES = [
+    ("students of a course",
+     "SELECT student_id FROM registrations WHERE course_id = ?", ("C1",), ["registrations"]),
+    ("courses of a student",
+     "SELECT course_id FROM registrations WHERE student_id = ?", ("S1",), ["registrations"]),
+    ("cascade from a deleted course",
+     "SELECT 1 FROM registrations WHERE course_id = ?", ("C1",), ["registrations"]),
+    ("courses of an instructor",
+     "SELECT course_id FROM courses WHERE instructor_id = ?", ("I1",), ["courses"]),
+    ("student by email",
+     "SELECT student_id FROM students WHERE email = ?", ("s1@school.edu",), ["students"]),
+    ("instructor by email",
+     "SELECT instructor_id FROM instructors WHERE email = ?", ("t1@school.edu",), ["instructors"]),
+    ("student by id",
+     "SELECT name FROM students WHERE student_id = ?", ("S1",), ["students"]),
+    ("roster with names",
+     "SELECT s.student_id, s.name FROM registrations r JOIN students s ON s.student_id = r.student_id "
+     "WHERE r.course_id = ?", ("C1",), ["r", "s"]),
+    ("registration diff in save_all",
+     "DELETE FROM registrations WHERE student_id = ? AND course_id = ?", ("S1", "C1"), ["registrations"]),
+]
+
+
+@pytest.fixture(scope="module")
+def conn():
+    conn = init_db(":memory:")
+    n_students, n_courses, n_instructors = 2000, 50, 10
+    conn.executemany("INSERT INTO instructors VALUES(?,?,?,?)",
+                     ((f"I{k}", f"Teacher {k}", 40, f"t{k}@school.edu") for k in range(n_instructors)))
+    conn.executemany("INSERT INTO courses VALUES(?,?,?)",
+                     ((f"C{k}", f"Course {k}", f"I{k % n_instructors}") for k in range(n_courses)))
+    conn.executemany("INSERT INTO students VALUES(?,?,?,?)",
+                     ((f"S{k}", f"Student {k}", 20, f"s{k}@school.edu") for k in range(n_students)))
+    conn.executemany("INSERT INTO registrations VALUES(?,?)",
+                     ((f"S{k}", f"C{(k + j) % n_courses}") for k in range(n_students) for j in range(3)))
+    conn.execute("ANALYZE")
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("sql, params, tables", [q[1:] for q in HOT_QUERIES], ids=[q[0] for q in HOT_QUERIES])
+def test_hot_query_searches_an_index(conn, sql, params, tables):
+    steps = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+    for table in tables:
+        assert not [s for s in steps if s.split()[:2] == ["SCAN", table]], steps
+        assert [s for s in steps if s.startswith(f"SEARCH {table} USING ")], steps
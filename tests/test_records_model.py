@@ -0,0 +1,215 @@
+import os
+import random
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PyQt5.QtWidgets")
+
+from PyQt5.QtCore import QModelIndex, Qt
+from PyQt5.QtTest import QAbstractItemModelTester
+
+from db import RecordsQuery, init_db, load_all
+from gui_pyqt import RecordsModel, _sort_key
+from search_index import LazyIndex, SearchIndex, student_row
+
+HEADERS = ["ID", "Name", "Age"]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def make_index(n=300):
+    index = SearchIndex(len(HEADERS))
+    for k in range(n):
+        index.put(f"S{k:04d}", (f"S{k:04d}", f"Student {k % 37} {k}", 18 + k % 13))
+    return index
+
+
+def make_model(index):
+    model = RecordsModel(HEADERS, index)
+    QAbstractItemModelTester(model, QAbstractItemModelTester.FailureReportingMode.Fatal, model)
+    model.reload()
+    return model
+
+
+def shown(model):
+    return [[model.data(model.createIndex(r, c)) for c in range(model.columnCount())]
+            for r in range(model.rowCount())]
+
+
+def expected(index, queries, sort=None):
+    keys = index.search(queries)
+    if sort is not None:
+        col, order = sort
+        keys.sort(key=lambda k: _sort_key(index.row(k)[col]), reverse=order == Qt.DescendingOrder)
+    return [["" if v is None else str(v) for v in index.row(k)] for k in keys]
+
+
+def test_rows_and_headers():
+    model = make_model(make_index(5))
+    assert model.rowCount() == 5 and model.columnCount() == 3
+    assert model.headerData(1, Qt.Horizontal) == "Name"
+    assert shown(model)[2] == ["S0002", "Student 2 2", "20"]
+    assert model.rowCount(model.createIndex(0, 0)) == 0 and model.data(QModelIndex()) is None
+
+
+def test_typing_narrows_and_deleting_widens():
+    index = make_index()
+    model = make_model(index)
+    model.sort(2, Qt.DescendingOrder)
+    for name in ["s", "st", "student 1", "student 12", "student 1", "", "student 3"]:
+        queries = ["", name, ""]
+        model.set_queries(queries)
+        assert shown(model) == expected(index, queries, (2, Qt.DescendingOrder)), name
+
+
+@pytest.mark.parametrize("col", [0, 1, 2])
+@pytest.mark.parametrize("order", [Qt.AscendingOrder, Qt.DescendingOrder])
+def test_sort_matches_a_sorted_search(col, order):
+    index = make_index()
+    model = make_model(index)
+    model.set_queries(["", "student 2", ""])
+    model.sort(col, order)
+    assert shown(model) == expected(index, ["", "student 2", ""], (col, order))
+
+
+def test_numbers_sort_numerically():
+    index = SearchIndex(1)
+    for k, age in enumerate([9, 100, 25, None]):
+        index.put(f"K{k}", (age,))
+    model = make_model(index)
+    model.sort(0)
+    assert [r[0] for r in shown(model)] == ["9", "25", "100", ""]
+
+
+def test_paged_sql_keys(tmp_path):
+    conn = init_db(str(tmp_path / "school.db"))
+    rng = random.Random(7)
+    conn.executemany("INSERT INTO students (student_id, name, age, email) VALUES (?, ?, ?, ?)",
+                     [(f"S{k:04d}", f"Student {rng.randrange(50)}", rng.randrange(18, 60), f"s{k}@x.edu")
+                      for k in range(600)])
+    conn.commit()
+    model = RecordsModel(HEADERS + ["Email", "Courses"], RecordsQuery(conn, "students", page_size=64))
+    model.reload()
+    assert model.rowCount() == 600
+    model.set_queries(["", "student 1", "", "", ""])
+    model.sort(2, Qt.DescendingOrder)
+    rows = shown(model)
+    want = conn.execute("SELECT student_id FROM students WHERE lower(name) LIKE '%student 1%'").fetchall()
+    assert sorted(r[0] for r in rows) == sorted(sid for sid, in want)
+    ages = [int(r[2]) for r in rows]
+    assert ages == sorted(ages, reverse=True)
+    conn.close()
+
+
+
+def test_lazy_records_show_one_page(tmp_path):
+    conn = init_db(str(tmp_path / "school.db"))
+    conn.executemany("INSERT INTO students (student_id, name, age, email) VALUES (?, ?, ?, ?)",
+                     [(f"S{k:04d}", f"Student {k}", 18 + k % 40, f"s{k}@x.edu") for k in range(600)])
+    conn.commit()
+    students, _, _ = load_all(conn, lazy=True)
+    students.page_size = 64
+    model = RecordsModel(HEADERS + ["Email", "Courses"],
+                         LazyIndex(students, student_row, RecordsQuery(conn, "students", page_size=64)))
+    model.reload()
+    assert model.rowCount() == 600
+    assert model.data(model.createIndex(0, 1)) == "Student 0"
+    assert len(students.loaded()) == 64
+    model.set_queries(["", "student 1", "", "", ""])
+    model.sort(2, Qt.DescendingOrder)
+    ages = [int(r[2]) for r in shown(model)]
+    assert len(ages) == 111 and ages == sorted(ages, reverse=True)
+    conn.close()
+
+class Signals:
+    def __init__(self, model):
+        self.counts = dict.fromkeys(["reset", "inserted", "removed", "changed"], 0)
+        for name, signal in (("reset", model.modelReset), ("inserted", model.rowsInserted),
+                             ("removed", model.rowsRemoved), ("changed", model.dataChanged)):
+            signal.connect(lambda *args, name=name: self.counts.__setitem__(name, self.counts[name] + 1))
+
+    def take(self):
+        counts, self.counts = self.counts, dict.fromkeys(self.counts, 0)
+        return {name: n for name, n in counts.items() if n}
+
+
+def test_small_changes_are_patched_not_reset():
+    index = make_index()
+    model = make_model(index)
+    signals = Signals(model)
+    model.reload()
+    assert signals.take() == {}
+    index.put("S0005", ("S0005", "Renamed", 30))
+    model.reload()
+    assert signals.take() == {"changed": 1}
+    index.discard("S0010")
+    index.put("S9999", ("S9999", "New", 20))
+    model.reload()
+    assert signals.take() == {"removed": 1, "inserted": 1}
+    model.sort(1)
+    index.put("S0007", ("S0007", "AAA first", 30))
+    model.reload()
+    assert signals.take() == {"removed": 1, "inserted": 1} and shown(model)[0][0] == "S0007"
+    for k in range(model.PATCH_LIMIT + 1):
+        index.put(f"S{k:04d}", (f"S{k:04d}", f"Bulk {k}", 1))
+    model.reload()
+    assert signals.take() == {"reset": 1}
+    index.clear()
+    model.reload()
+    assert signals.take() == {"reset": 1} and model.rowCount() == 0
+
+
+def test_patching_matches_a_rebuild():
+    rng = random.Random(11)
+    index = make_index(200)
+    # without a QAbstractItemModelTester, which re-checks the model on each row insert
+    model = RecordsModel(HEADERS, index)
+    fresh = RecordsModel(HEADERS, index)
+    fresh.PATCH_LIMIT = -1  # always reset
+    for step in range(400):
+        burst = rng.randrange(1, 5) if rng.random() < .95 else model.PATCH_LIMIT + 20
+        for _ in range(burst):
+            r, keys = rng.random(), index.keys()
+            if r < .3 and keys:
+                index.discard(rng.choice(keys))
+            elif r < .6:
+                index.put(f"N{step}-{rng.randrange(10**6)}", ("N", f"Student {rng.randrange(40)}", rng.randrange(99)))
+            elif keys:
+                key = rng.choice(keys)
+                index.put(key, (key, f"Student {rng.randrange(40)}", rng.randrange(99)))
+        if rng.random() < .1:
+            sort = (rng.randrange(3), rng.choice([Qt.AscendingOrder, Qt.DescendingOrder]))
+            model.sort(*sort)
+            fresh.sort(*sort)
+        if rng.random() < .1:
+            queries = ["", rng.choice(["", "student 1", "stu", "student 2"]), ""]
+            model.set_queries(queries)
+            fresh.set_queries(queries)
+        model.reload()
+        fresh.reload()
+        got = [index.row(model.key(r)) for r in range(model.rowCount())]
+        want = [index.row(fresh.key(r)) for r in range(fresh.rowCount())]
+        if model._sort is None:
+            assert got == want, step
+        else:
+            # ties may sit in any order; the sort column and the rows must agree
+            col = model._sort[0]
+            assert [row[col] for row in got] == [row[col] for row in want], step
+            assert sorted(got) == sorted(want), step
+
+
+def test_patch_combo_tells_ids_apart_by_case():
+    from classes import Student
+    from gui_pyqt import patch_combo, student_label
+    lower, upper = Student("Lower", 20, "l@school.edu", "s1"), Student("Upper", 20, "u@school.edu", "S1")
+    cb = QtWidgets.QComboBox()
+    patch_combo(cb, None, student_label, [lower, upper])
+    upper.name = "Renamed"
+    patch_combo(cb, [("updated", upper)], student_label, [lower, upper])
+    assert [cb.itemText(k) for k in range(cb.count())] == ["s1 | Lower", "S1 | Renamed"]
+    patch_combo(cb, [("removed", upper)], student_label, [lower])
+    assert [cb.itemText(k) for k in range(cb.count())] == ["s1 | Lower"]
@@ -0,0 +1,36 @@
+import pytest
+
+from db import RecordsQuery, init_db
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = init_db(str(tmp_path / "school.db"))
+    conn.executemany("INSERT INTO students VALUES(?,?,?,?)",
+                     ((f"S{k:03d}", f"Student {k}", 20, f"s{k}@school.edu") for k in range(500)))
+    conn.executemany("INSERT INTO courses VALUES(?,?,NULL)", (("C1", "Math"), ("C2", "Art"), ("C3", "Empty")))
+    # every third student registers for nothing
+    conn.executemany("INSERT INTO registrations VALUES(?,?)",
+                     ((f"S{k:03d}", "C1" if k % 2 else "C2") for k in range(500) if k % 3))
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_sort_on_list_column_with_empty_values_pages_through(conn, descending):
+    query = RecordsQuery(conn, "students", page_size=50)
+    keys = query.search([""] * 5).ordered(4, descending)
+    seen = [keys[i] for i in range(len(keys))]
+    assert len(seen) == 500
+    assert sorted(seen) == [f"S{k:03d}" for k in range(500)]
+    courses = [query.row(k)[4] for k in seen]
+    assert courses == sorted(courses, reverse=descending)
+    assert courses.count("") == len(range(0, 500, 3))
+
+
+def test_course_without_students_lists_empty_string(conn):
+    query = RecordsQuery(conn, "courses", page_size=1)
+    keys = query.search([""] * 4).ordered(3, False)
+    assert [keys[i] for i in range(len(keys))][0] == "C3"
+    assert query.row("C3")[3] == ""
@@ -0,0 +1,110 @@
+import random
+
+import pytest
+
+from classes import Course, Instructor, Student
+from registry import SchoolRegistry
+
+
+def scan_by_name(people, prefix):
+    return {p for p in people if p.name.lower().startswith(prefix.lower())}
+
+
+def test_indexes_match_a_scan_after_edits():
+    rng = random.Random(7)
+    reg = SchoolRegistry()
+    names = ["Ann", "Anna", "Annabel", "Bob", "Bobby", "Al", "Zed"]
+    for k in range(200):
+        reg.add_student(Student(rng.choice(names), 20, f"s{k % 40}@school.edu", f"S{k}"))
+    for k in range(300):
+        s = reg.get_student(f"S{rng.randrange(200)}")
+        if s is None:
+            continue
+        if rng.random() < 0.3:
+            reg.remove_student(s)
+        else:
+            reg.update_student(s, rng.choice(names), 21, f"s{rng.randrange(40)}@School.edu")
+
+    students = list(reg.students)
+    for prefix in ("a", "an", "ann", "anna", "annab", "b", "bobby", "z", "q"):
+        assert set(reg.students_by_name(prefix)) == scan_by_name(students, prefix)
+    for k in range(40):
+        email = f"s{k}@school.edu"
+        assert set(reg.students_by_email(email.upper())) == {s for s in students if s.email.lower() == email}
+    assert all(reg.get_student(s.student_id) is s for s in students)
+
+
+def test_course_name_index_follows_renames():
+    reg = SchoolRegistry()
+    c = reg.add_course(Course("C1", "Mathematics"))
+    reg.add_course(Course("C2", "Music"))
+    assert {x.course_id for x in reg.courses_by_name("m")} == {"C1", "C2"}
+    reg.update_course(c, "Algebra")
+    assert [x.course_id for x in reg.courses_by_name("mat")] == []
+    assert [x.course_id for x in reg.courses_by_name("alg")] == ["C1"]
+
+
+def test_duplicate_id_is_refused():
+    reg = SchoolRegistry()
+    reg.add_student(Student("Ann", 20, "a@school.edu", "S1"))
+    with pytest.raises(ValueError):
+        reg.add_student(Student("Bob", 20, "b@school.edu", "S1"))
+
+
+def test_remove_unlinks_and_records_the_deletion():
+    reg = SchoolRegistry()
+    s = reg.add_student(Student("Ann", 20, "a@school.edu", "S1"))
+    i = reg.add_instructor(Instructor("Ted", 40, "t@school.edu", "I1"))
+    c = reg.add_course(Course("C1", "Math"))
+    reg.register(s, c)
+    reg.assign(i, c)
+    reg.remove_course(c)
+    assert c not in s.registered_courses and c not in i.assigned_courses
+    assert reg.removed["courses"] == {"C1"}
+    reg.add_course(Course("C1", "Math again"))
+    assert reg.removed["courses"] == set()
+
+
+def test_replace_queues_vanished_ids_unless_synced():
+    reg = SchoolRegistry()
+    reg.add_student(Student("Ann", 20, "a@school.edu", "S1"))
+    reg.add_student(Student("Bob", 20, "b@school.edu", "S2"))
+    reg.replace([Student("Bob", 20, "b@school.edu", "S2")], [], [])
+    assert reg.removed["students"] == {"S1"}
+    assert reg.students_by_name("ann") == []
+    reg.replace([], [], [], synced=True)
+    assert reg.removed["students"] == set() and len(reg) == 0
+
+
+def test_refused_assign_changes_nothing():
+    reg = SchoolRegistry()
+    ted = reg.add_instructor(Instructor("Ted", 40, "ted@school.edu", "I1"))
+    tia = reg.add_instructor(Instructor("Tia", 41, "tia@school.edu", "I2"))
+    math = reg.add_course(Course("C1", "Math"))
+    events = []
+    reg.subscribe(lambda event, *records: events.append((event, *records)))
+    reg.assign(ted, math)
+    reg.assign(ted, math)
+    assert events == [("assigned", ted, math)]
+    with pytest.raises(ValueError):
+        reg.assign(tia, math)
+    assert events == [("assigned", ted, math)]
+    assert math not in tia.assigned_courses and math.instructor is ted
+    reg.unassign(ted, math)
+    reg.assign(tia, math)
+    assert list(tia.assigned_courses) == [math] and math.instructor is tia
+
+
+def test_unassign_emits_only_when_something_changed():
+    reg = SchoolRegistry()
+    ted = reg.add_instructor(Instructor("Ted", 40, "ted@school.edu", "I1"))
+    tia = reg.add_instructor(Instructor("Tia", 41, "tia@school.edu", "I2"))
+    math = reg.add_course(Course("C1", "Math"))
+    reg.assign(ted, math)
+    events = []
+    reg.subscribe(lambda event, *records: events.append((event, *records)))
+    reg.unassign(tia, math)
+    assert events == [] and math.instructor is ted
+    reg.unassign(ted, math)
+    reg.unassign(ted, math)
+    assert events == [("unassigned", ted, math)] and math.instructor is None
@@ -0,0 +1,94 @@
+import random
+
+from classes import Course, Instructor, Student
+from registry import SchoolRegistry
+from search_index import SchoolSearch, SearchIndex
+
+
+def test_changed_since_lists_real_changes_oldest_first():
+    index = SearchIndex(2)
+    for k in range(5):
+        index.put(f"K{k}", (f"K{k}", f"name {k}"))
+    stamp = index.stamp
+    assert index.changed_since(stamp) == []
+    index.put("K1", ("K1", "name 1"))  # same row: not a change
+    assert index.stamp == stamp and index.changed_since(stamp) == []
+    index.put("K3", ("K3", "renamed"))
+    index.discard("K0")
+    index.put("K1", ("K1", "NAME 1"))
+    index.discard("missing")
+    assert index.changed_since(stamp) == ["K3", "K0", "K1"]
+    assert index.version("K1") == index.stamp
+    index.put("K0", ("K0", "back"))
+    assert index.changed_since(stamp) == ["K3", "K1", "K0"]
+    index.clear()
+    assert index.changed_since(stamp) is None and index.changed_since(index.stamp) == []
+
+
+def test_search_keeps_insertion_order_across_edits():
+    index = SearchIndex(2)
+    for k in range(20):
+        index.put(f"K{k}", (f"K{k}", f"name {k}"))
+    index.put("K3", ("K3", "name three"))
+    index.discard("K4")
+    index.put("K4", ("K4", "name 4"))
+    assert index.search(["", "name"]) == [f"K{k}" for k in range(20) if k != 4] + ["K4"]
+    assert index.search(["k1", ""]) == [f"K{k}" for k in [1] + list(range(10, 20))]
+    assert index.search(["", "three"]) == ["K3"] and index.search(["", "name 4"]) == ["K4"]
+
+
+def test_touch_renders_once_on_read():
+    calls = []
+    index = SearchIndex(1, lambda rec: calls.append(rec) or (rec["name"],))
+    rec = {"name": "a"}
+    for name in "abc":
+        rec["name"] = name
+        index.touch("K", rec)
+    assert calls == []
+    assert index.row("K") == ("c",) and len(calls) == 1
+
+
+def rows(index):
+    return {k: index.row(k) for k in index.keys()}
+
+
+def test_school_search_follows_the_registry():
+    rng = random.Random(3)
+    reg = SchoolRegistry()
+    search = SchoolSearch(reg)
+    courses = [reg.add_course(Course(f"C{k}", f"Course {k}")) for k in range(6)]
+    people = [reg.add_instructor(Instructor(f"I {k}", 40, f"i{k}@school.edu", f"I{k}")) for k in range(3)]
+    for k in range(40):
+        s = reg.add_student(Student(f"S {k}", 20, f"s{k}@school.edu", f"S{k}"))
+        reg.register(s, rng.choice(courses))
+    for step in range(300):
+        r = rng.random()
+        students, courses = list(reg.students), list(reg.courses)
+        if r < .2 and students:
+            s = rng.choice(students)
+            reg.update_student(s, f"S {rng.randrange(999)}", s.age, s.email)
+        elif r < .35 and courses:
+            reg.update_course(rng.choice(courses), f"Course {rng.randrange(999)}")
+        elif r < .5 and students and courses:
+            s, c = rng.choice(students), rng.choice(courses)
+            (reg.unregister if c in s.registered_courses else reg.register)(s, c)
+        elif r < .6 and courses:
+            c = rng.choice(courses)
+            if c.instructor is None:
+                reg.assign(rng.choice(people), c)
+            else:
+                reg.unassign(c.instructor, c)
+        elif r < .7:
+            i = rng.choice(people)
+            reg.update_instructor(i, f"I {rng.randrange(999)}", i.age, i.email)
+        elif r < .8 and students:
+            reg.remove_student(rng.choice(students))
+        elif r < .85 and courses:
+            reg.remove_course(rng.choice(courses))
+        elif r < .95:
+            reg.add_student(Student("New", 20, f"n{step}@school.edu", f"N{step}"))
+        else:
+            reg.add_course(Course(f"D{step}", "Added"))
+        fresh = SchoolSearch(reg)
+        for name in ("students", "instructors", "courses"):
+            assert rows(getattr(search, name)) == rows(getattr(fresh, name)), (step, name)